@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Tuple
+
+from arbitrage_engine import OpportunitySnapshot
+from metrics import SCAN_REQUESTS, SCAN_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+USER = 'user'
+GLOBAL = 'global'
+
+
+class QuotaExceeded(Exception):
+    """Scan refused; retry_after is the suggested wait in seconds.
+
+    `repeated` is set when the user was already told to wait and the window
+    has not passed yet, so callers can stay silent instead of replying again.
+    """
+
+    def __init__(self, scope: str, retry_after: float, repeated: bool = False):
+        super().__init__(f"{scope} scan quota exceeded, retry in {retry_after:.1f}s")
+        self.scope = scope
+        self.retry_after = retry_after
+        self.repeated = repeated
+
+
+class TokenBucket:
+    """`rate` tokens per second, holding at most `burst`"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated_at')
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def take(self) -> float:
+        """Consume a token and return 0, or return the seconds until one is available"""
+        self._refill(time.monotonic())
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def full(self) -> bool:
+        self._refill(time.monotonic())
+        return self.tokens >= self.burst
+
+
+class FairQueue:
+    """Admission gate: at most `concurrency` scans at once, started at most `rate` per second.
+
+    Waiters are grouped per user and served round-robin, so one user with
+    several queued scans cannot push everybody else back.
+    """
+
+    def __init__(self, concurrency: int, rate: float, burst: float, max_waiting: int):
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiting: 'OrderedDict[int, Deque[asyncio.Future]]' = OrderedDict()
+        self.pending = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, user_id: int):
+        if not self.waiting and self.active < self.concurrency and not self.bucket.take():
+            self.active += 1
+            return
+        if self.pending >= self.max_waiting:
+            raise QuotaExceeded(GLOBAL, self.pending / self.bucket.rate)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.setdefault(user_id, deque()).append(future)
+        self.pending += 1
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Slot verilmişti ama kullanılmayacak
+                self.release()
+            else:
+                self._discard(user_id, future)
+            raise
+
+    def release(self):
+        self.active -= 1
+        self._dispatch()
+
+    def _discard(self, user_id: int, future: asyncio.Future):
+        queue = self.waiting.get(user_id)
+        if queue is None or future not in queue:
+            return
+        queue.remove(future)
+        self.pending -= 1
+        if not queue:
+            del self.waiting[user_id]
+
+    def _on_timer(self):
+        self._timer = None
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.waiting and self.active < self.concurrency:
+            user_id, queue = next(iter(self.waiting.items()))
+            future = queue[0]
+            if future.done():
+                # İptal edilmiş, sahibi henüz temizlemedi
+                self._discard(user_id, future)
+                continue
+            wait = self.bucket.take()
+            if wait:
+                if self._timer is None:
+                    self._timer = asyncio.get_running_loop().call_later(wait, self._on_timer)
+                return
+            queue.popleft()
+            self.pending -= 1
+            if queue:
+                # Round-robin: bu kullanıcının kalanı sıranın sonuna
+                self.waiting.move_to_end(user_id)
+            else:
+                del self.waiting[user_id]
+            self.active += 1
+            future.set_result(None)
+
+
+class ScanService:
+    """Single entry point for user-triggered opportunity reads.
+
+    Upstream traffic is already bounded by the snapshot cache; this layer
+    bounds what users can make the bot do with it:
+    - repeated requests from a user for a view join the one in flight,
+    - each user gets a token bucket (`user_rate`/`user_burst`),
+    - everything passes a FairQueue that caps concurrency and scans per
+      second globally, serving users round-robin.
+    Exempt users (admin) skip the per-user quota only.
+    """
+
+    def __init__(self, snapshots: Callable[[str], Awaitable[OpportunitySnapshot]],
+                 user_rate: float = 0.1, user_burst: float = 3,
+                 global_rate: float = 20, global_burst: float = 40,
+                 concurrency: int = 8, max_waiting: int = 100,
+                 exempt: Callable[[int], bool] = None, max_users: int = 10000):
+        self.snapshots = snapshots
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.exempt = exempt or (lambda user_id: False)
+        self.max_users = max_users
+        self.queue = FairQueue(concurrency, global_rate, global_burst, max_waiting)
+        # LRU: uzun süredir gelmeyen kullanıcıların kovası zaten dolu, atılabilir
+        self.buckets: 'OrderedDict[int, TokenBucket]' = OrderedDict()
+        self._inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+        # Reddedilen kullanıcılar -> bekleme süresinin bittiği an (bu arada tekrar uyarılmaz)
+        self._refused_until: Dict[int, float] = {}
+
+    def _take_user_token(self, user_id: int):
+        bucket = self.buckets.get(user_id)
+        if bucket is None:
+            bucket = self.buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            self._evict()
+        else:
+            self.buckets.move_to_end(user_id)
+        wait = bucket.take()
+        now = time.monotonic()
+        if not wait:
+            self._refused_until.pop(user_id, None)
+            return
+        SCAN_REQUESTS.inc('user_quota')
+        repeated = self._refused_until.get(user_id, 0.0) > now
+        if not repeated:
+            self._refused_until[user_id] = now + wait
+        raise QuotaExceeded(USER, wait, repeated)
+
+    def _evict(self):
+        while len(self.buckets) > self.max_users:
+            user_id, bucket = next(iter(self.buckets.items()))
+            if not bucket.full():
+                break
+            del self.buckets[user_id]
+            self._refused_until.pop(user_id, None)
+
+    async def scan(self, user_id: int, view: str) -> OpportunitySnapshot:
+        """Snapshot for a view on behalf of a user; raises QuotaExceeded when refused"""
+        key = (user_id, view)
+        task = self._inflight.get(key)
+        if task is not None:
+            SCAN_REQUESTS.inc('coalesced')
+            return await asyncio.shield(task)
+        if not self.exempt(user_id):
+            self._take_user_token(user_id)
+        task = asyncio.ensure_future(self._run(user_id, view))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._finished(key, t))
+        # shield: ilk çağıran iptal edilse de birleşen diğer çağıranlar cevabı alır
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Tuple[int, str], task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Bekleyen kalmadıysa "exception never retrieved" uyarısı çıkmasın
+            task.exception()
+
+    async def _run(self, user_id: int, view: str) -> OpportunitySnapshot:
+        start = time.perf_counter()
+        try:
+            await self.queue.acquire(user_id)
+        except QuotaExceeded:
+            SCAN_REQUESTS.inc('global_quota')
+            raise
+        SCAN_WAIT_SECONDS.observe(time.perf_counter() - start)
+        try:
+            snapshot = await self.snapshots(view)
+        finally:
+            self.queue.release()
+        SCAN_REQUESTS.inc('served')
+        return snapshot
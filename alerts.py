@@ -0,0 +1,294 @@
+import asyncio
+import bisect
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, FrozenSet, Iterator, List, Mapping, Optional, Set, Tuple
+
+from telegram.error import Forbidden, RetryAfter
+
+from access import TokenBucket
+from arbitrage_engine import OpportunitySnapshot
+from metrics import ALERTS_SENT, ALERT_MATCH_SECONDS
+
+logger = logging.getLogger(__name__)
+
+ANY_SYMBOL = '*'
+
+# (symbol, buy exchange, sell exchange)
+Route = Tuple[str, str, str]
+Match = Tuple['Subscription', Mapping]
+
+
+@dataclass(frozen=True)
+class Subscription:
+    id: int
+    user_id: int
+    symbol: Optional[str]  # None: her sembol
+    exchanges: FrozenSet[str]  # Boş: her borsa
+    min_profit: float
+    min_volume: float
+
+    def accepts(self, opp: Mapping) -> bool:
+        """Volume and exchange checks; symbol and profit are resolved by the index"""
+        if opp['avg_volume'] < self.min_volume:
+            return False
+        return not self.exchanges or (opp['buy_exchange'] in self.exchanges
+                                      and opp['sell_exchange'] in self.exchanges)
+
+
+class SubscriptionIndex:
+    """Subscriptions bucketed by symbol ('*' for any), each bucket sorted by min_profit.
+
+    An opportunity is matched against its symbol's bucket and the wildcard
+    bucket only, taking the prefix whose min_profit is at or below its
+    profit with bisect; cost follows the number of candidates, not the
+    number of subscriptions.
+    """
+
+    def __init__(self):
+        self.by_id: Dict[int, Subscription] = {}
+        self.by_user: Dict[int, Set[int]] = {}
+        # symbol -> (sıralı min_profit listesi, aynı sırada abonelikler)
+        self.buckets: Dict[str, Tuple[List[float], List[Subscription]]] = {}
+        self.version = 0  # Her ekleme/silmede artar
+
+    def add(self, subscription: Subscription):
+        self.version += 1
+        self.by_id[subscription.id] = subscription
+        self.by_user.setdefault(subscription.user_id, set()).add(subscription.id)
+        thresholds, subscriptions = self.buckets.setdefault(subscription.symbol or ANY_SYMBOL, ([], []))
+        position = bisect.bisect_right(thresholds, subscription.min_profit)
+        thresholds.insert(position, subscription.min_profit)
+        subscriptions.insert(position, subscription)
+
+    def remove(self, subscription_id: int) -> Optional[Subscription]:
+        subscription = self.by_id.pop(subscription_id, None)
+        if subscription is None:
+            return None
+        self.version += 1
+        ids = self.by_user[subscription.user_id]
+        ids.discard(subscription_id)
+        if not ids:
+            del self.by_user[subscription.user_id]
+        key = subscription.symbol or ANY_SYMBOL
+        thresholds, subscriptions = self.buckets[key]
+        position = bisect.bisect_left(thresholds, subscription.min_profit)
+        while subscriptions[position].id != subscription_id:
+            position += 1
+        del thresholds[position]
+        del subscriptions[position]
+        if not subscriptions:
+            del self.buckets[key]
+        return subscription
+
+    def remove_user(self, user_id: int) -> List[Subscription]:
+        return [self.remove(subscription_id) for subscription_id in list(self.by_user.get(user_id, ()))]
+
+    def for_user(self, user_id: int) -> List[Subscription]:
+        return sorted((self.by_id[i] for i in self.by_user.get(user_id, ())), key=lambda s: s.id)
+
+    def match(self, opp: Mapping) -> Iterator[Subscription]:
+        profit = opp['profit_percent']
+        for key in (opp['symbol'], ANY_SYMBOL):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            thresholds, subscriptions = bucket
+            for subscription in subscriptions[:bisect.bisect_right(thresholds, profit)]:
+                if subscription.accepts(opp):
+                    yield subscription
+
+    def __len__(self):
+        return len(self.by_id)
+
+
+class AlertDispatcher:
+    """Rate-limited fan-out of alert messages.
+
+    Pending alerts are held per chat; new matches for a chat that still has
+    an unsent message are merged into it. The worker starts at most
+    `global_rate` messages per second overall and one per `chat_interval`
+    seconds per chat, with at most `max_in_flight` sends awaiting an answer
+    (the outbound scheduler may hold them behind user replies). A flood
+    error that reaches it pauses dispatching for Telegram's retry_after;
+    chats that blocked the bot are reported via `on_blocked`.
+    """
+
+    def __init__(self, global_rate: float = 25, chat_interval: float = 1.0, max_items: int = 10,
+                 max_in_flight: int = 50, on_blocked: Callable[[int], None] = None):
+        self.bucket = TokenBucket(global_rate, global_rate)
+        self.chat_interval = chat_interval
+        self.max_items = max_items
+        self.max_in_flight = max_in_flight
+        self.on_blocked = on_blocked
+        self.pending: 'OrderedDict[int, List[Match]]' = OrderedDict()
+        self.last_sent: Dict[int, float] = {}
+        self.in_flight: Set[int] = set()
+        self.paused_until = 0.0
+        self._wake = asyncio.Event()
+        self.sent = 0
+
+    def enqueue(self, chat_id: int, matches: List[Match]):
+        items = self.pending.get(chat_id)
+        if items is None:
+            self.pending[chat_id] = matches[:self.max_items]
+        else:
+            # Gönderilmemiş mesaja ekle; en fazla max_items satır
+            items.extend(matches[:self.max_items - len(items)])
+        self._wake.set()
+
+    def _next_ready(self, now: float) -> Tuple[Optional[int], float]:
+        """First chat whose per-chat interval has passed, else the shortest wait"""
+        wait = self.chat_interval
+        for chat_id in self.pending:
+            if chat_id in self.in_flight:
+                continue
+            ready_at = self.last_sent.get(chat_id, 0.0) + self.chat_interval
+            if ready_at <= now:
+                return chat_id, 0.0
+            wait = min(wait, ready_at - now)
+        return None, wait
+
+    async def run(self, send: Callable[[int, List[Match]], Awaitable[None]]):
+        while True:
+            if not self.pending or len(self.in_flight) >= self.max_in_flight:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            chat_id, wait = self._next_ready(now)
+            if chat_id is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            wait = self.bucket.take()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            items = self.pending.pop(chat_id)
+            self.in_flight.add(chat_id)
+            self.last_sent[chat_id] = time.monotonic()
+            asyncio.create_task(self._deliver(send, chat_id, items))
+            self._prune(time.monotonic())
+
+    async def _deliver(self, send: Callable[[int, List[Match]], Awaitable[None]], chat_id: int, items: List[Match]):
+        try:
+            await send(chat_id, items)
+            self.sent += 1
+            ALERTS_SENT.inc('sent')
+        except RetryAfter as e:
+            ALERTS_SENT.inc('retry')
+            # Flood kontrolü: mesaj sıranın başına, tüm gönderimler bekler
+            # Gönderim sırasında gelen yeni eşleşmeler korunur
+            self.pending[chat_id] = (items + self.pending.get(chat_id, []))[:self.max_items]
+            self.pending.move_to_end(chat_id, last=False)
+            self.paused_until = max(self.paused_until, time.monotonic() + e.retry_after)
+        except Forbidden:
+            ALERTS_SENT.inc('blocked')
+            if self.on_blocked:
+                self.on_blocked(chat_id)
+        except Exception as e:
+            ALERTS_SENT.inc('failed')
+            logger.warning(f"Alert to {chat_id} failed: {e}")
+        finally:
+            self.in_flight.discard(chat_id)
+            self._wake.set()
+
+    def _prune(self, now: float):
+        if len(self.last_sent) > 4 * max(1, len(self.pending)) + 1000:
+            cutoff = now - self.chat_interval
+            self.last_sent = {chat: at for chat, at in self.last_sent.items() if at > cutoff}
+
+
+class AlertService:
+    """Matches published snapshots against subscriptions and queues alerts.
+
+    publish() only stores the snapshot; matching runs in run() on its own
+    schedule, skipping versions that were superseded meanwhile, so the
+    refresh loop never waits on subscribers. Routes whose profit, volume and
+    the subscription set did not change since the last match keep their
+    previous matches without touching the index. Alerts are edge-triggered:
+    a (subscription, route) pair alerts when it starts matching, and again
+    only after it stopped matching and `cooldown` seconds have passed.
+    """
+
+    def __init__(self, index: SubscriptionIndex, dispatcher: AlertDispatcher,
+                 allowed: Callable[[int, Mapping], bool] = None, cooldown: float = 1800,
+                 max_stall: float = 0.01):
+        self.index = index
+        self.dispatcher = dispatcher
+        self.allowed = allowed or (lambda user_id, opp: True)
+        self.cooldown = cooldown
+        self.max_stall = max_stall
+        self.latest: Optional[OpportunitySnapshot] = None
+        self.last_version = None
+        # route -> ((kâr, hacim, index sürümü), eşleşen abonelik id'leri)
+        self.active: Dict[Route, Tuple[Tuple[float, float, int], Set[int]]] = {}
+        self.alerted_at: Dict[Tuple[int, Route], float] = {}
+        self.last_prune = time.time()
+        self._wake = asyncio.Event()
+
+    def publish(self, snapshot: OpportunitySnapshot):
+        self.latest = snapshot
+        self._wake.set()
+
+    async def match(self, snapshot: OpportunitySnapshot) -> Dict[int, List[Match]]:
+        """New matches per user for one snapshot"""
+        start = last_yield = time.perf_counter()
+        now = time.time()
+        previous, active = self.active, {}
+        fresh: Dict[int, List[Match]] = {}
+        for opp in snapshot.opportunities:
+            route = (opp['symbol'], opp['buy_exchange'], opp['sell_exchange'])
+            state = (opp['profit_percent'], opp['avg_volume'], self.index.version)
+            known = previous.get(route)
+            if known is not None and known[0] == state:
+                # Hiçbir şey değişmedi: eşleşmeler aynı, yeni alarm yok
+                active[route] = known
+                continue
+            was = known[1] if known is not None else ()
+            matched = set()
+            for subscription in self.index.match(opp):
+                if not self.allowed(subscription.user_id, opp):
+                    continue
+                matched.add(subscription.id)
+                if subscription.id in was:
+                    continue
+                key = (subscription.id, route)
+                if now - self.alerted_at.get(key, 0.0) < self.cooldown:
+                    continue
+                self.alerted_at[key] = now
+                fresh.setdefault(subscription.user_id, []).append((subscription, opp))
+            active[route] = (state, matched)
+            if time.perf_counter() - last_yield > self.max_stall:
+                # Büyük snapshot'larda event loop'u bırak
+                await asyncio.sleep(0)
+                last_yield = time.perf_counter()
+        self.active = active
+        if now - self.last_prune > self.cooldown / 10:
+            self.last_prune = now
+            self.alerted_at = {key: at for key, at in self.alerted_at.items() if now - at < self.cooldown}
+        ALERT_MATCH_SECONDS.observe(time.perf_counter() - start)
+        return fresh
+
+    async def run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            snapshot = self.latest
+            if snapshot is None or snapshot.version == self.last_version:
+                continue
+            self.last_version = snapshot.version
+            try:
+                for user_id, matches in (await self.match(snapshot)).items():
+                    self.dispatcher.enqueue(user_id, matches)
+            except Exception as e:
+                logger.error(f"Alert matching failed: {e}")
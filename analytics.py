@@ -0,0 +1,139 @@
+import statistics
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Sequence, Tuple
+
+from history import HistoryStore
+
+# Bu kadar saniye kayıt gelmezse spread kapanmış sayılır (recorder heartbeat'inin 2 katı)
+DEFAULT_GAP = 600
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def parse_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value).replace(tzinfo=timezone.utc).timestamp()
+
+
+def window(hours: float, now: datetime = None) -> Tuple[str, str]:
+    """[start, end) timestamp strings for the last `hours` hours (UTC)"""
+    end = now or datetime.now(timezone.utc)
+    start = end - timedelta(hours=hours)
+    return start.strftime('%Y-%m-%d %H:%M:%S'), (end + timedelta(seconds=1)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+@dataclass
+class RouteStats:
+    """Persistence and profit distribution of one (symbol, buy, sell) route"""
+
+    symbol: str
+    buy_exchange: str
+    sell_exchange: str
+    samples: int = 0
+    profits: List[float] = field(default_factory=list, repr=False)
+    episodes: List[float] = field(default_factory=list, repr=False)  # her kesintisiz görünmenin süresi (s)
+
+    @property
+    def median_profit(self) -> float:
+        return statistics.median(self.profits) if self.profits else 0.0
+
+    @property
+    def p95_profit(self) -> float:
+        return percentile(self.profits, 0.95)
+
+    @property
+    def half_life(self) -> float:
+        """Median episode duration: half of the spread's appearances closed faster than this"""
+        return statistics.median(self.episodes) if self.episodes else 0.0
+
+    @property
+    def longest(self) -> float:
+        return max(self.episodes, default=0.0)
+
+
+@dataclass
+class PairStats:
+    """Reliability of one buy → sell exchange pair across all symbols"""
+
+    buy_exchange: str
+    sell_exchange: str
+    routes: int = 0
+    samples: int = 0
+    episodes: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def half_life(self) -> float:
+        return statistics.median(self.episodes) if self.episodes else 0.0
+
+    def persistence_ratio(self, min_persistence: float) -> float:
+        """Share of episodes that lasted at least `min_persistence` seconds"""
+        if not self.episodes:
+            return 0.0
+        return sum(1 for e in self.episodes if e >= min_persistence) / len(self.episodes)
+
+
+def route_stats(rows: Sequence[Tuple], gap: float = DEFAULT_GAP) -> List[RouteStats]:
+    """Group history rows (history.COLUMNS order) into per-route statistics.
+
+    Consecutive samples of a route closer than `gap` seconds form one episode;
+    the episode's duration is how long the spread persisted. The recorder
+    writes a closing row at a route's last sighting, so episodes shorter than
+    its heartbeat are measured to the snapshot interval, not rounded to 0.
+    """
+    grouped: Dict[Tuple[str, str, str], List[Tuple[float, float]]] = defaultdict(list)
+    for symbol, buy, sell, _, _, profit, _, timestamp in rows:
+        grouped[(symbol, buy, sell)].append((parse_timestamp(timestamp), profit))
+
+    result = []
+    for (symbol, buy, sell), samples in grouped.items():
+        samples.sort()
+        stats = RouteStats(symbol, buy, sell, samples=len(samples), profits=[p for _, p in samples])
+        episode_start = previous = samples[0][0]
+        for ts, _ in samples[1:]:
+            if ts - previous > gap:
+                stats.episodes.append(previous - episode_start)
+                episode_start = ts
+            previous = ts
+        stats.episodes.append(previous - episode_start)
+        result.append(stats)
+    return result
+
+
+def pair_stats(routes: Sequence[RouteStats]) -> List[PairStats]:
+    pairs: Dict[Tuple[str, str], PairStats] = {}
+    for route in routes:
+        key = (route.buy_exchange, route.sell_exchange)
+        pair = pairs.get(key)
+        if pair is None:
+            pair = pairs[key] = PairStats(*key)
+        pair.routes += 1
+        pair.samples += route.samples
+        pair.episodes.extend(route.episodes)
+    return list(pairs.values())
+
+
+class SpreadAnalytics:
+    """Windowed queries over the opportunity history"""
+
+    def __init__(self, store: HistoryStore, gap: float = DEFAULT_GAP, min_persistence: float = 120):
+        self.store = store
+        self.gap = gap
+        self.min_persistence = min_persistence
+
+    async def routes(self, hours: float = 24, symbol: str = None) -> List[RouteStats]:
+        """Route statistics for the window, most frequently seen first"""
+        start, end = window(hours)
+        rows = await self.store.query(start, end, symbol)
+        return sorted(route_stats(rows, self.gap), key=lambda r: (-r.samples, -r.half_life))
+
+    def reliable_pairs(self, routes: Sequence[RouteStats], limit: int = 10) -> List[PairStats]:
+        """Exchange pairs whose spreads persist, by persistence ratio then half-life"""
+        pairs = pair_stats(routes)
+        pairs.sort(key=lambda p: (-p.persistence_ratio(self.min_persistence), -p.half_life, -p.samples))
+        return pairs[:limit]
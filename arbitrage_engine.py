@@ -0,0 +1,148 @@
+import bisect
+import logging
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# build(symbol, exchange_data) -> geçerli fırsat veya None
+OpportunityBuilder = Callable[[str, Dict[str, Dict]], Optional[Dict]]
+
+
+class IncrementalArbitrageEngine:
+    """Keeps per-symbol best spreads and a ranked opportunity list up to date.
+
+    A ticker update for (exchange, symbol) only re-evaluates that symbol
+    (O(exchanges listing it)) and moves it inside the ranked list, so top-N
+    lookups are O(log n + N) instead of a full symbols x exchanges scan.
+    """
+
+    def __init__(self, build: OpportunityBuilder, excluded_exchanges: Iterable[str] = ()):
+        self.build = build
+        self.excluded_exchanges = set(excluded_exchanges)
+        self._quotes: Dict[str, Dict[str, Dict]] = {}  # symbol -> exchange -> quote
+        self._opportunities: Dict[str, Dict] = {}  # symbol -> current opportunity
+        self._keys: Dict[str, Tuple[float, str]] = {}
+        self._ranked: List[Tuple[float, str]] = []  # (-profit, symbol), artan sırada
+        # Geçici olarak gizlenen (sağlıksız) borsaların son fiyatları
+        self._suspended: Dict[str, Dict[str, Dict]] = {}
+        self.version = 0
+
+    def update(self, exchange: str, symbol: str, quote: Optional[Dict]):
+        """Apply one cell change; quote None means the symbol left the exchange"""
+        if exchange in self.excluded_exchanges:
+            return
+        suspended = self._suspended.get(exchange)
+        if suspended is not None:
+            if quote is None:
+                suspended.pop(symbol, None)
+            else:
+                suspended[symbol] = quote
+            return
+        quotes = self._quotes.get(symbol)
+        if quote is None:
+            if not quotes or quotes.pop(exchange, None) is None:
+                return
+            if not quotes:
+                del self._quotes[symbol]
+        else:
+            if quotes is None:
+                quotes = self._quotes[symbol] = {}
+            quotes[exchange] = quote
+        self._recompute(symbol)
+
+    def apply_snapshot(self, all_data: Dict[str, Dict[str, Dict]]):
+        """Diff a full exchange -> symbol -> quote mapping against the current state"""
+        for exchange, exchange_data in all_data.items():
+            if exchange in self.excluded_exchanges:
+                continue
+            if exchange in self._suspended:
+                self._suspended[exchange] = dict(exchange_data)
+                continue
+            for symbol, quote in exchange_data.items():
+                current = self._quotes.get(symbol, {}).get(exchange)
+                if current != quote:
+                    self.update(exchange, symbol, quote)
+        for symbol in list(self._quotes):
+            for exchange in list(self._quotes.get(symbol, {})):
+                if symbol not in all_data.get(exchange, {}):
+                    self.update(exchange, symbol, None)
+
+    def suspend(self, exchanges: Iterable[str]):
+        """Hide exactly these exchanges from opportunities, keeping their latest quotes.
+
+        Exchanges no longer in the set are restored from the kept quotes.
+        """
+        target = set(exchanges) - self.excluded_exchanges
+        for exchange in target - set(self._suspended):
+            stash = self._suspended[exchange] = {}
+            for symbol in [s for s, quotes in self._quotes.items() if exchange in quotes]:
+                quotes = self._quotes[symbol]
+                stash[symbol] = quotes.pop(exchange)
+                if not quotes:
+                    del self._quotes[symbol]
+                self._recompute(symbol)
+        for exchange in set(self._suspended) - target:
+            for symbol, quote in self._suspended.pop(exchange).items():
+                self.update(exchange, symbol, quote)
+
+    @property
+    def suspended(self) -> List[str]:
+        return sorted(self._suspended)
+
+    def _recompute(self, symbol: str):
+        exchange_data = self._quotes.get(symbol)
+        opportunity = None
+        if exchange_data and len(exchange_data) >= 2:
+            opportunity = self.build(symbol, exchange_data)
+
+        old_key = self._keys.pop(symbol, None)
+        if old_key is not None:
+            index = bisect.bisect_left(self._ranked, old_key)
+            del self._ranked[index]
+            del self._opportunities[symbol]
+
+        if opportunity is not None:
+            key = (-opportunity['profit_percent'], symbol)
+            bisect.insort(self._ranked, key)
+            self._keys[symbol] = key
+            self._opportunities[symbol] = opportunity
+
+        if old_key is not None or opportunity is not None:
+            self.version += 1
+
+    def top(self, limit: int = None, max_profit: float = None) -> List[Dict]:
+        """Best opportunities by profit, optionally capped at max_profit percent"""
+        start = 0
+        if max_profit is not None:
+            start = bisect.bisect_left(self._ranked, (-max_profit, ''))
+        end = len(self._ranked) if limit is None else min(len(self._ranked), start + limit)
+        return [self._opportunities[symbol] for _, symbol in self._ranked[start:end]]
+
+    def count(self, max_profit: float = None) -> int:
+        if max_profit is None:
+            return len(self._ranked)
+        return len(self._ranked) - bisect.bisect_left(self._ranked, (-max_profit, ''))
+
+    def __len__(self):
+        return len(self._ranked)
+
+
+@dataclass(frozen=True)
+class OpportunitySnapshot:
+    """Immutable, versioned result set for one view (free / premium / admin)"""
+
+    version: int
+    view: str
+    opportunities: Tuple[Mapping, ...] = ()
+    created_at: float = field(default_factory=time.time)
+
+    @classmethod
+    def build(cls, version: int, view: str, opportunities: Iterable[Dict]) -> 'OpportunitySnapshot':
+        return cls(version, view, tuple(MappingProxyType(opp) for opp in opportunities))
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
@@ -0,0 +1 @@
+"""Benchmarks for the pricing pipeline; run the bench_*.py scripts directly"""
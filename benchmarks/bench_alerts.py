@@ -0,0 +1,177 @@
+"""Alert subscriptions at scale: indexed matching and rate-limited fan-out.
+
+1. match    --subs subscriptions (symbol-specific and wildcard, random
+            thresholds and exchange sets) against snapshots of --opps
+            opportunities, --changed of which drift each round. Reports
+            SubscriptionIndex time per snapshot vs a linear scan of every
+            subscription (extrapolated from a sample), alerts produced and
+            the longest event-loop stall while matching.
+2. dispatch every alert of the first rounds goes through AlertDispatcher
+            with a fake send (one RetryAfter injected); checks that no
+            second exceeds the global rate and no chat gets two messages
+            within the per-chat interval.
+
+Usage: python benchmarks/bench_alerts.py [--subs 50000] [--opps 1500]
+       [--rounds 5] [--changed 0.3] [--rate 200] [--chat-interval 0.2]
+"""
+import argparse
+import asyncio
+import collections
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import RetryAfter  # noqa: E402
+
+from alerts import AlertDispatcher, AlertService, Subscription, SubscriptionIndex  # noqa: E402
+from arbitrage_engine import OpportunitySnapshot  # noqa: E402
+
+EXCHANGES = ('binance', 'kucoin', 'gate', 'mexc', 'bybit', 'okx', 'huobi', 'kraken', 'bitget', 'coinbase')
+
+
+def build_subscriptions(rng: random.Random, count: int, symbols, users: int):
+    subscriptions = []
+    for sub_id in range(1, count + 1):
+        symbol = None if rng.random() < 0.3 else rng.choice(symbols)
+        exchanges = frozenset(rng.sample(EXCHANGES, rng.randint(2, 5))) if rng.random() < 0.5 else frozenset()
+        subscriptions.append(Subscription(
+            sub_id, rng.randrange(users), symbol, exchanges,
+            # Geniş joker abonelikler genelde yüksek eşikli olur
+            round(rng.uniform(1, 5) if symbol is None else rng.uniform(0.2, 3), 2),
+            rng.choice((0, 0, 2e5, 1e6)),
+        ))
+    return subscriptions
+
+
+def build_snapshot(rng: random.Random, version: int, symbols, previous=None, changed: float = 0.3) -> OpportunitySnapshot:
+    opportunities = []
+    for i, symbol in enumerate(symbols):
+        if previous is not None:
+            opp = previous.opportunities[i]
+            if rng.random() < changed:
+                opp = dict(opp)
+                opp['profit_percent'] = max(0.1, opp['profit_percent'] + rng.gauss(0, 0.3))
+        else:
+            buy, sell = rng.sample(EXCHANGES, 2)
+            opp = {'symbol': symbol, 'buy_exchange': buy, 'sell_exchange': sell,
+                   'profit_percent': rng.expovariate(2.5) + 0.1, 'avg_volume': rng.choice((1.5e5, 5e5, 3e6)),
+                   'executable': True}
+        opportunities.append(opp)
+    return OpportunitySnapshot.build(version, 'premium', opportunities)
+
+
+def linear_match(subscriptions, opp):
+    return [s for s in subscriptions
+            if (s.symbol is None or s.symbol == opp['symbol']) and opp['profit_percent'] >= s.min_profit
+            and s.accepts(opp)]
+
+
+async def measure_matching(args, rng):
+    symbols = [f"COIN{i}USDT" for i in range(args.opps)]
+    subscriptions = build_subscriptions(rng, args.subs, symbols, args.users)
+    index = SubscriptionIndex()
+    start = time.perf_counter()
+    for subscription in subscriptions:
+        index.add(subscription)
+    print(f"{args.subs} subscriptions indexed in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    dispatcher = AlertDispatcher()
+    service = AlertService(index, dispatcher, cooldown=3600)
+    snapshot = None
+    batches = []
+    for version in range(1, args.rounds + 1):
+        snapshot = build_snapshot(rng, version, symbols, snapshot, args.changed)
+        stalls = []
+
+        async def watch():
+            while True:
+                tick = time.perf_counter()
+                await asyncio.sleep(0)
+                stalls.append(time.perf_counter() - tick)
+
+        watcher = asyncio.create_task(watch())
+        start = time.perf_counter()
+        fresh = await service.match(snapshot)
+        elapsed = time.perf_counter() - start
+        watcher.cancel()
+        alerts = sum(len(matches) for matches in fresh.values())
+        batches.append(fresh)
+        print(f"  round {version}: {elapsed * 1000:7.1f} ms, {alerts:6d} new alerts for {len(fresh):5d} users, "
+              f"longest loop stall {max(stalls, default=0) * 1000:5.1f} ms")
+
+    sample = snapshot.opportunities[:20]
+    start = time.perf_counter()
+    for opp in sample:
+        linear_match(subscriptions, opp)
+    linear = (time.perf_counter() - start) / len(sample) * len(snapshot.opportunities)
+    start = time.perf_counter()
+    for opp in snapshot.opportunities:
+        list(index.match(opp))
+    indexed = time.perf_counter() - start
+    print(f"match only, per snapshot: index {indexed * 1000:.1f} ms, linear scan ~{linear * 1000:.0f} ms "
+          f"({linear / indexed:.0f}x)")
+    return batches
+
+
+async def measure_dispatch(args, batches):
+    sent = []
+    per_chat = collections.defaultdict(list)
+    state = {'retry': True}
+
+    async def send(chat_id, items):
+        if state['retry'] and len(sent) == 50:
+            state['retry'] = False
+            raise RetryAfter(1)
+        now = time.monotonic()
+        sent.append(now)
+        per_chat[chat_id].append(now)
+
+    dispatcher = AlertDispatcher(global_rate=args.rate, chat_interval=args.chat_interval)
+    start = time.monotonic()
+    worker = asyncio.create_task(dispatcher.run(send))
+    queued = 0
+    for fresh in batches:
+        # Sonraki snapshot'lar gönderim sürerken gelir: bekleyenle birleşir ya da yeni mesaj olur
+        for user_id, matches in fresh.items():
+            dispatcher.enqueue(user_id, matches)
+            queued += 1
+        await asyncio.sleep(args.chat_interval)
+    while dispatcher.pending:
+        await asyncio.sleep(0.05)
+    elapsed = time.monotonic() - start
+    worker.cancel()
+
+    per_second = collections.Counter(int(at - start) for at in sent)
+    gaps = [b - a for times in per_chat.values() for a, b in zip(times, times[1:])]
+    print(f"\ndispatch: {queued} enqueued -> {len(sent)} messages (merged per chat), sent in {elapsed:.1f}s "
+          f"incl. 1 s RetryAfter")
+    print(f"  busiest second {max(per_second.values())} (limit {args.rate:g} + burst), "
+          f"min per-chat gap {min(gaps, default=float('inf')):.2f}s (limit {args.chat_interval:g}s)")
+    assert max(per_second.values()) <= 2 * args.rate
+    assert min(gaps, default=args.chat_interval) >= args.chat_interval * 0.99
+
+
+async def run(args):
+    rng = random.Random(7)
+    batches = await measure_matching(args, rng)
+    await measure_dispatch(args, batches)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--subs', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=20000)
+    parser.add_argument('--opps', type=int, default=1500)
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--changed', type=float, default=0.3, help='fraction of opportunities moving per round')
+    parser.add_argument('--rate', type=float, default=200, help='global sends per second for the dispatch test')
+    parser.add_argument('--chat-interval', type=float, default=0.2)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""Event-loop stall under concurrent /start and /check handlers: per-call
+sqlite3.connect + commit inside the handler (old path) vs the WAL-mode
+Database with its background writer thread.
+
+Usage: python benchmarks/bench_db_stall.py [--users 300]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark kendi geçici veritabanını kullanır
+os.environ['DATABASE_PATH'] = os.path.join(tempfile.mkdtemp(), 'bench.db')
+
+import bot as bot_module  # noqa: E402
+
+
+class FakeMessage:
+    async def reply_text(self, text, **kwargs):
+        return self
+
+    async def edit_text(self, text, **kwargs):
+        return self
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id = user_id
+        self.username = f"user{user_id}"
+        self.first_name = "Bench"
+
+
+class FakeUpdate:
+    def __init__(self, user_id: int):
+        self.effective_user = FakeUser(user_id)
+        self.message = FakeMessage()
+
+
+def legacy_save_user(user_id: int, username: str):
+    """Eski yol: her çağrıda yeni bağlantı ve senkron commit"""
+    with sqlite3.connect(os.environ['DATABASE_PATH'] + '.legacy') as conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS users (user_id INTEGER PRIMARY KEY, username TEXT)
+        ''')
+        conn.execute('INSERT OR REPLACE INTO users (user_id, username) VALUES (?, ?)', (user_id, username))
+        conn.commit()
+
+
+async def monitor_lag(stop: asyncio.Event, interval: float = 0.001):
+    """Loop'un planlanandan ne kadar geç uyandığını ölç"""
+    stalls = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        stalls.append(time.perf_counter() - start - interval)
+    return stalls
+
+
+async def run_mode(users: int) -> dict:
+    stop = asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(stop))
+    start = time.perf_counter()
+    handlers = []
+    for i in range(users):
+        handler = bot_module.start if i % 2 else bot_module.check_command
+        handlers.append(handler(FakeUpdate(i), None))
+    await asyncio.gather(*handlers)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    stalls = sorted(await monitor)
+    return {
+        'elapsed': elapsed,
+        'max_stall_ms': stalls[-1] * 1000,
+        'p99_stall_ms': stalls[int(len(stalls) * 0.99)] * 1000,
+        'total_stall_ms': sum(s for s in stalls if s > 0.005) * 1000,
+    }
+
+
+async def run(args):
+    arb = bot_module.bot
+    # /check ağ çağrısı yapmasın: boş snapshot'ları yayınla, cache taze kalsın
+    arb.publish_snapshots()
+    arb.snapshot_cache.ttl = 3600
+
+    new_save_user = arb.save_user
+    for name, save_user in (('sqlite3.connect per call', legacy_save_user), ('WAL + writer thread', new_save_user)):
+        arb.save_user = save_user
+        result = await run_mode(args.users)
+        print(f"{name:26s} max stall {result['max_stall_ms']:7.1f} ms  p99 {result['p99_stall_ms']:6.1f} ms  "
+              f"stalled {result['total_stall_ms']:7.1f} ms  wall {result['elapsed']:.2f}s")
+
+    await asyncio.to_thread(arb.db.close)
+    await arb.transport.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=300)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
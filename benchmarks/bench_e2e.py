@@ -0,0 +1,205 @@
+"""End-to-end pipeline benchmark against synthetic exchanges served locally.
+
+Each round draws new prices, then measures:
+  fetch    all exchanges concurrently over the shared HttpTransport
+  parse    JSON decode + connector parse / volume filter / normalization
+  compute  price book load (incremental engines) + snapshot publish
+  full     one full calculate_arbitrage recompute over the book
+  render   free and premium opportunity messages
+A final round runs under tracemalloc for per-stage peak memory. Results go
+to a JSON file; pass --baseline to print the change against an older run.
+
+Usage: python benchmarks/bench_e2e.py [--exchanges 22] [--symbols 2000]
+       [--overlap 0.5] [--noise 0.003] [--rounds 10] [--latency 0.02]
+       [--output bench_e2e.json] [--baseline old.json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'bench.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from benchmarks.server import ExchangeStubServer  # noqa: E402
+from benchmarks.synthetic import FORMATS, SyntheticMarket  # noqa: E402
+from transport import loads, orjson  # noqa: E402
+from vectorized import NUMPY_AVAILABLE  # noqa: E402
+
+STAGES = ('fetch', 'parse', 'compute', 'full', 'render')
+
+
+class Pipeline:
+    def __init__(self, arb, server: ExchangeStubServer):
+        self.arb = arb
+        self.server = server
+
+    async def fetch(self):
+        arb = self.arb
+
+        async def one(name):
+            connector = arb.connectors[name]
+            start = time.perf_counter()
+            body = await arb.transport.get_bytes(name, connector.request_url())
+            arb.health.record(name, True, time.perf_counter() - start)
+            return name, body
+
+        return dict(await asyncio.gather(*(one(name) for name in arb.connectors)))
+
+    def parse(self, bodies):
+        return {name: self.arb.parse_exchange_data(name, loads(body)) for name, body in bodies.items()}
+
+    def compute(self, parsed):
+        for name, data in parsed.items():
+            self.arb.price_book.load_snapshot(name, data)
+        self.arb.publish_snapshots()
+
+    def full(self):
+        return self.arb.calculate_arbitrage(self.arb.price_book.snapshot(), is_premium=True)
+
+    def render(self):
+        snapshots = self.arb.snapshots
+        # Yeni snapshot: her sayfa burada bir kez üretilir, sonraki istekler cache'ten
+        return (bot_module.render_arbitrage(snapshots['free'], False),
+                bot_module.render_arbitrage(snapshots['premium'], True))
+
+    async def round(self, timings, memory=None):
+        self.server.advance()
+
+        def mark(stage, start):
+            timings[stage].append(time.perf_counter() - start)
+            if memory is not None:
+                memory[stage] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.reset_peak()
+
+        start = time.perf_counter()
+        bodies = await self.fetch()
+        mark('fetch', start)
+        start = time.perf_counter()
+        parsed = self.parse(bodies)
+        mark('parse', start)
+        start = time.perf_counter()
+        self.compute(parsed)
+        mark('compute', start)
+        start = time.perf_counter()
+        self.full()
+        mark('full', start)
+        start = time.perf_counter()
+        self.render()
+        mark('render', start)
+        return sum(len(data) for data in parsed.values()), sum(len(b) for b in bodies.values())
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    return {
+        'mean_ms': statistics.mean(ordered) * 1000,
+        'p50_ms': ordered[len(ordered) // 2] * 1000,
+        'p95_ms': ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000,
+    }
+
+
+def compare(result, baseline, baseline_path):
+    print(f"\nvs {baseline_path}")
+    for stage in STAGES:
+        old = baseline.get('stages', {}).get(stage, {}).get('p50_ms')
+        new = result['stages'][stage]['p50_ms']
+        if old:
+            print(f"  {stage:<8} p50 {old:8.2f} -> {new:8.2f} ms  ({(new - old) / old:+.1%})")
+
+
+async def run(args):
+    # Baseline, aynı dosyaya yazılacak olsa bile önce okunur
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    exchanges = list(FORMATS)[:args.exchanges]
+    market = SyntheticMarket(exchanges, symbols=args.symbols, overlap=args.overlap, noise=args.noise)
+    server = ExchangeStubServer(market, latency=args.latency)
+    await server.start()
+
+    arb = bot_module.bot
+    arb.connectors = server.point_connectors(arb.connectors)
+    arb.exchanges = {name: connector.url for name, connector in arb.connectors.items()}
+    pipeline = Pipeline(arb, server)
+
+    try:
+        await pipeline.round({stage: [] for stage in STAGES})  # warm-up: bağlantılar, ilk defter yüklemesi
+        timings = {stage: [] for stage in STAGES}
+        for _ in range(args.rounds):
+            symbols, payload = await pipeline.round(timings)
+
+        memory = {}
+        tracemalloc.start()
+        await pipeline.round({stage: [] for stage in STAGES}, memory)
+        tracemalloc.stop()
+    finally:
+        await arb.transport.close()
+        await server.stop()
+        await asyncio.to_thread(arb.db.close)
+
+    result = {
+        'config': vars(args) | {'exchanges': exchanges},
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': NUMPY_AVAILABLE,
+            'orjson': orjson is not None,
+            'backend': bot_module.ARBITRAGE_BACKEND,
+        },
+        'counts': {
+            'payload_bytes': payload,
+            'symbols_accepted': symbols,
+            'opportunities': len(arb.snapshots['premium'].opportunities),
+        },
+        'stages': {stage: summarize(samples) for stage, samples in timings.items()},
+        'peak_memory_kb': {stage: peak / 1024 for stage, peak in memory.items()},
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+    print(f"{len(exchanges)} exchanges x {args.symbols} symbols, overlap {args.overlap}, "
+          f"{payload / 1e6:.1f} MB/round, {symbols} accepted, {result['counts']['opportunities']} opportunities")
+    for stage in STAGES:
+        s = result['stages'][stage]
+        print(f"  {stage:<8} p50 {s['p50_ms']:8.2f} ms  p95 {s['p95_ms']:8.2f} ms  "
+              f"peak {result['peak_memory_kb'][stage]:9.0f} KB")
+    print(f"  max RSS {result['max_rss_kb'] / 1024:.0f} MB")
+
+    with open(args.output, 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"results written to {args.output}")
+    if baseline:
+        compare(result, baseline, args.baseline)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchanges', type=int, default=len(FORMATS))
+    parser.add_argument('--symbols', type=int, default=2000, help='symbols listed per exchange')
+    parser.add_argument('--overlap', type=float, default=0.5, help='share of symbols listed everywhere')
+    parser.add_argument('--noise', type=float, default=0.003, help='per-exchange relative price noise')
+    parser.add_argument('--rounds', type=int, default=10)
+    parser.add_argument('--latency', type=float, default=0.02, help='stub response delay in seconds')
+    parser.add_argument('--output', default='bench_e2e.json')
+    parser.add_argument('--baseline')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""Outbound Telegram traffic against a fake Bot API server with flood limits.
+
+A burst like a busy minute of the bot: every user gets a reply and then
+--edits quick edits of it (rapid page taps, each its own handler), while
+an alert fan-out of --alerts messages starts at the same time. The fake
+server answers 429 + retry_after when more than 30 messages per second
+or more than one message per chat per second arrive, as Telegram does.
+
+  direct     bot without a rate limiter (how handlers sent before): 429s
+             surface in handlers as RetryAfter errors
+  scheduled  the same traffic through OutboundScheduler
+
+Reports 429s, requests that failed in the caller, edits merged, and how
+long admin, premium and free users waited for their first reply.
+
+Usage: python benchmarks/bench_outbox.py [--users 300] [--premium 30]
+       [--edits 4] [--alerts 300] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import os
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from telegram.error import RetryAfter  # noqa: E402
+from telegram.ext import ExtBot  # noqa: E402
+from telegram.request import HTTPXRequest  # noqa: E402
+
+from benchmarks.server import FakeBotApiServer  # noqa: E402
+from metrics import OUTBOUND_REQUESTS  # noqa: E402
+from outbox import ADMIN, BULK, PREMIUM, USER, OutboundScheduler  # noqa: E402
+
+ADMIN_CHAT = 1
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def user_session(bot: ExtBot, chat_id: int, edits: int, stats: Dict, kind: str):
+    start = time.perf_counter()
+    try:
+        message = await bot.send_message(chat_id, f"opportunities for {chat_id}")
+    except RetryAfter:
+        stats['failed'] += 1
+        return
+    stats['first_reply'][kind].append(time.perf_counter() - start)
+
+    async def edit(page: int):
+        try:
+            await bot.edit_message_text(f"page {page}", chat_id=chat_id, message_id=message.message_id)
+        except RetryAfter:
+            stats['failed'] += 1
+
+    # Hızlı sayfa değişimleri: her biri ayrı handler, birbirini beklemez
+    tasks = []
+    for page in range(1, edits + 1):
+        await asyncio.sleep(0.1)
+        tasks.append(asyncio.create_task(edit(page)))
+    await asyncio.gather(*tasks)
+
+
+async def send_alert(bot: ExtBot, chat_id: int, stats: Dict, scheduled: bool):
+    start = time.perf_counter()
+    try:
+        if scheduled:
+            await bot.send_message(chat_id, "🔔 alert", rate_limit_args={'priority': BULK})
+        else:
+            await bot.send_message(chat_id, "🔔 alert")
+    except RetryAfter:
+        stats['failed'] += 1
+        return
+    stats['alerts'].append(time.perf_counter() - start)
+
+
+async def run_mode(args, scheduled: bool):
+    server = FakeBotApiServer(latency=args.latency)
+    base = await server.start()
+    premium = set(range(100, 100 + args.premium))
+    users = [ADMIN_CHAT] + sorted(premium) + list(range(1000, 1000 + args.users - args.premium - 1))
+
+    def priority_of(chat_id):
+        if chat_id == ADMIN_CHAT:
+            return ADMIN
+        return PREMIUM if chat_id in premium else USER
+
+    limiter = OutboundScheduler(global_rate=30, chat_interval=1.0, priority_of=priority_of) if scheduled else None
+    bot = ExtBot('123:bench', base_url=f"{base}/bot", rate_limiter=limiter,
+                 request=HTTPXRequest(connection_pool_size=256, pool_timeout=60))
+    await bot.initialize()
+    stats = {'failed': 0, 'first_reply': collections.defaultdict(list), 'alerts': []}
+    merged_before = OUTBOUND_REQUESTS.get('merged')
+    start = time.perf_counter()
+    try:
+        # Free kullanıcılar önce gelir; premium ve admin kuyruğun arkasına düşmemeli
+        await asyncio.gather(
+            *(send_alert(bot, 50000 + i, stats, scheduled) for i in range(args.alerts)),
+            *(user_session(bot, chat_id, args.edits, stats,
+                           'admin' if chat_id == ADMIN_CHAT else 'premium' if chat_id in premium else 'free')
+              for chat_id in reversed(users)),
+        )
+    finally:
+        elapsed = time.perf_counter() - start
+        await bot.shutdown()
+        await server.stop()
+
+    requested = args.users * (1 + args.edits) + args.alerts
+    per_second = collections.Counter(int(at - server.accepted[0][0]) for at, _, _ in server.accepted)
+    print(f"\n{'scheduled' if scheduled else 'direct'}: {requested} requests in {elapsed:.1f}s, "
+          f"{len(server.accepted)} delivered, {server.rejected} answered 429, {stats['failed']} failed in caller, "
+          f"{int(OUTBOUND_REQUESTS.get('merged') - merged_before)} edits merged")
+    print(f"  busiest second {max(per_second.values(), default=0)} messages (server limit 30)")
+    for kind in ('admin', 'premium', 'free'):
+        waits = stats['first_reply'][kind]
+        print(f"  first reply {kind:8} {len(waits):4d} answered, p50 {percentile(waits, 0.5) * 1000:7.0f} ms, "
+              f"p99 {percentile(waits, 0.99) * 1000:7.0f} ms")
+    print(f"  alerts         {len(stats['alerts']):4d} delivered, last after {max(stats['alerts'], default=0):.1f}s")
+    if scheduled:
+        assert server.rejected == 0 and stats['failed'] == 0, (server.rejected, stats['failed'])
+
+
+async def run(args):
+    await run_mode(args, scheduled=False)
+    await run_mode(args, scheduled=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=300)
+    parser.add_argument('--premium', type=int, default=30)
+    parser.add_argument('--edits', type=int, default=4, help='quick edits of each reply')
+    parser.add_argument('--alerts', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Parse time and peak memory per exchange payload for json, orjson and
+streaming (ijson) decoding, each followed by the connector's volume filter.
+
+Usage: python benchmarks/bench_parsing.py [--symbols 3000] [--payloads DIR]
+
+DIR may hold recorded payloads named <exchange>.json; otherwise synthetic
+Binance, Gate and OKX style payloads are generated. Peak memory is the
+tracemalloc peak of Python allocations during decode + parse.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connectors import build_connectors  # noqa: E402
+from transport import ijson, orjson  # noqa: E402
+
+MIN_VOLUME = 100000
+
+
+def synthetic_payloads(n_symbols: int):
+    rng = random.Random(7)
+    rows = [(f"COIN{i}", f"{rng.uniform(0.01, 100):.6f}", f"{rng.choice([1e3, 5e4, 2e5, 8e6]):.2f}")
+            for i in range(n_symbols)]
+    return {
+        'binance': json.dumps([
+            {'symbol': f"{b}USDT", 'priceChange': '0.1', 'lastPrice': p, 'bidPrice': p, 'askPrice': p,
+             'volume': '1000', 'quoteVolume': v, 'openTime': 0, 'closeTime': 0, 'count': 10}
+            for b, p, v in rows]).encode(),
+        'gate': json.dumps([
+            {'currency_pair': f"{b}_USDT", 'last': p, 'lowest_ask': p, 'highest_bid': p,
+             'change_percentage': '0.1', 'base_volume': '1000', 'quote_volume': v}
+            for b, p, v in rows]).encode(),
+        'okx': json.dumps({'code': '0', 'data': [
+            {'instType': 'SPOT', 'instId': f"{b}-USDT", 'last': p, 'askPx': p, 'bidPx': p,
+             'vol24h': '1000', 'volCcy24h': v, 'ts': '0'}
+            for b, p, v in rows]}).encode(),
+    }
+
+
+def recorded_payloads(directory: str):
+    payloads = {}
+    for filename in sorted(os.listdir(directory)):
+        if filename.endswith('.json'):
+            with open(os.path.join(directory, filename), 'rb') as f:
+                payloads[filename[:-5]] = f.read()
+    return payloads
+
+
+class ChunkReader:
+    """Minimal async reader that hands out the body in network-sized chunks"""
+
+    def __init__(self, body: bytes, chunk_size: int = 64 * 1024):
+        self.body = body
+        self.offset = 0
+        self.chunk_size = chunk_size
+
+    async def read(self, n: int = -1) -> bytes:
+        size = self.chunk_size if n < 0 else min(n, self.chunk_size)
+        chunk = self.body[self.offset:self.offset + size]
+        self.offset += len(chunk)
+        return chunk
+
+
+def measure(fn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--symbols', type=int, default=3000)
+    parser.add_argument('--payloads')
+    args = parser.parse_args()
+
+    connectors = build_connectors(MIN_VOLUME)
+    payloads = recorded_payloads(args.payloads) if args.payloads else synthetic_payloads(args.symbols)
+
+    modes = {'json': lambda c, body: c.parse(json.loads(body))}
+    if orjson is not None:
+        modes['orjson'] = lambda c, body: c.parse(orjson.loads(body))
+    if ijson is not None:
+        def stream(c, body):
+            if c.items_prefix is None:
+                return c.parse(json.loads(body))
+            if c.items_kv:
+                rows = ijson.kvitems_async(ChunkReader(body), c.items_prefix, use_float=True)
+            else:
+                rows = ijson.items_async(ChunkReader(body), c.items_prefix, use_float=True)
+            return asyncio.run(c.parse_stream(rows))
+        modes['stream'] = stream
+
+    print(f"{'exchange':<10} {'KB':>8} {'mode':<8} {'ms':>8} {'peak KB':>9} {'symbols':>8}")
+    for exchange, body in payloads.items():
+        connector = connectors.get(exchange)
+        if connector is None:
+            continue
+        for mode, fn in modes.items():
+            result, elapsed, peak = measure(lambda: fn(connector, body))
+            print(f"{exchange:<10} {len(body) / 1024:8.0f} {mode:<8} {elapsed * 1000:8.1f} "
+                  f"{peak / 1024:9.0f} {len(result):8d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""PriceBook memory and refresh cost: the old nested-dict layout vs the
+array-backed book.
+
+For each layout the book is loaded with every exchange of a SyntheticMarket,
+then refreshed round after round with new REST snapshots where only
+`--changed` of the cells move (the rest arrive unchanged, as on a real
+25 s refresh). Reports retained memory, tracked GC objects, full gc.collect()
+time, refresh time per round and snapshot() time.
+
+Usage: python benchmarks/bench_price_book.py [--exchanges 22] [--symbols 2000]
+       [--changed 0.2] [--rounds 10]
+"""
+import argparse
+import gc
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from arbitrage_engine import IncrementalArbitrageEngine  # noqa: E402
+from benchmarks.synthetic import SyntheticMarket  # noqa: E402
+from price_book import PriceBook  # noqa: E402
+
+
+class LegacyPriceBook:
+    """Önceki yerleşim: exchange -> symbol -> {'price', 'volume', ...} dict'leri"""
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, Dict]] = {}
+        self._updated_at: Dict[str, float] = {}
+        self._listeners = []
+        self.version = 0
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def update(self, exchange, symbol, price, volume, **extra):
+        book = self._data.setdefault(exchange, {})
+        quote = {'price': price, 'volume': volume, **extra}
+        self._updated_at[exchange] = time.time()
+        if book.get(symbol) == quote:
+            return False
+        book[symbol] = quote
+        self.version += 1
+        for listener in self._listeners:
+            listener(exchange, symbol, quote)
+        return True
+
+    def remove(self, exchange, symbol):
+        book = self._data.get(exchange)
+        if book and book.pop(symbol, None) is not None:
+            self.version += 1
+            for listener in self._listeners:
+                listener(exchange, symbol, None)
+
+    def load_snapshot(self, exchange, quotes):
+        if not quotes:
+            return 0
+        old = self._data.get(exchange, {})
+        stale = [s for s in old if s not in quotes]
+        for symbol in stale:
+            self.remove(exchange, symbol)
+        changed = len(stale)
+        for symbol, quote in quotes.items():
+            quote = dict(quote)
+            changed += self.update(exchange, symbol, quote.pop('price'), quote.pop('volume', 0), **quote)
+        self._updated_at[exchange] = time.time()
+        return changed
+
+    def snapshot(self):
+        return {ex: dict(book) for ex, book in self._data.items()}
+
+
+def build_rounds(market: SyntheticMarket, rounds: int, changed: float) -> List[Dict[str, Dict[str, Dict]]]:
+    """Parsed REST snapshots per round; only a `changed` fraction of cells move each time"""
+    current = {ex: {f"{base}USDT": {'price': price, 'volume': volume}
+                    for base, price, volume in market.rows(ex)} for ex in market.exchanges}
+    result = [current]
+    rng = market.rng
+    for _ in range(rounds):
+        current = {
+            ex: {symbol: ({'price': quote['price'] * (1 + rng.gauss(0, market.noise)), 'volume': quote['volume']}
+                          if rng.random() < changed else dict(quote))
+                 for symbol, quote in quotes.items()}
+            for ex, quotes in current.items()
+        }
+        result.append(current)
+    return result
+
+
+def build_opportunity(symbol, exchange_data):
+    prices = sorted(quote['price'] for quote in exchange_data.values())
+    if prices[0] <= 0:
+        return None
+    return {'symbol': symbol, 'profit_percent': (prices[-1] - prices[0]) / prices[0] * 100}
+
+
+def load_rounds(factory, rounds: List[Dict[str, Dict[str, Dict]]], with_engine: bool, timings: List[float] = None):
+    book = factory()
+    engine = None
+    if with_engine:
+        engine = IncrementalArbitrageEngine(build_opportunity)
+        book.subscribe(engine.update)
+    for index, snapshot in enumerate(rounds):
+        start = time.perf_counter()
+        for exchange, quotes in snapshot.items():
+            book.load_snapshot(exchange, quotes)
+        if index and timings is not None:
+            timings.append(time.perf_counter() - start)
+    return book, engine
+
+
+def measure(factory, rounds: List[Dict[str, Dict[str, Dict]]], with_engine: bool) -> Dict:
+    # Bellek ayrı turda ölçülür, tracemalloc zamanlamaları şişirmesin
+    gc.collect()
+    tracemalloc.start()
+    state = load_rounds(factory, rounds, with_engine)
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del state
+
+    gc.collect()
+    objects_before = len(gc.get_objects())
+    refresh = []
+    book, engine = load_rounds(factory, rounds, with_engine, refresh)
+    start = time.perf_counter()
+    gc.collect()
+    collect = time.perf_counter() - start
+    # gc'nin izlediği nesneler: salt float içeren dict'ler izlenmez, __slots__ nesneleri izlenir
+    objects = len(gc.get_objects()) - objects_before
+
+    snapshot_times = []
+    for _ in range(5):
+        start = time.perf_counter()
+        book.snapshot()
+        snapshot_times.append(time.perf_counter() - start)
+
+    return {
+        'retained': retained,
+        'objects': objects,
+        'refresh': statistics.median(refresh),
+        'collect': collect,
+        'snapshot': statistics.median(snapshot_times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--exchanges', type=int, default=22)
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--changed', type=float, default=0.2)
+    parser.add_argument('--rounds', type=int, default=10)
+    args = parser.parse_args()
+
+    market = SyntheticMarket(symbols=args.symbols)
+    market.exchanges = market.exchanges[:args.exchanges]
+    rounds = build_rounds(market, args.rounds, args.changed)
+    cells = sum(len(quotes) for quotes in rounds[0].values())
+    print(f"{len(market.exchanges)} exchanges, {cells} cells, {args.changed:.0%} changed per refresh")
+
+    for with_engine in (False, True):
+        label = 'book + engine listener' if with_engine else 'book only'
+        legacy = measure(LegacyPriceBook, rounds, with_engine)
+        compact = measure(PriceBook, rounds, with_engine)
+        print(f"\n{label}")
+        print(f"  {'':10} {'retained':>10} {'gc objects':>11} {'refresh':>10} {'gc.collect':>11} {'snapshot':>10}")
+        for name, result in (('dicts', legacy), ('arrays', compact)):
+            print(f"  {name:10} {result['retained'] / 1024:8.0f}KB {result['objects']:11d} "
+                  f"{result['refresh'] * 1000:8.2f}ms {result['collect'] * 1000:9.2f}ms "
+                  f"{result['snapshot'] * 1000:8.2f}ms")
+        print(f"  memory {compact['retained'] / legacy['retained'] - 1:+.0%}, "
+              f"refresh {compact['refresh'] / legacy['refresh'] - 1:+.0%}, "
+              f"gc.collect {compact['collect'] / legacy['collect'] - 1:+.0%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Offline pipeline benchmark: replay recorded (or synthetic) exchange
+responses through decode -> parse -> price book / engines -> snapshot
+publish, then time a full calculate_arbitrage recompute and per-row symbol
+normalization over the final book.
+
+Usage: python benchmarks/bench_replay.py [--ticks DIR] [--speed 0]
+       [--refreshes 20] [--symbols 2000]
+
+Without --ticks, synthetic Binance, Gate and OKX responses with price noise
+are recorded into a temporary directory first. Record real traffic by
+running the bot with TICK_RECORD_DIR set.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Replay veritabanına ve arşive dokunmasın
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'replay.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from benchmarks.synthetic import SyntheticMarket  # noqa: E402
+from replay import ReplayDriver  # noqa: E402
+from ticks import TickRecorder, read_ticks, tick_files  # noqa: E402
+from transport import loads  # noqa: E402
+
+
+def synthetic_ticks(directory: str, refreshes: int, n_symbols: int, interval: float = 20):
+    """Record `refreshes` rounds of noisy ticker responses per exchange"""
+    market = SyntheticMarket(('binance', 'gate', 'okx'), symbols=n_symbols)
+    recorder = TickRecorder(directory)
+    start = time.time() - refreshes * interval
+    for r in range(refreshes):
+        for offset, exchange in enumerate(market.exchanges):
+            recorder.record(exchange, market.payload(exchange), start + r * interval + offset)
+    recorder.close()
+
+
+def raw_symbols(arb, ticks):
+    """(connector, raw symbol) pairs from the last response of each exchange"""
+    latest = {tick.exchange: tick for tick in ticks}
+    pairs = []
+    for exchange, tick in latest.items():
+        connector = arb.connectors.get(exchange)
+        if connector is None:
+            continue
+        for item in connector.items(loads(tick.body)):
+            try:
+                row = connector.parse_item(item)
+            except (KeyError, IndexError, TypeError, ValueError):
+                continue
+            if row:
+                pairs.append((connector, row[0]))
+    return pairs
+
+
+async def run(args):
+    directory = args.ticks
+    if not directory:
+        directory = os.path.join(_workdir, 'ticks')
+        synthetic_ticks(directory, args.refreshes, args.symbols)
+    ticks = list(read_ticks(tick_files(directory)))
+
+    arb = bot_module.bot
+    stats = await ReplayDriver(arb, speed=args.speed).run(ticks)
+
+    print(f"ticks {stats.ticks}, payload {stats.payload_bytes / 1e6:.1f} MB, rows {stats.rows}, "
+          f"snapshots {stats.snapshots}")
+    for stage, seconds in stats.stage_seconds.items():
+        print(f"  {stage:<10} {seconds * 1000:9.1f} ms total  {stats.throughput(stage):9.1f} ticks/s")
+
+    pairs = raw_symbols(arb, ticks)
+    start = time.perf_counter()
+    for connector, symbol in pairs:
+        connector.normalize_symbol(symbol)
+    elapsed = time.perf_counter() - start
+    print(f"  normalize  {elapsed * 1000:9.1f} ms for {len(pairs)} rows  {len(pairs) / elapsed:9.0f} rows/s")
+
+    all_data = arb.price_book.snapshot()
+    start = time.perf_counter()
+    opportunities = arb.calculate_arbitrage(all_data, is_premium=True)
+    elapsed = time.perf_counter() - start
+    print(f"  calculate  {elapsed * 1000:9.1f} ms full recompute, {len(opportunities)} opportunities "
+          f"(engine top: {len(arb.engine)})")
+
+    await asyncio.to_thread(arb.db.close)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--ticks', help='directory of recorded .ticks files')
+    parser.add_argument('--speed', type=float, default=0, help='0 = as fast as possible, 1 = real time')
+    parser.add_argument('--refreshes', type=int, default=20)
+    parser.add_argument('--symbols', type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
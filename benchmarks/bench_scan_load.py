@@ -0,0 +1,191 @@
+"""Load test for the scan service: thousands of simulated /check users
+against a local exchange stub.
+
+Every simulated request goes through the real check_command handler (fake
+Update objects, no Telegram). Phases:
+  steady  --users/10 and then --users users, each sending /check about every
+          --think seconds, plus --spammers users hammering every 0.1 s
+  burst   every user sends /check at the same instant
+Upstream hits per exchange must not grow with the user count (one fetch per
+refresh window); the report shows quota rejections, coalesced requests,
+answer latency and how normal users fare next to spammers.
+
+Usage: python benchmarks/bench_scan_load.py [--users 3000] [--spammers 30]
+       [--think 300] [--duration 10] [--latency 0.05]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'bench.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from benchmarks.server import ExchangeStubServer  # noqa: E402
+from benchmarks.synthetic import SyntheticMarket  # noqa: E402
+from metrics import SCAN_REQUESTS  # noqa: E402
+
+EXCHANGES = ('binance', 'kucoin', 'gate', 'mexc', 'bybit', 'okx')
+OUTCOMES = ('served', 'coalesced', 'user_quota', 'global_quota')
+
+
+class FakeMessage:
+    def __init__(self, results: List, user_id: int, spammer: bool):
+        self.results = results
+        self.user_id = user_id
+        self.spammer = spammer
+        self.started = time.perf_counter()
+        self.edits = 0
+        # [spammer mı, cevap ('answer' / 'refused' / None: sessizce düşürüldü), gecikme]
+        self.result = [spammer, None, 0.0]
+        results.append(self.result)
+
+    async def reply_text(self, text, reply_markup=None):
+        # İlk cevap: kullanıcının gördüğü gecikme
+        self.result[1] = 'refused' if text.startswith('⏳') else 'answer'
+        self.result[2] = time.perf_counter() - self.started
+        return self
+
+    async def edit_text(self, text, reply_markup=None):
+        self.edits += 1
+
+
+def fake_update(results: List, user_id: int, spammer: bool):
+    user = SimpleNamespace(id=user_id, username=f"user{user_id}")
+    return SimpleNamespace(effective_user=user, message=FakeMessage(results, user_id, spammer))
+
+
+async def simulate_user(results: List, user_id: int, interval: float, until: float, spammer: bool):
+    rng = random.Random(user_id)
+    tasks = []
+    # Poisson gelişler; spammer'lar sabit 0.1 s aralıkla
+    step = (lambda: 0.1) if spammer else (lambda: rng.expovariate(1 / interval))
+    at = time.perf_counter() + (rng.uniform(0, 0.1) if spammer else step())
+    while at < until:
+        await asyncio.sleep(max(0.0, at - time.perf_counter()))
+        tasks.append(asyncio.create_task(bot_module.check_command(fake_update(results, user_id, spammer), None)))
+        at += step()
+    await asyncio.gather(*tasks)
+
+
+def counters() -> Dict[str, float]:
+    return {outcome: SCAN_REQUESTS.get(outcome) for outcome in OUTCOMES}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def check_upstream(arb, server: ExchangeStubServer, elapsed: float):
+    """At most one fetch per exchange per refresh window, whatever the user count"""
+    windows = elapsed / arb.snapshot_cache.min_interval
+    for exchange in arb.connectors:
+        assert server.hits.get(exchange, 0) <= windows + 1, (exchange, dict(server.hits), windows)
+
+
+def report(label: str, results: List, hits: Dict[str, int], before: Dict[str, float], elapsed: float):
+    after = counters()
+    delta = {k: int(after[k] - before[k]) for k in OUTCOMES}
+    print(f"\n{label}: {len(results)} requests in {elapsed:.1f}s, upstream per exchange {sorted(set(hits.values()))}")
+    print("  " + ", ".join(f"{k} {v}" for k, v in delta.items()))
+    for spammer, name in ((False, 'normal'), (True, 'spammers')):
+        rows = [r for r in results if r[0] == spammer]
+        if not rows:
+            continue
+        answered = [latency for _, reply, latency in rows if reply == 'answer']
+        silent = sum(1 for _, reply, _ in rows if reply is None)
+        print(f"  {name:9} {len(rows):6d} requests, answered {len(answered) / len(rows):5.1%}, "
+              f"not replied {silent / len(rows):5.1%}, p50 {percentile(answered, 0.5) * 1000:7.1f} ms, p99 {percentile(answered, 0.99) * 1000:7.1f} ms")
+    return delta
+
+
+async def steady(arb, server: ExchangeStubServer, users: int, args):
+    server.hits.clear()
+    results: List = []
+    before = counters()
+    start = time.perf_counter()
+    until = start + args.duration
+    offset = users * 10  # Her fazda yeni kullanıcılar, kotalar temiz başlasın
+    await asyncio.gather(
+        *(simulate_user(results, offset + i, args.think, until, False) for i in range(users)),
+        *(simulate_user(results, offset + users + i, 0.1, until, True) for i in range(args.spammers)),
+    )
+    elapsed = time.perf_counter() - start
+    report(f"steady, {users} users + {args.spammers} spammers", results, server.hits, before, elapsed)
+    check_upstream(arb, server, elapsed)
+
+
+async def burst(arb, server: ExchangeStubServer, users: int):
+    server.hits.clear()
+    # Snapshot bayat: ilk okuma tek bir arka plan yenilemesi başlatır
+    arb.snapshot_cache.updated_at -= arb.snapshot_cache.ttl + 1
+    arb.snapshot_cache.last_refresh_started = 0
+    results: List = []
+    before = counters()
+    start = time.perf_counter()
+    await asyncio.gather(*(bot_module.check_command(fake_update(results, users * 100 + i, False), None)
+                           for i in range(users)))
+    while arb.snapshot_cache._inflight is not None:
+        await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - start
+    report(f"burst, {users} users at once", results, server.hits, before, elapsed)
+    check_upstream(arb, server, elapsed)
+
+
+async def run(args):
+    market = SyntheticMarket(exchanges=EXCHANGES, symbols=args.symbols)
+    server = ExchangeStubServer(market, latency=args.latency)
+    await server.start()
+    arb = bot_module.bot
+    arb.connectors = server.point_connectors(arb.connectors)
+    arb.exchanges = {name: connector.url for name, connector in arb.connectors.items()}
+    for name in arb.connectors:
+        arb.health.record(name, True, args.latency)
+    # Kısa pencereler: test süresinde birkaç yenileme olsun
+    cache = arb.snapshot_cache
+    cache.ttl, cache.min_interval = args.ttl, args.ttl
+    arb.cache_duration = args.ttl
+    arb.progressive_follow = args.ttl * 2
+    arb.progressive_edit_interval = 0.2
+
+    try:
+        await arb.scans.scan(0, 'free')  # Cold start
+        await steady(arb, server, max(1, args.users // 10), args)
+        await steady(arb, server, args.users, args)
+        await burst(arb, server, args.users)
+        print(f"\nupstream requests independent of user count (≤1 per exchange per {args.ttl:g}s window)")
+    finally:
+        await arb.transport.close()
+        await server.stop()
+        arb.db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=3000)
+    parser.add_argument('--spammers', type=int, default=30)
+    parser.add_argument('--think', type=float, default=300, help='mean seconds between a user\'s /check')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--symbols', type=int, default=300)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--ttl', type=float, default=1.0, help='snapshot cache ttl for the test')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
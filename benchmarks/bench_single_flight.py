@@ -0,0 +1,115 @@
+"""Latency of hundreds of simultaneous get_snapshot() calls against a local
+exchange stub in each cache state (cold, stale, expired), with the upstream
+fetch count per exchange. The one-fetch-per-window guarantee itself is
+asserted in tests/test_single_flight.py.
+
+Usage: python benchmarks/bench_single_flight.py [--users 500] [--latency 0.2]
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import os
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'bench.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from scheduler import RefreshScheduler  # noqa: E402
+
+# Binance formatındaki ticker'ı parse eden borsalar
+STUB_EXCHANGES = ('binance', 'mexc', 'bitrue')
+
+
+async def start_stub(latency: float, hits: collections.Counter):
+    async def handler(request):
+        hits[request.match_info['exchange']] += 1
+        await asyncio.sleep(latency)
+        return web.json_response([
+            {'symbol': f"COIN{i}USDT", 'lastPrice': str(1 + i % 7 / 100), 'quoteVolume': '500000', 'count': 1}
+            for i in range(200)
+        ])
+
+    app = web.Application()
+    app.router.add_get('/{exchange}', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def burst(arb, users: int):
+    start = time.perf_counter()
+    await asyncio.gather(*(arb.get_snapshot('free' if i % 2 else 'premium') for i in range(users)))
+    return time.perf_counter() - start
+
+
+async def run(args):
+    hits = collections.Counter()
+    runner, port = await start_stub(args.latency, hits)
+    arb = bot_module.bot
+    arb.connectors = {name: arb.connectors[name] for name in STUB_EXCHANGES}
+    arb.exchanges = {}
+    for name, connector in arb.connectors.items():
+        connector.url = f"http://127.0.0.1:{port}/{name}"
+        arb.exchanges[name] = connector.url
+    arb.scheduler = RefreshScheduler(
+        {name: connector.min_interval for name, connector in arb.connectors.items()},
+        fetch=arb.fetch_exchange, publish=arb.publish_exchange, skip=arb.skip_refresh,
+    )
+    cache = arb.snapshot_cache
+
+    def next_window():
+        # Cache yenilemesi sadece due borsaları çeker; aralığın dolduğunu simüle et
+        for state in arb.scheduler.schedules.values():
+            state.next_run = 0
+
+    try:
+        # 1) Cold cache: herkes tek bir fetch'i bekler
+        elapsed = await burst(arb, args.users)
+        assert all(hits[ex] == 1 for ex in STUB_EXCHANGES), hits
+        print(f"cold:   {args.users} requests, {elapsed * 1000:6.1f} ms, upstream {dict(hits)}")
+
+        # 2) Stale: hemen eski veri, arka planda tek yenileme
+        cache.updated_at -= cache.ttl + 1
+        cache.last_refresh_started = 0
+        next_window()
+        elapsed = await burst(arb, args.users)
+        assert elapsed < args.latency, f"stale requests waited {elapsed:.3f}s"
+        while cache._inflight is not None:
+            await asyncio.sleep(0.01)
+        assert all(hits[ex] == 2 for ex in STUB_EXCHANGES), hits
+        print(f"stale:  {args.users} requests, {elapsed * 1000:6.1f} ms, upstream {dict(hits)}")
+
+        # 3) Hard staleness bound aşıldı: bekle, yine tek fetch
+        cache.updated_at -= cache.max_staleness + 1
+        next_window()
+        elapsed = await burst(arb, args.users)
+        assert all(hits[ex] == 3 for ex in STUB_EXCHANGES), hits
+        print(f"expired: {args.users} requests, {elapsed * 1000:6.1f} ms, upstream {dict(hits)}")
+        print(f"cache stats: { {k: v for k, v in arb.stats.items() if k.startswith('cache')} }")
+    finally:
+        await arb.transport.close()
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--latency', type=float, default=0.2)
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
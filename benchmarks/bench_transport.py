@@ -0,0 +1,102 @@
+"""Measure connection setups and wall time per refresh: fresh session per
+exchange (old fetch path) vs the shared HttpTransport pool.
+
+Usage: python benchmarks/bench_transport.py [--exchanges 30] [--refreshes 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+import aiohttp
+from aiohttp import web
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from transport import DEFAULT_HEADERS, HttpTransport  # noqa: E402
+
+
+def ticker_payload(n_symbols: int) -> bytes:
+    return json.dumps([
+        {'symbol': f"COIN{i}USDT", 'lastPrice': '1.2345', 'quoteVolume': '250000.0', 'count': 100}
+        for i in range(n_symbols)
+    ]).encode()
+
+
+async def start_server(payload: bytes, latency: float):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        response = web.Response(body=payload, content_type='application/json')
+        response.enable_compression()
+        return response
+
+    app = web.Application()
+    app.router.add_get('/{exchange}/tickers', handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}"
+
+
+def connection_counter():
+    counter = {'connections': 0}
+
+    async def on_connection_create_end(session, ctx, params):
+        counter['connections'] += 1
+
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_end.append(on_connection_create_end)
+    return counter, trace
+
+
+async def fresh_session_refresh(urls, trace):
+    async def fetch(url):
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=15),
+                                         trace_configs=[trace]) as session:
+            async with session.get(url, headers=DEFAULT_HEADERS) as response:
+                return await response.json()
+    await asyncio.gather(*(fetch(url) for url in urls))
+
+
+async def run(args):
+    runner, base = await start_server(ticker_payload(args.symbols), args.latency)
+    urls = {f"ex{i}": f"{base}/ex{i}/tickers" for i in range(args.exchanges)}
+    try:
+        counter, trace = connection_counter()
+        start = time.perf_counter()
+        for _ in range(args.refreshes):
+            await fresh_session_refresh(urls.values(), trace)
+        legacy = (time.perf_counter() - start) / args.refreshes, counter['connections'] / args.refreshes
+
+        counter, trace = connection_counter()
+        # Tek host olduğu için per-host limiti borsa sayısına çek
+        transport = HttpTransport(limit_per_host=args.exchanges, max_concurrency=args.exchanges,
+                                  trace_configs=[trace])
+        start = time.perf_counter()
+        for _ in range(args.refreshes):
+            await asyncio.gather(*(transport.get_json(name, url) for name, url in urls.items()))
+        shared = (time.perf_counter() - start) / args.refreshes, counter['connections'] / args.refreshes
+        await transport.close()
+    finally:
+        await runner.cleanup()
+
+    print(f"{args.exchanges} exchanges, {args.symbols} symbols each, {args.refreshes} refreshes")
+    print(f"fresh session: {legacy[0] * 1000:7.1f} ms/refresh, {legacy[1]:5.1f} connections/refresh")
+    print(f"shared pool:   {shared[0] * 1000:7.1f} ms/refresh, {shared[1]:5.1f} connections/refresh")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exchanges', type=int, default=30)
+    parser.add_argument('--symbols', type=int, default=2000)
+    parser.add_argument('--refreshes', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == '__main__':
+    main()
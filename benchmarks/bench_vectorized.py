@@ -0,0 +1,79 @@
+"""Compare the pure-Python and NumPy arbitrage backends.
+
+At the default 30 exchanges x 5,000 symbols NumPy is only modestly faster
+(about 1.3x, 1.0-1.6x between runs): packing the per-exchange dicts into
+arrays dominates its time.
+
+Usage: python benchmarks/bench_vectorized.py [--exchanges 30] [--symbols 5000]
+"""
+import argparse
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'bench.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from vectorized import NUMPY_AVAILABLE, calculate_arbitrage_vectorized  # noqa: E402
+
+
+def synthetic_data(n_exchanges: int, n_symbols: int, overlap: float = 0.6, seed: int = 42):
+    rng = random.Random(seed)
+    symbols = [f"COIN{i}USDT" for i in range(n_symbols)]
+    base_prices = {s: rng.uniform(0.01, 1000) for s in symbols}
+    data = {}
+    for e in range(n_exchanges):
+        data[f"ex{e}"] = {
+            s: {'price': base_prices[s] * rng.uniform(0.98, 1.02), 'volume': rng.uniform(5e4, 5e7)}
+            for s in symbols if rng.random() < overlap
+        }
+    return data
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--exchanges', type=int, default=30)
+    parser.add_argument('--symbols', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if not NUMPY_AVAILABLE:
+        sys.exit("numpy is not installed")
+
+    logging.disable(logging.WARNING)
+    arb = bot_module.bot
+    data = synthetic_data(args.exchanges, args.symbols)
+
+    for is_premium in (False, True):
+        python_result = arb.calculate_arbitrage(data, is_premium)
+        numpy_result = calculate_arbitrage_vectorized(arb, data, is_premium)
+        key = lambda o: (-o['profit_percent'], o['symbol'])  # noqa: E731
+        if sorted(python_result, key=key) != sorted(numpy_result, key=key):
+            sys.exit(f"Backends disagree (premium={is_premium})")
+
+    python_time = best_of(lambda: arb.calculate_arbitrage(data, True), args.repeat)
+    numpy_time = best_of(lambda: calculate_arbitrage_vectorized(arb, data, True), args.repeat)
+
+    print(f"{args.exchanges} exchanges x {args.symbols} symbols, {len(python_result)} opportunities")
+    print(f"python: {python_time * 1000:8.1f} ms")
+    print(f"numpy:  {numpy_time * 1000:8.1f} ms  ({python_time / numpy_time:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+"""Webhook mode end to end: run_webhook against a fake Bot API server.
+
+The real application (all handlers, outbound scheduler) is started with
+run_webhook on a local port; Telegram is replaced by FakeBotApiServer and a
+client that posts /start updates like Telegram's webhook delivery does.
+
+  steady  --rate updates per second for --duration seconds, every update
+          delivered twice (a redelivery) plus requests with a wrong secret;
+          reports webhook ack and reply latency, and checks that each
+          update was answered exactly once and bad secrets got 403
+  burst   --burst updates at once against --workers / --max-pending; the
+          overflow gets 503 and is redelivered after 1 s until accepted,
+          as Telegram does
+
+Usage: python benchmarks/bench_webhook.py [--rate 20] [--duration 5]
+       [--burst 400] [--workers 32] [--max-pending 100]
+"""
+import argparse
+import asyncio
+import collections
+import logging
+import os
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'bench.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import aiohttp  # noqa: E402
+
+import bot as bot_module  # noqa: E402
+from benchmarks.server import FakeBotApiServer  # noqa: E402
+from webhook import SECRET_HEADER  # noqa: E402
+
+SECRET = 'bench-secret'
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_update(update_id: int, chat_id: int) -> Dict:
+    return {'update_id': update_id, 'message': {
+        'message_id': update_id, 'date': int(time.time()), 'text': '/start',
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': chat_id, 'is_bot': False, 'first_name': f'user{chat_id}'},
+        'entities': [{'type': 'bot_command', 'offset': 0, 'length': 6}],
+    }}
+
+
+class Deliverer:
+    """Posts updates like Telegram: retries non-2xx answers after 1 s"""
+
+    def __init__(self, session: aiohttp.ClientSession, url: str):
+        self.session = session
+        self.url = url
+        self.statuses = collections.Counter()
+        self.acks: List[float] = []
+        self.posted_at: Dict[int, float] = {}
+
+    async def post(self, update: Dict, secret: str = SECRET) -> int:
+        start = time.perf_counter()
+        async with self.session.post(self.url, json=update, headers={SECRET_HEADER: secret}) as response:
+            self.statuses[response.status] += 1
+            if response.status == 200:
+                self.acks.append(time.perf_counter() - start)
+            return response.status
+
+    async def deliver(self, update: Dict, redeliver: bool = False):
+        chat_id = update['message']['chat']['id']
+        self.posted_at.setdefault(chat_id, asyncio.get_running_loop().time())
+        while await self.post(update) != 200:
+            await asyncio.sleep(1)
+        if redeliver:
+            await self.post(update)
+
+
+async def wait_replies(server: FakeBotApiServer, chats, timeout: float = 60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        replied = {chat for _, chat, method in server.accepted if method == 'sendMessage'}
+        if chats <= replied:
+            return
+        await asyncio.sleep(0.1)
+    raise AssertionError(f"{len(chats - replied)} updates never answered")
+
+
+def report(label: str, deliverer: Deliverer, server: FakeBotApiServer, chats, elapsed: float):
+    replies = collections.Counter(chat for _, chat, method in server.accepted if method == 'sendMessage')
+    first = {}
+    for at, chat, method in server.accepted:
+        if method == 'sendMessage' and chat in chats:
+            first.setdefault(chat, at)
+    latency = [first[chat] - deliverer.posted_at[chat] for chat in chats]
+    print(f"\n{label}: {len(chats)} updates in {elapsed:.1f}s, HTTP answers {dict(deliverer.statuses)}")
+    print(f"  webhook ack p50 {percentile(deliverer.acks, 0.5) * 1000:6.1f} ms, p99 {percentile(deliverer.acks, 0.99) * 1000:6.1f} ms; "
+          f"reply p50 {percentile(latency, 0.5) * 1000:6.0f} ms, p99 {percentile(latency, 0.99) * 1000:6.0f} ms")
+    duplicated = [chat for chat in chats if replies[chat] != 1]
+    assert not duplicated, f"{len(duplicated)} updates answered more than once"
+
+
+async def steady(args, session, url, server):
+    deliverer = Deliverer(session, url)
+    chats = set(range(10000, 10000 + int(args.rate * args.duration)))
+    start = time.perf_counter()
+    tasks = []
+    for i, chat_id in enumerate(sorted(chats)):
+        await asyncio.sleep(max(0.0, start + i / args.rate - time.perf_counter()))
+        tasks.append(asyncio.create_task(deliverer.deliver(start_update(chat_id, chat_id), redeliver=True)))
+        if i % 10 == 0:
+            tasks.append(asyncio.create_task(deliverer.post(start_update(chat_id + 1, chat_id), secret='wrong')))
+    await asyncio.gather(*tasks)
+    await wait_replies(server, chats)
+    report(f"steady, {args.rate:g} updates/s, each delivered twice", deliverer, server, chats,
+           time.perf_counter() - start)
+    assert deliverer.statuses[403] == (len(chats) + 9) // 10
+
+
+async def burst(args, session, url, server):
+    deliverer = Deliverer(session, url)
+    chats = set(range(50000, 50000 + args.burst))
+    start = time.perf_counter()
+    await asyncio.gather(*(deliverer.deliver(start_update(chat_id, chat_id)) for chat_id in sorted(chats)))
+    await wait_replies(server, chats)
+    report(f"burst, {args.burst} updates at once ({args.workers} workers, {args.max_pending} pending max)",
+           deliverer, server, chats, time.perf_counter() - start)
+
+
+async def run(args):
+    server = FakeBotApiServer(latency=args.latency)
+    api = await server.start()
+    port = free_port()
+    bot_module.WEBHOOK_URL = 'https://bench.example.com'
+    bot_module.WEBHOOK_LISTEN, bot_module.WEBHOOK_PORT = '127.0.0.1', port
+    bot_module.WEBHOOK_SECRET = SECRET
+    bot_module.UPDATE_WORKERS, bot_module.MAX_PENDING_UPDATES = args.workers, args.max_pending
+    app = bot_module.build_application('123:bench', base_url=f"{api}/bot")
+    app.post_init = None  # Borsa görevleri olmadan: sadece update yolu ölçülür
+    serving = asyncio.create_task(bot_module.run_webhook(app))
+
+    url = f"http://127.0.0.1:{port}{bot_module.WEBHOOK_PATH}"
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"http://127.0.0.1:{port}/healthz") as response:
+                    if response.status == 200 and server.webhook:
+                        break
+            except aiohttp.ClientConnectionError:
+                pass
+            await asyncio.sleep(0.05)
+        assert server.webhook['secret_token'] == SECRET
+        print(f"webhook registered: {server.webhook['url']}")
+        await steady(args, session, url, server)
+        await burst(args, session, url, server)
+
+    os.kill(os.getpid(), signal.SIGTERM)
+    await serving
+    print("\nshut down cleanly on SIGTERM")
+    await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rate', type=float, default=20, help='updates per second in the steady phase')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--burst', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=32)
+    parser.add_argument('--max-pending', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.02, help='fake Bot API response delay')
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""Local aiohttp servers: SyntheticMarket payloads as exchange APIs, recorded WebSocket feeds, and a fake Telegram Bot API"""
+import asyncio
+import collections
+import json
+import time
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+from benchmarks.synthetic import SyntheticMarket
+
+
+class ExchangeStubServer:
+    """GET /<exchange> returns that exchange's current synthetic payload.
+
+    Payloads are pre-encoded per round (`advance()` draws new prices), so the
+    server measures the client, not JSON encoding. `hits` counts requests
+    per exchange; `latency` adds a fixed delay to every response and
+    `errors` maps an exchange to an HTTP status to answer with instead.
+    """
+
+    def __init__(self, market: SyntheticMarket, latency: float = 0.0, compress: bool = True):
+        self.market = market
+        self.latency = latency
+        self.compress = compress
+        self.hits = collections.Counter()
+        self.errors: Dict[str, int] = {}
+        self.bodies: Dict[str, bytes] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url = ''
+        self.advance()
+
+    def advance(self):
+        self.bodies = self.market.payloads()
+
+    async def handler(self, request: web.Request) -> web.StreamResponse:
+        exchange = request.match_info['exchange']
+        body = self.bodies.get(exchange)
+        if body is None:
+            raise web.HTTPNotFound()
+        self.hits[exchange] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if exchange in self.errors:
+            return web.Response(status=self.errors[exchange])
+        response = web.Response(body=body, content_type='application/json')
+        if self.compress:
+            response.enable_compression()
+        return response
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get('/{exchange}', self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    def point_connectors(self, connectors: Dict) -> Dict:
+        """Redirect the given connectors to this server; returns the served subset"""
+        served = {name: connectors[name] for name in self.market.exchanges if name in connectors}
+        for name, connector in served.items():
+            connector.url = f"{self.base_url}/{name}"
+        return served
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+
+class WebSocketReplayServer:
+    """ws://.../ws/<feed> replays recorded text frames for that feed.
+
+    Every connection gets the feed's frames in order, then stays open until
+    the client closes it. Decoded messages the client sends (subscriptions)
+    are collected in `received`; `connections` counts connects per feed.
+    """
+
+    def __init__(self, frames: Dict[str, List[str]]):
+        self.frames = frames
+        self.received: Dict[str, list] = collections.defaultdict(list)
+        self.connections = collections.Counter()
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url = ''
+
+    async def handler(self, request: web.Request) -> web.WebSocketResponse:
+        feed = request.match_info['feed']
+        frames = self.frames.get(feed)
+        if frames is None:
+            raise web.HTTPNotFound()
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections[feed] += 1
+        for frame in frames:
+            await ws.send_str(frame)
+        async for msg in ws:
+            if msg.type == web.WSMsgType.TEXT:
+                self.received[feed].append(json.loads(msg.data))
+        return ws
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_get('/ws/{feed}', self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"ws://127.0.0.1:{port}"
+        return self.base_url
+
+    def feed_urls(self) -> Dict[str, str]:
+        """FeedManager `urls` pointing every replayed feed at this server"""
+        return {feed: f"{self.base_url}/ws/{feed}" for feed in self.frames}
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+
+
+class FakeBotApiServer:
+    """Minimal Telegram Bot API at /bot<token>/<method> enforcing flood limits.
+
+    Supports getMe, setWebhook, sendMessage, editMessageText and
+    answerCallbackQuery; the last setWebhook parameters are in `webhook`.
+    More than `global_rate` messages in any second, or two messages to a
+    chat within `chat_interval`, are answered with 429 and retry_after like
+    Telegram does. `accepted` keeps (time, chat_id, method) of every
+    message that got through; `rejected` counts 429s.
+    """
+
+    def __init__(self, global_rate: int = 30, chat_interval: float = 1.0, latency: float = 0.0,
+                 retry_after: int = 1):
+        self.global_rate = global_rate
+        self.chat_interval = chat_interval
+        self.latency = latency
+        self.retry_after = retry_after
+        self.window: collections.deque = collections.deque()
+        self.last_message: Dict[int, float] = {}
+        self.accepted: list = []
+        self.rejected = 0
+        self.message_ids = 0
+        self.webhook: Dict[str, str] = {}
+        self.runner: Optional[web.AppRunner] = None
+        self.base_url = ''
+
+    def _flooded(self, chat_id: int, now: float) -> bool:
+        while self.window and self.window[0] <= now - 1.0:
+            self.window.popleft()
+        # Aynı saat: istemcinin ölçtüğü aralıktan biraz kısa gelebilir
+        if len(self.window) >= self.global_rate or now - self.last_message.get(chat_id, -1e9) < self.chat_interval * 0.95:
+            return True
+        self.window.append(now)
+        self.last_message[chat_id] = now
+        return False
+
+    async def handler(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        params = await request.post()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method == 'getMe':
+            return web.json_response({'ok': True, 'result': {'id': 1, 'is_bot': True, 'first_name': 'bench',
+                                                             'username': 'bench_bot'}})
+        if method == 'setWebhook':
+            self.webhook = dict(params)
+            return web.json_response({'ok': True, 'result': True})
+        if method == 'answerCallbackQuery':
+            return web.json_response({'ok': True, 'result': True})
+        if method not in ('sendMessage', 'editMessageText'):
+            return web.json_response({'ok': False, 'error_code': 404, 'description': 'Not Found'}, status=404)
+        chat_id = int(params['chat_id'])
+        now = asyncio.get_running_loop().time()
+        if self._flooded(chat_id, now):
+            self.rejected += 1
+            return web.json_response({'ok': False, 'error_code': 429,
+                                      'description': f'Too Many Requests: retry after {self.retry_after}',
+                                      'parameters': {'retry_after': self.retry_after}}, status=429)
+        self.accepted.append((now, chat_id, method))
+        if method == 'sendMessage':
+            self.message_ids += 1
+            message_id = self.message_ids
+        else:
+            message_id = int(params['message_id'])
+        return web.json_response({'ok': True, 'result': {
+            'message_id': message_id, 'date': int(time.time()), 'text': params.get('text', ''),
+            'chat': {'id': chat_id, 'type': 'private'},
+        }})
+
+    async def start(self) -> str:
+        app = web.Application()
+        app.router.add_post('/bot{token}/{method}', self.handler)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self.base_url
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
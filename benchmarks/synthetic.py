@@ -0,0 +1,195 @@
+"""Synthetic ticker payloads in every supported exchange's REST format.
+
+SyntheticMarket builds a symbol universe where `overlap` of each exchange's
+symbols are listed on every exchange and the rest are exchange-only, then
+renders one ticker response per exchange with per-exchange price noise
+around a shared reference price. Raw symbols use each venue's real naming
+(BTC-USDT, btcusdt, XBTUSDT, tBTCUST, ...).
+"""
+import json
+import random
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# (raw base, price, 24h quote volume)
+Row = Tuple[str, float, float]
+
+MAJORS = ('BTC', 'ETH', 'BNB', 'XRP', 'SOL', 'ADA', 'DOGE', 'TRX', 'LTC', 'LINK')
+
+
+def _s(value: float) -> str:
+    return f"{value:.8g}"
+
+
+def binance(rows):
+    return [{'symbol': f"{b}USDT", 'lastPrice': _s(p), 'bidPrice': _s(p), 'askPrice': _s(p),
+             'volume': _s(v / p), 'quoteVolume': _s(v), 'count': 1000} for b, p, v in rows]
+
+
+def kucoin(rows):
+    return {'code': '200000', 'data': {'time': 0, 'ticker': [
+        {'symbol': f"{b}-USDT", 'last': _s(p), 'buy': _s(p), 'sell': _s(p), 'vol': _s(v / p), 'volValue': _s(v)}
+        for b, p, v in rows]}}
+
+
+def gate(rows):
+    return [{'currency_pair': f"{b}_USDT", 'last': _s(p), 'lowest_ask': _s(p), 'highest_bid': _s(p),
+             'base_volume': _s(v / p), 'quote_volume': _s(v)} for b, p, v in rows]
+
+
+def mexc(rows):
+    return [{'symbol': f"{b}USDT", 'lastPrice': _s(p), 'bidPrice': _s(p), 'askPrice': _s(p),
+             'volume': _s(v / p), 'quoteVolume': _s(v)} for b, p, v in rows]
+
+
+def bybit(rows):
+    return {'retCode': 0, 'result': {'category': 'spot', 'list': [
+        {'symbol': f"{b}USDT", 'lastPrice': _s(p), 'bid1Price': _s(p), 'ask1Price': _s(p),
+         'volume24h': _s(v / p), 'turnover24h': _s(v)} for b, p, v in rows]}}
+
+
+def okx(rows):
+    return {'code': '0', 'data': [
+        {'instType': 'SPOT', 'instId': f"{b}-USDT", 'last': _s(p), 'askPx': _s(p), 'bidPx': _s(p),
+         'vol24h': _s(v / p), 'volCcy24h': _s(v)} for b, p, v in rows]}
+
+
+def huobi(rows):
+    return {'status': 'ok', 'data': [
+        {'symbol': f"{b.lower()}usdt", 'close': p, 'bid': p, 'ask': p, 'amount': v / p, 'vol': v}
+        for b, p, v in rows]}
+
+
+def bitget(rows):
+    return {'code': '00000', 'data': [
+        {'symbol': f"{b}USDT", 'close': _s(p), 'buyOne': _s(p), 'sellOne': _s(p),
+         'baseVol': _s(v / p), 'quoteVol': _s(v)} for b, p, v in rows]}
+
+
+def coinbase(rows):
+    return {f"{b}-USDT": {'stats_24hour': {'last': _s(p), 'volume': _s(v / p)}} for b, p, v in rows}
+
+
+def kraken(rows):
+    return {'error': [], 'result': {
+        f"{'XBT' if b == 'BTC' else b}USDT": {'a': [_s(p), '1', '1.0'], 'b': [_s(p), '1', '1.0'],
+                                             'c': [_s(p), '0.1'], 'v': [_s(v / p / 2), _s(v / p)]}
+        for b, p, v in rows}}
+
+
+def bitfinex(rows):
+    # [SYMBOL, BID, BID_SIZE, ASK, ASK_SIZE, DAILY_CHANGE, DAILY_CHANGE_RELATIVE, LAST_PRICE, VOLUME, HIGH, LOW]
+    return [[f"t{b}UST", p, 1.0, p, 1.0, 0.0, 0.0, p, v / p, p, p] for b, p, v in rows]
+
+
+def poloniex(rows):
+    return [{'symbol': f"{b}_USDT", 'close': _s(p), 'bid': _s(p), 'ask': _s(p),
+             'quantity': _s(v / p), 'amount': _s(v)} for b, p, v in rows]
+
+
+def cryptocom(rows):
+    return {'code': 0, 'result': {'data': [
+        {'i': f"{b}_USDT", 'a': _s(p), 'b': _s(p), 'k': _s(p), 'v': _s(v / p), 'vv': _s(v)}
+        for b, p, v in rows]}}
+
+
+def bingx(rows):
+    return {'code': 0, 'data': [
+        {'symbol': f"{b}-USDT", 'lastPrice': _s(p), 'bidPrice': _s(p), 'askPrice': _s(p),
+         'volume': _s(v / p), 'quoteVolume': _s(v)} for b, p, v in rows]}
+
+
+def lbank(rows):
+    return {'result': 'true', 'data': [
+        {'symbol': f"{b.lower()}_usdt", 'ticker': {'latest': _s(p), 'vol': _s(v / p), 'turnover': _s(v)}}
+        for b, p, v in rows]}
+
+
+def bitmart(rows):
+    return {'code': 1000, 'data': {'tickers': [
+        {'symbol': f"{b}_USDT", 'last_price': _s(p), 'best_bid': _s(p), 'best_ask': _s(p),
+         'base_volume_24h': _s(v / p), 'quote_volume_24h': _s(v)} for b, p, v in rows]}}
+
+
+def ascendex(rows):
+    return {'code': 0, 'data': [
+        {'symbol': f"{b}/USDT", 'close': _s(p), 'bid': [_s(p), '1'], 'ask': [_s(p), '1'], 'volume': _s(v / p)}
+        for b, p, v in rows]}
+
+
+def coinex(rows):
+    return {'code': 0, 'data': {'date': 0, 'ticker': {
+        f"{b}USDT": {'last': _s(p), 'buy': _s(p), 'sell': _s(p), 'vol': _s(v / p)} for b, p, v in rows}}}
+
+
+def bigone(rows):
+    return {'code': 0, 'data': [
+        {'asset_pair_name': f"{b}-USDT", 'close': _s(p), 'bid': {'price': _s(p)}, 'ask': {'price': _s(p)},
+         'volume': _s(v / p)} for b, p, v in rows]}
+
+
+def probit(rows):
+    return {'data': [
+        {'market_id': f"{b}-USDT", 'last': _s(p), 'base_volume': _s(v / p), 'quote_volume': _s(v)}
+        for b, p, v in rows]}
+
+
+def bitrue(rows):
+    return [{'symbol': f"{b}USDT", 'lastPrice': _s(p), 'bidPrice': _s(p), 'askPrice': _s(p),
+             'volume': _s(v / p), 'quoteVolume': _s(v)} for b, p, v in rows]
+
+
+def p2pb2b(rows):
+    return {'success': True, 'result': {
+        f"{b}_USDT": {'ticker': {'last': _s(p), 'bid': _s(p), 'ask': _s(p), 'vol': _s(v / p), 'deal': _s(v)}}
+        for b, p, v in rows}}
+
+
+FORMATS: Dict[str, Callable[[Sequence[Row]], object]] = {
+    'binance': binance, 'kucoin': kucoin, 'gate': gate, 'mexc': mexc, 'bybit': bybit, 'okx': okx,
+    'huobi': huobi, 'bitget': bitget, 'coinbase': coinbase, 'kraken': kraken, 'bitfinex': bitfinex,
+    'poloniex': poloniex, 'cryptocom': cryptocom, 'bingx': bingx, 'lbank': lbank, 'bitmart': bitmart,
+    'ascendex': ascendex, 'coinex': coinex, 'bigone': bigone, 'probit': probit, 'bitrue': bitrue,
+    'p2pb2b': p2pb2b,
+}
+
+
+class SyntheticMarket:
+    """Reproducible multi-exchange ticker universe"""
+
+    def __init__(self, exchanges: Sequence[str] = None, symbols: int = 2000, overlap: float = 0.5,
+                 noise: float = 0.003, seed: int = 7):
+        self.exchanges = list(exchanges or FORMATS)
+        unknown = [ex for ex in self.exchanges if ex not in FORMATS]
+        if unknown:
+            raise ValueError(f"No synthetic format for: {', '.join(unknown)}")
+        self.symbols = symbols
+        self.overlap = overlap
+        self.noise = noise
+        self.rng = random.Random(seed)
+
+        shared = max(0, min(symbols, int(symbols * overlap)))
+        bases = list(MAJORS[:shared]) + [f"COIN{i}" for i in range(max(0, shared - len(MAJORS)))]
+        # Hacim dağılımı: çoğu sembol eşiğin altında, bir kısmı çok likit
+        volumes = (5e4, 2e5, 1e6, 8e6)
+        self.reference = {base: (self.rng.uniform(0.01, 100), self.rng.choice(volumes)) for base in bases}
+        self.listings: Dict[str, List[str]] = {}
+        for i, exchange in enumerate(self.exchanges):
+            own = [f"X{i}C{k}" for k in range(symbols - shared)]
+            for base in own:
+                self.reference[base] = (self.rng.uniform(0.01, 100), self.rng.choice(volumes))
+            self.listings[exchange] = bases + own
+
+    def rows(self, exchange: str) -> List[Row]:
+        """One round of quotes for an exchange, noise redrawn on every call"""
+        gauss = self.rng.gauss
+        result = []
+        for base in self.listings[exchange]:
+            price, volume = self.reference[base]
+            result.append((base, price * (1 + gauss(0, self.noise)), volume))
+        return result
+
+    def payload(self, exchange: str) -> bytes:
+        return json.dumps(FORMATS[exchange](self.rows(exchange))).encode()
+
+    def payloads(self) -> Dict[str, bytes]:
+        return {exchange: self.payload(exchange) for exchange in self.exchanges}
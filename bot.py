@@ -1,14 +1,13 @@
 import os
 import asyncio
 import logging
+import signal
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Set
+from typing import Callable, Dict, List, Optional, Set, Tuple
 import aiohttp
-from aiohttp import TCPConnector
-import sqlite3
 import time
-from threading import Lock
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
+from telegram.error import BadRequest
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -17,6 +16,33 @@ from telegram.ext import (
     filters,
     ContextTypes,
 )
+from functools import partial
+from access import QuotaExceeded, ScanService
+from alerts import AlertDispatcher, AlertService, Subscription, SubscriptionIndex
+from analytics import SpreadAnalytics
+from arbitrage_engine import IncrementalArbitrageEngine, OpportunitySnapshot
+from cache import SingleFlightCache, StaleValueError
+from connectors import SYMBOL_MAPPING, build_connectors, normalize_symbol
+from database import Database
+from depth import DepthProbe
+from markets import canonical_symbol, split_symbol
+from outbox import ADMIN, BULK, PREMIUM, USER, OutboundScheduler
+from price_book import PriceBook
+from recorder import OpportunityRecorder
+from render_cache import RenderCache, Rendered
+from health import ExchangeHealth
+from history import HistoryStore
+from metrics import (
+    API_REQUESTS, CALCULATE_SECONDS, FETCH_ERRORS, FETCH_SECONDS, HANDLER_SECONDS, HANDLERS_IN_FLIGHT,
+    PARSE_SECONDS, PAYLOAD_BYTES, PUBLISH_SECONDS, DB_WRITE_SECONDS, SYMBOLS_ACCEPTED, SYMBOLS_FILTERED,
+    Gauge, instrument, start_metrics_server,
+)
+from scheduler import RefreshScheduler
+from ticks import TickRecorder
+from transport import STREAMING_JSON_AVAILABLE, ExchangeHTTPError, HttpTransport, loads
+from vectorized import NUMPY_AVAILABLE, calculate_arbitrage_vectorized
+from webhook import WebhookServer
+from ws_feeds import FeedManager
 
 # Gumroad API settings
 GUMROAD_PRODUCT_ID = os.getenv("GUMROAD_PRODUCT_ID", "")
@@ -33,41 +59,56 @@ logger = logging.getLogger(__name__)
 GUMROAD_LINK = os.getenv("GUMROAD_LINK", "https://gumroad.com/l/your-product")
 SUPPORT_USERNAME = os.getenv("SUPPORT_USERNAME", "@arbitragebotsupport")
 
+# Tam tarama backend'i: "python" veya "numpy" (numpy kuruluysa)
+ARBITRAGE_BACKEND = os.getenv("ARBITRAGE_BACKEND", "python")
+
+# Büyük ticker cevaplarını indirirken parse et (ijson gerekir)
+JSON_STREAMING = os.getenv("JSON_STREAMING", "0") == "1"
+
+# WebSocket fiyat akışı (REST sadece cold-start ve resync için kullanılır)
+PRICE_STREAMING = os.getenv("PRICE_STREAMING", "0") == "1"
+# Feed adreslerini değiştir (replay/test), örn. "binance=ws://127.0.0.1:9000/ws/binance,okx=..."
+FEED_URLS = dict(
+    (name.strip(), url.strip()) for name, _, url in
+    (item.partition('=') for item in os.getenv("FEED_URLS", "").split(',')) if url.strip()
+)
+
+# SQLite veritabanı dosyası
+DATABASE_PATH = os.getenv("DATABASE_PATH", "arbitrage.db")
+
+# Kapanmış günlerin fırsat geçmişi arşivi
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "archive")
+HISTORY_RETENTION_DAYS = int(os.getenv("HISTORY_RETENTION_DAYS", "90"))
+
+# Ham borsa cevaplarını replay için kaydet (boş: kapalı)
+TICK_RECORD_DIR = os.getenv("TICK_RECORD_DIR", "")
+
+# Prometheus formatında /metrics (0: kapalı)
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# En iyi N fırsat için order book derinliği çek (0: kapalı, sadece ticker bid/ask)
+DEPTH_SHORTLIST = int(os.getenv("DEPTH_SHORTLIST", "10"))
+
+# Webhook modu: Telegram'ın ulaşacağı dış adres, örn. https://bot.example.com (boş: long polling)
+WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")
+WEBHOOK_LISTEN = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+# Telegram her istekte bu değeri başlıkta gönderir; tüm replikalarda aynı olmalı
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+# Aynı anda işlenen update sayısı; bunun üstünde en fazla MAX_PENDING_UPDATES bekler, fazlası 503
+UPDATE_WORKERS = int(os.getenv("UPDATE_WORKERS", "32"))
+MAX_PENDING_UPDATES = int(os.getenv("MAX_PENDING_UPDATES", "1000"))
+
 class ArbitrageBot:
     def __init__(self):
-        # Major cryptocurrency exchanges with their APIs
-        self.exchanges = {
-            'binance': 'https://api.binance.com/api/v3/ticker/24hr',
-            'kucoin': 'https://api.kucoin.com/api/v1/market/allTickers',
-            'gate': 'https://api.gateio.ws/api/v4/spot/tickers',
-            'mexc': 'https://api.mexc.com/api/v3/ticker/24hr',
-            'bybit': 'https://api.bybit.com/v5/market/tickers?category=spot',
-            'okx': 'https://www.okx.com/api/v5/market/tickers?instType=SPOT',
-            'huobi': 'https://api.huobi.pro/market/tickers',
-            'bitget': 'https://api.bitget.com/api/spot/v1/market/tickers',
-            'coinbase': 'https://api.exchange.coinbase.com/products',
-            'kraken': 'https://api.kraken.com/0/public/Ticker',
-            'bitfinex': 'https://api-pub.bitfinex.com/v2/tickers?symbols=ALL',
-            'cryptocom': 'https://api.crypto.com/v2/public/get-ticker',
-            'bingx': 'https://open-api.bingx.com/openApi/spot/v1/ticker/24hr',
-            'lbank': 'https://api.lbkex.com/v2/ticker/24hr.do',
-            'digifinex': 'https://openapi.digifinex.com/v3/ticker',
-            'bitmart': 'https://api-cloud.bitmart.com/spot/v1/ticker',
-            'xt': 'https://api.xt.com/data/api/v1/getTickers',
-            'phemex': 'https://api.phemex.com/md/ticker/24hr/all',
-            'bitstamp': 'https://www.bitstamp.net/api/v2/ticker/',
-            'gemini': 'https://api.gemini.com/v1/pricefeed',
-            'poloniex': 'https://api.poloniex.com/markets/ticker24h',
-            'ascendex': 'https://ascendex.com/api/pro/v1/ticker',
-            'coinex': 'https://api.coinex.com/v1/market/ticker/all',
-            'hotcoin': 'https://api.hotcoin.top/v1/market/ticker',
-            'bigone': 'https://big.one/api/v3/asset_pairs/tickers',
-            'probit': 'https://api.probit.com/api/exchange/v1/ticker',
-            'latoken': 'https://api.latoken.com/v2/ticker',
-            'bitrue': 'https://www.bitrue.com/api/v1/ticker/24hr',
-            'tidex': 'https://api.tidex.com/api/3/ticker',
-            'p2pb2b': 'https://api.p2pb2b.com/api/v2/public/tickers'
-        }
+        # Minimum 24h volume threshold - filter low volume coins
+        self.min_volume_threshold = 100000  # $100k minimum 24h volume
+        
+        # Exchange connector registry - parser'ı olmayan borsalar hiç çekilmez
+        self.connectors = build_connectors(self.min_volume_threshold)
+        self.exchanges = {name: connector.url for name, connector in self.connectors.items()}
         
         # Trusted major cryptocurrencies - these are generally the same across all exchanges
         self.trusted_symbols = {
@@ -92,19 +133,7 @@ class ArbitrageBot:
         }
         
         # Symbol mapping for different exchange formats
-        self.symbol_mapping = {
-            'BTC/USDT': 'BTCUSDT',
-            'BTC-USDT': 'BTCUSDT',
-            'BTC_USDT': 'BTCUSDT',
-            'tBTCUSDT': 'BTCUSDT',
-            'ETH/USDT': 'ETHUSDT',
-            'ETH-USDT': 'ETHUSDT',
-            'ETH_USDT': 'ETHUSDT',
-            'tETHUSDT': 'ETHUSDT'
-        }
-        
-        # Minimum 24h volume threshold - filter low volume coins
-        self.min_volume_threshold = 100000  # $100k minimum 24h volume
+        self.symbol_mapping = SYMBOL_MAPPING
         
         # Maximum profit threshold - very high differences are suspicious
         self.max_profit_threshold = 20.0  # 20%+ profit is suspicious
@@ -125,106 +154,200 @@ class ArbitrageBot:
         self.used_license_keys = set()
         self.load_used_license_keys()
 
-        # Cache sistemi
-        self.cache_data = {}
-        self.cache_timestamp = 0
-        self.cache_duration = 30  # 30 saniye cache
-        self.cache_lock = Lock()
-        
-        # API request limitleri
-        self.is_fetching = False
-        self.last_fetch_time = 0
-        self.min_fetch_interval = 15  # Minimum 15 saniye arayla fetch
-
-        # Connection pool
-        self.connector = TCPConnector(
+        # Alarm abonelikleri: yeni snapshot'ta indeksten eşleştirilir, hız sınırlı gönderilir
+        self.subscriptions = SubscriptionIndex()
+        self.free_subscription_limit = 3
+        self.premium_subscription_limit = 25
+        self.load_subscriptions()
+        # Bot API'ye giden her istek tek kuyruktan: global ~30 mesaj/s, sohbet başına 1 mesaj/s,
+        # önce admin, sonra premium, sonra diğer kullanıcılar, en son alarmlar
+        self.outbox = OutboundScheduler(global_rate=30, chat_interval=1.0, max_retries=3,
+                                        priority_of=self.message_priority)
+        # Alarmlar kuyruğun en fazla 25/s'ini kullanır; kullanıcı cevaplarının arkasında bekler
+        self.alert_dispatcher = AlertDispatcher(global_rate=25, chat_interval=1.0, max_in_flight=50,
+                                                on_blocked=self.drop_subscriber)
+        self.alerts = AlertService(self.subscriptions, self.alert_dispatcher, allowed=self.alert_allowed, cooldown=1800)
+
+        # Cache sistemi: stale-while-revalidate, tek uçuşta (single-flight) yenileme
+        self.cache_duration = 30  # 30 saniye taze kabul edilir
+        self.max_cache_staleness = 300  # Bundan eski veri kullanıcıya gösterilmez
+        self.min_fetch_interval = 15  # Arka plan yenilemeleri arası minimum 15 saniye
+
+        # Paylaşılan HTTP transport (keep-alive pool, DNS cache, sıkıştırma)
+        # Büyük payload dönen borsalara daha uzun timeout
+        self.exchange_timeouts = {
+            'binance': 15,
+            'gate': 15,
+            'mexc': 15,
+            'kucoin': 15,
+        }
+        self.transport = HttpTransport(
             limit=50,  # Toplam connection sayısı
             limit_per_host=5,  # Her host için max connection
             ttl_dns_cache=300,
-            use_dns_cache=True,
+            max_concurrency=10,  # Aynı anda max 10 request
+            timeouts=self.exchange_timeouts,
         )
-        self.session = None
         
-        # Request semaphore (aynı anda max 10 request)
-        self.request_semaphore = asyncio.Semaphore(10)
+        # Ham cevap kaydı (replay ve offline benchmark için)
+        self.tick_recorder = TickRecorder(TICK_RECORD_DIR) if TICK_RECORD_DIR else None
+        
+        # Borsa bazlı circuit breaker ve sağlık skoru
+        self.health = ExchangeHealth(self.connectors, min_score=0.3, max_age=300)
+        
+        # Borsa bazlı refresh scheduler (rate limit ve backoff farkında)
+        self.scheduler = RefreshScheduler(
+            {name: connector.min_interval for name, connector in self.connectors.items()},
+            fetch=self.fetch_exchange,
+            publish=self.publish_exchange,
+            skip=self.skip_refresh,
+        )
         
+        # Cache sayaçları; istek, gecikme ve handler sayaçları metrics modülünde
         self.stats = {
             'cache_hits': 0,
+            'cache_stale_hits': 0,
             'cache_misses': 0,
-            'api_requests': 0,
-            'concurrent_users': 0
+            'cache_refreshes': 0,
         }
-
-    async def get_cached_arbitrage_data(self, is_premium: bool = False):
-        # Cache hit/miss sayacı
-        if self.cache_data and (time.time() - self.cache_timestamp) < self.cache_duration:
-            self.stats['cache_hits'] += 1
-        else:
-            self.stats['cache_misses'] += 1
-
-    async def get_admin_arbitrage_data(self, is_premium: bool = False):
-        """Adminler için Huobi hariç ve yüksek limitli arbitraj verisi getir"""
-        # Orijinal limiti sakla
-        original_limit = self.max_profit_threshold
-    
+        self.snapshot_cache = SingleFlightCache(
+            self._fetch_fresh_data,
+            ttl=self.cache_duration,
+            max_staleness=self.max_cache_staleness,
+            min_interval=self.min_fetch_interval,
+            stats=self.stats,
+        )
+        Gauge('arbitrage_cache_hit_ratio', 'Snapshot reads served without waiting', function=self.cache_hit_ratio)
+        Gauge('arbitrage_snapshot_age_seconds', 'Age of the served snapshot', function=lambda: self.snapshot_cache.age)
+        Gauge('arbitrage_cache_misses', 'Snapshot reads that waited for a refresh',
+              function=lambda: self.stats['cache_misses'])
+
+        # Streaming fiyat defteri
+        self.price_book = PriceBook()
+        self.streaming_enabled = PRICE_STREAMING
+        self.feed_manager = None
+
+        # Incremental engine'ler: defterdeki her hücre değişikliği sadece o sembolü yeniden hesaplar
+        self.engine = IncrementalArbitrageEngine(self.build_opportunity)
+        self.admin_engine = IncrementalArbitrageEngine(
+            partial(self.build_opportunity, max_profit=self.admin_max_profit_threshold),
+            excluded_exchanges={'huobi'},
+        )
+        self.price_book.subscribe(self.engine.update)
+        self.price_book.subscribe(self.admin_engine.update)
+        Gauge('arbitrage_price_book_cells', 'Quotes held in the price book', function=lambda: len(self.price_book))
+        Gauge('arbitrage_price_book_bytes', 'Price book cell storage', function=self.price_book.memory_usage)
+        Gauge('arbitrage_opportunities', 'Opportunities in the premium view', function=lambda: len(self.engine))
+
+        # Her refresh'te bir kez hesaplanan, handler'ların okuduğu snapshot'lar
+        self.snapshot_version = 0
+        self.snapshots: Dict[str, OpportunitySnapshot] = {}
+        self.snapshot_interval = 1.0  # En sık snapshot yayın aralığı
+
+        # Fırsat geçmişi: son günler SQLite'ta, kapanmış günler sıkıştırılmış arşivde
+        self.history = HistoryStore(self.db, archive_dir=ARCHIVE_DIR, hot_days=2,
+                                    retention_days=HISTORY_RETENTION_DAYS)
+        # Snapshot başına rota bazında tekil, toplu yazılır
+        self.recorder = OpportunityRecorder(self.history, top_n=50, flush_size=500, flush_interval=10)
+        self.analytics = SpreadAnalytics(self.history, min_persistence=120)
+
+        # Sadece kısa listedeki rotalar için order book; doldurulabilir tutar tahmini
+        self.depth = DepthProbe(self.connectors, self.transport, self.health.is_healthy,
+                                shortlist=DEPTH_SHORTLIST, interval=20, min_profit=0.1)
+
+        # Progressive cevaplar: bir sonraki snapshot'ı bekleyen handler'lar
+        self.snapshot_waiters: List[asyncio.Future] = []
+        self.progressive_follow = 15  # Eski snapshot'la cevap verdikten sonra en fazla bu kadar bekle
+        self.progressive_edit_interval = 3  # Aynı mesaja iki düzenleme arası minimum süre
+
+        # Snapshot başına bir kez üretilen mesaj sayfaları (metin + klavye)
+        self.render_cache = RenderCache(versions=2)
+        self.page_size = 20  # Premium/admin listelerinde sayfa başına fırsat
+
+        # Kullanıcı taramaları tek servisten geçer: birleştirme, kullanıcı başına 6/dk (3 burst),
+        # global 20/s (Telegram'ın ~30 mesaj/s sınırının altında), en fazla ~5 s'lik round-robin sıra
+        self.scans = ScanService(self.get_snapshot, user_rate=0.1, user_burst=3,
+                                 global_rate=20, global_burst=40, concurrency=8, max_waiting=100,
+                                 exempt=lambda user_id: user_id == ADMIN_USER_ID)
+
+        # Enstrüman listeleri nadiren değişir; sembol indeksleri 6 saatte bir yenilenir
+        self.markets_refresh_interval = 6 * 3600
+
+    async def start_streaming(self):
+        """Start WebSocket ticker feeds, seeded from REST snapshots"""
+        if not self.streaming_enabled or self.feed_manager:
+            return
+        self.feed_manager = FeedManager(
+            self.price_book,
+            self.normalize_symbol,
+            self.min_volume_threshold,
+            resync=self.fetch_prices_with_volume,
+            urls=FEED_URLS,
+        )
+        self.feed_manager.start()
+        logger.info(f"Streaming started for: {', '.join(self.feed_manager.feeds)}")
+
+    async def stop_streaming(self):
+        if self.feed_manager:
+            await self.feed_manager.stop()
+            self.feed_manager = None
+
+    def streaming_live(self) -> bool:
+        """True when at least one feed is delivering ticks"""
+        return bool(self.feed_manager and self.feed_manager.live_exchanges())
+
+    async def fetch_exchange(self, exchange: str) -> Dict[str, Dict]:
+        """Fetch and parse one exchange, raising on transport errors"""
+        connector = self.connectors[exchange]
+        API_REQUESTS.inc(exchange)
+        start = time.time()
         try:
-            # Admin limitini geçici olarak ayarla
-            self.max_profit_threshold = self.admin_max_profit_threshold
-        
-            current_time = time.time()
-            with self.cache_lock:
-                if (current_time - self.cache_timestamp) < self.cache_duration and self.cache_data:
-                    logger.info("Returning cached data for admin")
-                    # Huobi verilerini filtrele
-                    filtered_data = {ex: data for ex, data in self.cache_data.items() if ex != 'huobi'}
-                    return self.calculate_arbitrage(filtered_data, True)  # Admin olduğu için premium=True
-
-            # Yeni veri çek
-            all_data = await self.get_all_prices_with_volume()
-            # Huobi verilerini filtrele
-            filtered_data = {ex: data for ex, data in all_data.items() if ex != 'huobi'}
-        
-            return self.calculate_arbitrage(filtered_data, True)  # Admin olduğu için premium=True
-    
-        finally:
-            # Orijinal limiti geri yükle
-            self.max_profit_threshold = original_limit
-
-    async def get_session(self):
-        """Paylaşılan session döndür"""
-        if self.session is None or self.session.closed:
-            timeout = aiohttp.ClientTimeout(total=10, connect=5)
-            self.session = aiohttp.ClientSession(
-                connector=self.connector,
-                timeout=timeout,
-                headers={'User-Agent': 'ArbitrageBot/1.0'}
-            )
-        return self.session
-
+            # Kayıt açıkken ham gövde lazım, streaming parse kullanılmaz
+            if (JSON_STREAMING and STREAMING_JSON_AVAILABLE and connector.items_prefix is not None
+                    and not self.tick_recorder):
+                stats = {}
+                rows = self.transport.stream_items(
+                    exchange, connector.request_url(), connector.items_prefix, connector.items_kv, stats=stats)
+                data = await connector.parse_stream(rows)
+                # Parse indirmeyle iç içe: ağ beklemesi hariç süre
+                PAYLOAD_BYTES.observe(stats['bytes'], exchange)
+                PARSE_SECONDS.observe(stats['parse_seconds'], exchange)
+            else:
+                body = await self.transport.get_bytes(exchange, connector.request_url())
+                PAYLOAD_BYTES.observe(len(body), exchange)
+                if self.tick_recorder:
+                    self.tick_recorder.record(exchange, body)
+                with PARSE_SECONDS.time(exchange):
+                    data = self.parse_exchange_data(exchange, loads(body))
+        except Exception:
+            self.health.record(exchange, False, time.time() - start)
+            FETCH_ERRORS.inc(exchange)
+            raise
+        duration = time.time() - start
+        FETCH_SECONDS.observe(duration, exchange)
+        SYMBOLS_ACCEPTED.inc(exchange, amount=len(data))
+        SYMBOLS_FILTERED.inc(exchange, amount=max(0, connector.rows_seen - len(data)))
+        # Boş sonuç da (parse hatası, format değişikliği) başarısızlık sayılır
+        self.health.record(exchange, bool(data), duration)
+        if not data:
+            FETCH_ERRORS.inc(exchange)
+        return data
+    
     async def fetch_prices_with_volume(self, exchange: str) -> Dict[str, Dict]:
-        """Rate limited price fetch"""
-        async with self.request_semaphore:
-            try:
-                session = await self.get_session()
-                url = self.exchanges[exchange]
-                
-                async with session.get(url) as response:
-                    if response.status != 200:
-                        logger.warning(f"{exchange} returned status {response.status}")
-                        return {}
-                    
-                    data = await response.json()
-                    return self.parse_exchange_data(exchange, data)
-                    
-            except Exception as e:
-                logger.error(f"{exchange} error: {str(e)}")
-                return {}
+        """Fetch prices and volumes from exchange over the shared transport"""
+        try:
+            return await self.fetch_exchange(exchange)
+        except ExchangeHTTPError as e:
+            logger.warning(str(e))
+        except Exception as e:
+            logger.error(f"{exchange} price/volume error: {str(e)}")
+        return {}
     
     def init_database(self):
         """Initialize database"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        self.db = Database(DATABASE_PATH)
+        self.db.init_schema([
+            '''
                 CREATE TABLE IF NOT EXISTS users (
                     user_id INTEGER PRIMARY KEY,
                     username TEXT,
@@ -232,21 +355,8 @@ class ArbitrageBot:
                     is_premium BOOLEAN DEFAULT FALSE,
                     added_date DATETIME DEFAULT CURRENT_TIMESTAMP
                 )
-            ''')
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS arbitrage_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    symbol TEXT,
-                    exchange1 TEXT,
-                    exchange2 TEXT,
-                    price1 REAL,
-                    price2 REAL,
-                    profit_percent REAL,
-                    volume_24h REAL,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            cursor.execute('''
+            ''',
+            '''
                 CREATE TABLE IF NOT EXISTS premium_users (
                     user_id INTEGER PRIMARY KEY,
                     username TEXT,
@@ -254,52 +364,101 @@ class ArbitrageBot:
                     added_date DATETIME DEFAULT CURRENT_TIMESTAMP,
                     subscription_end DATE
                 )
-            ''')
-            cursor.execute('''
+            ''',
+            '''
                 CREATE TABLE IF NOT EXISTS license_keys (
-                     license_key TEXT PRIMARY KEY,
-                     user_id INTEGER,
-                     username TEXT,
-                     used_date DATETIME DEFAULT CURRENT_TIMESTAMP,
-                     gumroad_sale_id TEXT
-    )
-''')
-            conn.commit()
-
-    
+                    license_key TEXT PRIMARY KEY,
+                    user_id INTEGER,
+                    username TEXT,
+                    used_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    gumroad_sale_id TEXT
+                )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_users_username ON users (username)',
+            '''
+                CREATE TABLE IF NOT EXISTS subscriptions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id INTEGER NOT NULL,
+                    symbol TEXT,
+                    exchanges TEXT,
+                    min_profit REAL NOT NULL,
+                    min_volume REAL NOT NULL DEFAULT 0,
+                    created_date DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            ''',
+            'CREATE INDEX IF NOT EXISTS idx_subscriptions_user ON subscriptions (user_id)',
+        ])
 
     async def cache_refresh_task(self):
-        """Her 25 saniyede bir cache'i yenile"""
+        """Borsaları kendi aralıklarıyla yenileyen scheduler'ı çalıştır"""
         while True:
             try:
-                await asyncio.sleep(25)  # 25 saniye bekle
-            
-                # Sadece cache eski ise yenile
-                current_time = time.time()
-                if (current_time - self.cache_timestamp) > 20:  # Cache 20 saniyeden eski ise
-                    logger.info("Background cache refresh")
-                    await self._fetch_fresh_data(False)
-                
+                await self.scheduler.run()
             except Exception as e:
                 logger.error(f"Background cache refresh error: {e}")
                 await asyncio.sleep(60)  # Hata durumunda 1 dakika bekle
     
+    async def refresh_markets(self) -> int:
+        """Reload every connector's symbol index from its instrument list"""
+        loaded = 0
+        for name, connector in self.connectors.items():
+            # allow() half-open probe hakkını alır; markets isteği health.record çağırmaz,
+            # o yüzden sadece okuyan kontrol
+            if not connector.markets_url or self.health.is_open(name):
+                continue
+            try:
+                data = await self.transport.get_json(name, connector.markets_url)
+                connector.markets.load(connector.parse_markets(data))
+                loaded += 1
+                logger.info(f"{name}: {connector.markets.instruments} instruments indexed")
+            except Exception as e:
+                # Liste alınamazsa indeks ayraç/quote ayrıştırmasıyla çalışmaya devam eder
+                logger.warning(f"{name}: market list refresh failed: {e}")
+        return loaded
+
+    async def markets_refresh_task(self):
+        while True:
+            await self.refresh_markets()
+            await asyncio.sleep(self.markets_refresh_interval)
+
+    def publish_exchange(self, exchange: str, data: Dict[str, Dict]) -> int:
+        """Push one exchange's fresh snapshot into the price book as soon as it arrives"""
+        changed = self.price_book.load_snapshot(exchange, data)
+        if data:
+            self.snapshot_cache.touch()
+        logger.info(f"{exchange}: {len(data)} symbols fetched, {changed} changed")
+        return changed
+    
+    def has_live_feed(self, exchange: str) -> bool:
+        """Canlı WebSocket feed'i olan borsalar REST ile çekilmez"""
+        return bool(self.feed_manager and exchange in self.feed_manager.live_exchanges())
+    
+    def skip_refresh(self, exchange: str) -> bool:
+        """Live feed'i olan veya circuit'i açık borsaları atla"""
+        return self.has_live_feed(exchange) or not self.health.allow(exchange)
+    
+    def exchange_healthy(self, exchange: str) -> bool:
+        return self.has_live_feed(exchange) or self.health.is_healthy(exchange)
+    
+    def update_exchange_health(self):
+        """Stale veya sorunlu borsaları fırsat hesabından çıkar, düzelenleri geri al"""
+        unhealthy = [ex for ex in self.connectors if not self.exchange_healthy(ex)]
+        # suspended sıralı ve hariç tutulan borsaları içermez; küme olarak karşılaştır
+        if set(unhealthy) - self.engine.excluded_exchanges != set(self.engine.suspended):
+            logger.info(f"Excluding unhealthy exchanges: {', '.join(unhealthy) or 'none'}")
+        self.engine.suspend(unhealthy)
+        self.admin_engine.suspend(unhealthy)
+    
     def load_premium_users(self):
         """Load premium users into memory"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT user_id FROM premium_users')
-            results = cursor.fetchall()
-            self.premium_users = {row[0] for row in results}
-            logger.info(f"Loaded {len(self.premium_users)} premium users")
+        results = self.db.fetchall_blocking('SELECT user_id FROM premium_users')
+        self.premium_users = {row[0] for row in results}
+        logger.info(f"Loaded {len(self.premium_users)} premium users")
 
     def load_used_license_keys(self):
         """Load used license keys into memory"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT license_key FROM license_keys')
-            results = cursor.fetchall()
-            self.used_license_keys = {row[0] for row in results}
+        results = self.db.fetchall_blocking('SELECT license_key FROM license_keys')
+        self.used_license_keys = {row[0] for row in results}
 
     async def verify_gumroad_license(self, license_key: str) -> Dict:
         """Verify license key with Gumroad API"""
@@ -345,292 +504,193 @@ class ArbitrageBot:
             logger.error(f"License verification error: {str(e)}")
             return {'success': False, 'error': str(e)}
             
-    def activate_license_key(self, license_key: str, user_id: int, username: str, sale_data: Dict):
+    async def activate_license_key(self, license_key: str, user_id: int, username: str, sale_data: Dict):
         """Activate license key and add premium subscription"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            
+        # Add premium subscription (30 days)
+        end_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
+        
+        def activate(conn):
             # Save license key usage
-            cursor.execute('''
+            conn.execute('''
                 INSERT INTO license_keys 
                 (license_key, user_id, username, gumroad_sale_id)
                 VALUES (?, ?, ?, ?)
             ''', (license_key, user_id, username, sale_data.get('sale_id', '')))
-            
-            # Add premium subscription (30 days)
-            end_date = (datetime.now() + timedelta(days=30)).strftime('%Y-%m-%d')
-            cursor.execute('''
+            conn.execute('''
                 INSERT OR REPLACE INTO premium_users 
                 (user_id, username, subscription_end)
                 VALUES (?, ?, ?)
             ''', (user_id, username, end_date))
-            
-            conn.commit()
-            
-            # Update memory cache
-            self.used_license_keys.add(license_key)
-            self.premium_users.add(user_id)
-            
-            logger.info(f"License activated: {license_key} for user {user_id}")
+        
+        await self.db.transaction(activate)
+        
+        # Update memory cache
+        self.used_license_keys.add(license_key)
+        self.premium_users.add(user_id)
+        
+        logger.info(f"License activated: {license_key} for user {user_id}")
     
-    def add_premium_user(self, user_id: int, username: str = "", days: int = 30):
+    async def add_premium_user(self, user_id: int, username: str = "", days: int = 30):
         """Add premium user (admin command)"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            end_date = (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
-            cursor.execute('''
-                INSERT OR REPLACE INTO premium_users 
-                (user_id, username, subscription_end)
-                VALUES (?, ?, ?)
-            ''', (user_id, username, end_date))
-            conn.commit()
-            self.premium_users.add(user_id)
-            logger.info(f"Added premium user: {user_id} (@{username}) for {days} days")
-    
-    def remove_premium_user(self, user_id: int):
+        end_date = (datetime.now() + timedelta(days=days)).strftime('%Y-%m-%d')
+        await self.db.execute('''
+            INSERT OR REPLACE INTO premium_users 
+            (user_id, username, subscription_end)
+            VALUES (?, ?, ?)
+        ''', (user_id, username, end_date))
+        self.premium_users.add(user_id)
+        logger.info(f"Added premium user: {user_id} (@{username}) for {days} days")
+    
+    async def remove_premium_user(self, user_id: int):
         """Remove premium user (admin command)"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM premium_users WHERE user_id = ?', (user_id,))
-            conn.commit()
-            self.premium_users.discard(user_id)
+        await self.db.execute('DELETE FROM premium_users WHERE user_id = ?', (user_id,))
+        self.premium_users.discard(user_id)
+
+    def load_subscriptions(self):
+        """Load alert subscriptions into the in-memory index"""
+        rows = self.db.fetchall_blocking(
+            'SELECT id, user_id, symbol, exchanges, min_profit, min_volume FROM subscriptions')
+        for sub_id, user_id, symbol, exchanges, min_profit, min_volume in rows:
+            self.subscriptions.add(Subscription(
+                sub_id, user_id, symbol, frozenset(exchanges.split(',')) if exchanges else frozenset(),
+                min_profit, min_volume))
+        logger.info(f"Loaded {len(self.subscriptions)} alert subscriptions")
+
+    def subscription_limit(self, user_id: int) -> int:
+        return self.premium_subscription_limit if self.is_premium_user(user_id) else self.free_subscription_limit
+
+    async def add_subscription(self, user_id: int, symbol: Optional[str], exchanges: Set[str],
+                               min_profit: float, min_volume: float) -> Subscription:
+        params = (user_id, symbol, ','.join(sorted(exchanges)) or None, min_profit, min_volume)
+        sub_id = await self.db.transaction(lambda conn: conn.execute(
+            'INSERT INTO subscriptions (user_id, symbol, exchanges, min_profit, min_volume) VALUES (?, ?, ?, ?, ?)',
+            params).lastrowid)
+        subscription = Subscription(sub_id, user_id, symbol, frozenset(exchanges), min_profit, min_volume)
+        self.subscriptions.add(subscription)
+        return subscription
+
+    async def remove_subscription(self, user_id: int, sub_id: int) -> bool:
+        subscription = self.subscriptions.by_id.get(sub_id)
+        if subscription is None or subscription.user_id != user_id:
+            return False
+        self.subscriptions.remove(sub_id)
+        await self.db.execute('DELETE FROM subscriptions WHERE id = ?', (sub_id,))
+        return True
+
+    def drop_subscriber(self, user_id: int) -> int:
+        """Remove every subscription of a user (also used when the user blocked the bot)"""
+        removed = self.subscriptions.remove_user(user_id)
+        if removed:
+            self.db.write('DELETE FROM subscriptions WHERE user_id = ?', (user_id,))
+        return len(removed)
+
+    def alert_allowed(self, user_id: int, opp) -> bool:
+        """Free users are alerted within the free profit range only"""
+        return opp['profit_percent'] <= self.free_user_max_profit or self.is_premium_user(user_id)
     
     def normalize_symbol(self, symbol: str, exchange: str) -> str:
         """Normalize symbol format across exchanges"""
-        # Remove common separators and convert to standard format
-        normalized = symbol.upper().replace('/', '').replace('-', '').replace('_', '')
-        
-        # Handle exchange-specific prefixes
-        if exchange == 'bitfinex' and normalized.startswith('T'):
-            normalized = normalized[1:]  # Remove 't' prefix
-        
-        # Handle specific mappings
-        if symbol in self.symbol_mapping:
-            normalized = self.symbol_mapping[symbol]
-        
-        return normalized
-    
-    async def fetch_prices_with_volume(self, exchange: str) -> Dict[str, Dict]:
-        """Fetch prices and volumes from exchange"""
-        try:
-            timeout = aiohttp.ClientTimeout(total=15)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                url = self.exchanges[exchange]
-                
-                headers = {
-                    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-                }
-                
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        logger.warning(f"{exchange} returned status {response.status}")
-                        return {}
-                    
-                    data = await response.json()
-                    return self.parse_exchange_data(exchange, data)
-                    
-        except Exception as e:
-            logger.error(f"{exchange} price/volume error: {str(e)}")
-            return {}
+        connector = self.connectors.get(exchange)
+        return connector.normalize_symbol(symbol) if connector else normalize_symbol(symbol)
     
     def parse_exchange_data(self, exchange: str, data) -> Dict[str, Dict]:
-        """Parse exchange-specific data format"""
+        """Parse exchange-specific data format via the exchange's connector"""
+        connector = self.connectors.get(exchange)
+        if connector is None:
+            return {}
         try:
-            if exchange == 'binance':
-                return {
-                    self.normalize_symbol(item['symbol'], exchange): {
-                        'price': float(item['lastPrice']),
-                        'volume': float(item['quoteVolume']),
-                        'count': int(item['count'])
-                    } for item in data 
-                    if float(item['quoteVolume']) > self.min_volume_threshold
-                }
-            
-            elif exchange == 'kucoin':
-                if 'data' in data and 'ticker' in data['data']:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['last']),
-                            'volume': float(item['volValue']) if item['volValue'] else 0
-                        } for item in data['data']['ticker'] 
-                        if item['volValue'] and float(item['volValue']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'gate':
-                return {
-                    self.normalize_symbol(item['currency_pair'], exchange): {
-                        'price': float(item['last']),
-                        'volume': float(item['quote_volume']) if item['quote_volume'] else 0
-                    } for item in data 
-                    if item['quote_volume'] and float(item['quote_volume']) > self.min_volume_threshold
-                }
-            
-            elif exchange == 'mexc':
-                return {
-                    self.normalize_symbol(item['symbol'], exchange): {
-                        'price': float(item['lastPrice']),
-                        'volume': float(item['quoteVolume'])
-                    } for item in data 
-                    if float(item.get('quoteVolume', 0)) > self.min_volume_threshold
-                }
-            
-            elif exchange == 'bybit':
-                if 'result' in data and 'list' in data['result']:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['lastPrice']),
-                            'volume': float(item['turnover24h']) if item['turnover24h'] else 0
-                        } for item in data['result']['list'] 
-                        if item['turnover24h'] and float(item['turnover24h']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'okx':
-                if 'data' in data:
-                    return {
-                        self.normalize_symbol(item['instId'], exchange): {
-                            'price': float(item['last']),
-                            'volume': float(item['volCcy24h']) if item['volCcy24h'] else 0
-                        } for item in data['data'] 
-                        if item['volCcy24h'] and float(item['volCcy24h']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'huobi':
-                if 'data' in data:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['close']),
-                            'volume': float(item['vol']) if item['vol'] else 0
-                        } for item in data['data'] 
-                        if item['vol'] and float(item['vol']) > self.min_volume_threshold / 100
-                    }
-            
-            elif exchange == 'bitget':
-                if 'data' in data:
-                    return {
-                        self.normalize_symbol(item['symbol'], exchange): {
-                            'price': float(item['close']),
-                            'volume': float(item['quoteVol']) if item['quoteVol'] else 0
-                        } for item in data['data'] 
-                        if item['quoteVol'] and float(item['quoteVol']) > self.min_volume_threshold
-                    }
-            
-            elif exchange == 'bitfinex':
-                if isinstance(data, list):
-                    result = {}
-                    for item in data:
-                        if len(item) >= 8:
-                            symbol = self.normalize_symbol(item[0], exchange)
-                            if item[7] and float(item[7]) > self.min_volume_threshold:
-                                result[symbol] = {
-                                    'price': float(item[6]),
-                                    'volume': float(item[7])
-                                }
-                    return result
-            
-            elif exchange == 'kraken':
-                result = {}
-                for symbol, ticker_data in data.get('result', {}).items():
-                    if 'c' in ticker_data and 'v' in ticker_data:
-                        normalized_symbol = self.normalize_symbol(symbol, exchange)
-                        volume = float(ticker_data['v'][1]) * float(ticker_data['c'][0])
-                        if volume > self.min_volume_threshold:
-                            result[normalized_symbol] = {
-                                'price': float(ticker_data['c'][0]),
-                                'volume': volume
-                            }
-                return result
-            
-            elif exchange == 'coinbase':
-                if isinstance(data, list):
-                    result = {}
-                    for item in data:
-                        if 'id' in item and 'price' in item and 'volume_24h' in item:
-                            symbol = self.normalize_symbol(item['id'], exchange)
-                            volume = float(item['volume_24h']) if item['volume_24h'] else 0
-                            if volume > self.min_volume_threshold:
-                                result[symbol] = {
-                                    'price': float(item['price']),
-                                    'volume': volume
-                                }
-                    return result
-            
-            elif exchange == 'poloniex':
-                result = {}
-                for symbol, ticker_data in data.items():
-                    if 'close' in ticker_data and 'quoteVolume' in ticker_data:
-                        normalized_symbol = self.normalize_symbol(symbol, exchange)
-                        volume = float(ticker_data['quoteVolume'])
-                        if volume > self.min_volume_threshold:
-                            result[normalized_symbol] = {
-                                'price': float(ticker_data['close']),
-                                'volume': volume
-                            }
-                return result
-            
-            # Add more exchange parsers as needed...
-            
+            return connector.parse(data)
         except Exception as e:
             logger.error(f"Error parsing {exchange} data: {str(e)}")
-        
         return {}
 
-    async def get_cached_arbitrage_data(self, is_premium: bool = False):
-        """Cache'den veri döndür, gerekirse yenile"""
-        current_time = time.time()
-    
-        with self.cache_lock:
-            # Cache geçerli mi kontrol et
-            if (current_time - self.cache_timestamp) < self.cache_duration and self.cache_data:
-                logger.info("Returning cached data")
-                return self.calculate_arbitrage(self.cache_data, is_premium)
-        
-            # Eğer başka bir request zaten fetch yapıyorsa bekle
-            if self.is_fetching:
-                # Son cache'i döndür (varsa)
-                if self.cache_data:
-                    logger.info("Fetch in progress, returning last cached data")
-                    return self.calculate_arbitrage(self.cache_data, is_premium)
-        
-            # Minimum fetch interval kontrolü
-            if (current_time - self.last_fetch_time) < self.min_fetch_interval:
-                if self.cache_data:
-                    logger.info("Rate limit protection, returning cached data")
-                    return self.calculate_arbitrage(self.cache_data, is_premium)
-    
-        # Yeni veri fetch et
-        return await self._fetch_fresh_data(is_premium)
-
-    async def _fetch_fresh_data(self, is_premium: bool):
-        """Yeni veri çek ve cache'le"""
-        with self.cache_lock:
-            if self.is_fetching:  # Double-check locking
-                if self.cache_data:
-                    return self.calculate_arbitrage(self.cache_data, is_premium)
-        
-            self.is_fetching = True
-    
+    def publish_snapshots(self):
+        """Compute every view once and swap in the new snapshot set"""
+        with PUBLISH_SECONDS.time():
+            self._publish_snapshots()
+    
+    def _publish_snapshots(self):
+        self.update_exchange_health()
+        self.snapshot_version += 1
+        version = self.snapshot_version
+        annotate = self.depth.annotate
+        self.snapshots = {
+            'free': OpportunitySnapshot.build(version, 'free', annotate(self.get_opportunities(False))),
+            'premium': OpportunitySnapshot.build(version, 'premium', annotate(self.get_opportunities(True))),
+            'admin': OpportunitySnapshot.build(version, 'admin', annotate(self.admin_engine.top())),
+        }
+        self.snapshot_cache.set(self.snapshots)
+        self.alerts.publish(self.snapshots['premium'])
+        self.recorder.record((self.snapshots['premium'], self.snapshots['admin']))
+        logger.info(f"Published snapshot v{version}: {len(self.snapshots['premium'].opportunities)} opportunities")
+        waiters, self.snapshot_waiters = self.snapshot_waiters, []
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_result(version)
+
+    async def next_snapshot(self, view: str, timeout: float) -> Optional[OpportunitySnapshot]:
+        """Wait for the next published snapshot of a view; None on timeout"""
+        waiter = asyncio.get_running_loop().create_future()
+        self.snapshot_waiters.append(waiter)
         try:
-            logger.info("Fetching fresh data from exchanges")
-            all_data = await self.get_all_prices_with_volume()
-        
-            with self.cache_lock:
-                self.cache_data = all_data
-                self.cache_timestamp = time.time()
-                self.last_fetch_time = time.time()
-        
-            return self.calculate_arbitrage(all_data, is_premium)
-    
-        finally:
-            with self.cache_lock:
-                self.is_fetching = False
-    
-    async def get_all_prices_with_volume(self) -> Dict[str, Dict[str, Dict]]:
-        """Fetch price and volume data from all exchanges"""
-        tasks = [self.fetch_prices_with_volume(exchange) for exchange in self.exchanges]
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.snapshots.get(view)
+
+    async def depth_probe_task(self):
+        """Kısa listedeki fırsatların order book'larını çek, tahminlerle yeniden yayınla"""
+        while True:
+            await asyncio.sleep(self.depth.interval)
+            snapshot = self.snapshots.get('premium')
+            if not snapshot or not snapshot.opportunities:
+                continue
+            try:
+                if await self.depth.probe(snapshot.opportunities):
+                    self.publish_snapshots()
+            except Exception as e:
+                logger.error(f"Depth probe error: {e}")
+
+    async def snapshot_publisher_task(self):
+        """Engine değiştikçe (scheduler veya feed güncellemesi) snapshot yayınla"""
+        last_versions = None
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            self.update_exchange_health()
+            versions = (self.engine.version, self.admin_engine.version)
+            if versions != last_versions:
+                self.publish_snapshots()
+                last_versions = versions
+            elif self.streaming_live():
+                # Feed'ler canlı ama fiyat değişmedi: veri hâlâ güncel
+                self.snapshot_cache.touch()
+
+    async def get_snapshot(self, view: str) -> OpportunitySnapshot:
+        """Latest snapshot for a view; never waits on exchanges while usable data exists"""
+        try:
+            snapshots = await self.snapshot_cache.get()
+        except StaleValueError:
+            snapshots = {}
+        return snapshots.get(view) or OpportunitySnapshot(self.snapshot_version, view)
+
+    async def _fetch_fresh_data(self) -> Dict[str, OpportunitySnapshot]:
+        """Yeni veri çek ve snapshot'ları yayınla (SingleFlightCache üzerinden tek seferde)"""
+        # Scheduler üzerinden: backoff'taki (429/418, Retry-After) borsalara kullanıcı okuması istek attırmasın
+        fetched = await self.scheduler.run_due()
+        logger.info(f"Fetched fresh data from {fetched} due exchanges")
+        self.publish_snapshots()
+        return self.snapshots
+    
+    async def get_all_prices_with_volume(self, exchanges: List[str] = None) -> Dict[str, Dict[str, Dict]]:
+        """Fetch price and volume data from all (or the given) exchanges"""
+        exchanges = list(self.exchanges) if exchanges is None else exchanges
+        # Circuit'i açık borsalara istek atma
+        exchanges = [ex for ex in exchanges if self.health.allow(ex)]
+        tasks = [self.fetch_prices_with_volume(exchange) for exchange in exchanges]
         results = await asyncio.gather(*tasks, return_exceptions=True)
         
         exchange_data = {}
-        for exchange, result in zip(self.exchanges.keys(), results):
+        for exchange, result in zip(exchanges, results):
             if isinstance(result, Exception):
                 logger.error(f"Error fetching {exchange}: {result}")
                 exchange_data[exchange] = {}
@@ -675,11 +735,13 @@ class ArbitrageBot:
         
         return True
     
-    def validate_arbitrage_opportunity(self, opportunity: Dict) -> bool:
+    def validate_arbitrage_opportunity(self, opportunity: Dict, max_profit: float = None) -> bool:
         """Validate if arbitrage opportunity is real"""
+        if max_profit is None:
+            max_profit = self.max_profit_threshold
         
         # 1. Profit ratio too high?
-        if opportunity['profit_percent'] > self.max_profit_threshold:
+        if opportunity['profit_percent'] > max_profit:
             logger.warning(f"Suspicious high profit: {opportunity['symbol']} - {opportunity['profit_percent']:.2f}%")
             return False
         
@@ -694,8 +756,67 @@ class ArbitrageBot:
         
         return True
     
-    def calculate_arbitrage(self, all_data: Dict[str, Dict[str, Dict]], is_premium: bool = False) -> List[Dict]:
-        """Enhanced arbitrage calculation"""
+    def build_opportunity(self, symbol: str, exchange_data: Dict[str, Dict], max_profit: float = None) -> Dict:
+        """Best buy/sell pair for one symbol, or None if it fails the safety checks"""
+        # Safety check
+        if not self.is_symbol_safe(symbol, exchange_data):
+            return None
+        
+        if len(exchange_data) < 2:
+            return None
+        
+        # Alış en düşük ask'ten, satış en yüksek bid'den; bid/ask vermeyen borsada son işlem fiyatı.
+        # Eşitlikte alış ilk, satış son borsa (eski fiyat sıralamasıyla aynı)
+        items = list(exchange_data.items())
+        buy_ex, buy_data = min(items, key=lambda x: x[1].get('ask') or x[1]['price'])
+        sell_ex, sell_data = max(reversed(items), key=lambda x: x[1].get('bid') or x[1]['price'])
+        
+        buy_price = buy_data.get('ask') or buy_data['price']
+        sell_price = sell_data.get('bid') or sell_data['price']
+        
+        if buy_price <= 0:
+            return None
+        
+        profit_percent = ((sell_price - buy_price) / buy_price) * 100
+        
+        # Kitabın tepesinde bu spread'le doldurulabilecek tutar (quote cinsinden), boyut yoksa 0
+        ask_size, bid_size = buy_data.get('ask_size'), sell_data.get('bid_size')
+        fill_size = min(buy_price * ask_size, sell_price * bid_size) if ask_size and bid_size else 0.0
+        
+        opportunity = {
+            'symbol': symbol,
+            'buy_exchange': buy_ex,
+            'sell_exchange': sell_ex,
+            'buy_price': buy_price,
+            'sell_price': sell_price,
+            'profit_percent': profit_percent,
+            'buy_volume': buy_data.get('volume', 0),
+            'sell_volume': sell_data.get('volume', 0),
+            'avg_volume': (buy_data.get('volume', 0) + sell_data.get('volume', 0)) / 2,
+            # Her iki bacak da gerçek bid/ask ile mi (yoksa son işlem fiyatı mı)
+            'executable': 'ask' in buy_data and 'bid' in sell_data,
+            'fill_size': fill_size,
+        }
+        
+        if not self.validate_arbitrage_opportunity(opportunity, max_profit):
+            return None
+        return opportunity
+    
+    def calculate_arbitrage(self, all_data: Dict[str, Dict[str, Dict]], is_premium: bool = False,
+                            max_profit: float = None, excluded: Set[str] = None) -> List[Dict]:
+        """Enhanced arbitrage calculation (full scan, reference path for the incremental engine)"""
+        if excluded:
+            # Sağlıksız / stale borsaları hesaba katma
+            all_data = {ex: data for ex, data in all_data.items() if ex not in excluded}
+        
+        backend = 'numpy' if ARBITRAGE_BACKEND == 'numpy' and NUMPY_AVAILABLE else 'python'
+        with CALCULATE_SECONDS.time(backend):
+            if backend == 'numpy':
+                return calculate_arbitrage_vectorized(self, all_data, is_premium, max_profit)
+            return self._calculate_arbitrage_python(all_data, is_premium, max_profit)
+    
+    def _calculate_arbitrage_python(self, all_data: Dict[str, Dict[str, Dict]], is_premium: bool,
+                                    max_profit: float = None) -> List[Dict]:
         opportunities = []
         
         # Find common symbols across exchanges
@@ -717,101 +838,62 @@ class ArbitrageBot:
             # Collect all exchange data for this symbol
             exchange_data = {ex: all_data[ex][symbol] for ex in all_data if symbol in all_data[ex]}
             
-            # Safety check
-            if not self.is_symbol_safe(symbol, exchange_data):
+            opportunity = self.build_opportunity(symbol, exchange_data, max_profit)
+            if opportunity is None:
                 continue
             
-            if len(exchange_data) >= 2:
-                # Sort by price
-                sorted_exchanges = sorted(exchange_data.items(), key=lambda x: x[1]['price'])
-                lowest_ex, lowest_data = sorted_exchanges[0]
-                highest_ex, highest_data = sorted_exchanges[-1]
-                
-                lowest_price = lowest_data['price']
-                highest_price = highest_data['price']
-                
-                if lowest_price > 0:
-                    profit_percent = ((highest_price - lowest_price) / lowest_price) * 100
-                    
-                    opportunity = {
-                        'symbol': symbol,
-                        'buy_exchange': lowest_ex,
-                        'sell_exchange': highest_ex,
-                        'buy_price': lowest_price,
-                        'sell_price': highest_price,
-                        'profit_percent': profit_percent,
-                        'buy_volume': lowest_data.get('volume', 0),
-                        'sell_volume': highest_data.get('volume', 0),
-                        'avg_volume': (lowest_data.get('volume', 0) + highest_data.get('volume', 0)) / 2
-                    }
-                    
-                    if self.validate_arbitrage_opportunity(opportunity):
-                        # For free users, only show opportunities up to 2%
-                        if not is_premium and opportunity['profit_percent'] > self.free_user_max_profit:
-                            continue
-                        opportunities.append(opportunity)
+            # For free users, only show opportunities up to 2%
+            if not is_premium and opportunity['profit_percent'] > self.free_user_max_profit:
+                continue
+            opportunities.append(opportunity)
         
         return sorted(opportunities, key=lambda x: x['profit_percent'], reverse=True)
     
+    def cache_hit_ratio(self) -> float:
+        served = self.stats['cache_hits'] + self.stats['cache_stale_hits']
+        total = served + self.stats['cache_misses']
+        return served / total if total else 0.0
+    
+    def get_opportunities(self, is_premium: bool = False) -> List[Dict]:
+        """Current ranked opportunities from the incremental engine"""
+        return self.engine.top(max_profit=None if is_premium else self.free_user_max_profit)
+    
     def is_premium_user(self, user_id: int) -> bool:
         """Check if user is premium"""
         return user_id in self.premium_users
     
+    def message_priority(self, chat_id) -> int:
+        """Outbound queue priority for messages to a chat"""
+        if chat_id == ADMIN_USER_ID:
+            return ADMIN
+        return PREMIUM if self.is_premium_user(chat_id) else USER
+
     def save_user(self, user_id: int, username: str):
-        """Save user to database"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT OR REPLACE INTO users (user_id, username)
-                VALUES (?, ?)
-            ''', (user_id, username))
-            conn.commit()
-    
-    def save_arbitrage_data(self, opportunity: Dict):
-        """Save arbitrage data"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO arbitrage_data 
-                (symbol, exchange1, exchange2, price1, price2, profit_percent, volume_24h)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                opportunity['symbol'],
-                opportunity['buy_exchange'],
-                opportunity['sell_exchange'],
-                opportunity['buy_price'],
-                opportunity['sell_price'],
-                opportunity['profit_percent'],
-                opportunity['avg_volume']
-            ))
-            conn.commit()
-    
-    def get_premium_users_list(self) -> List[Dict]:
+        """Save user to database (queued to the writer thread, does not wait)"""
+        self.db.write('''
+            INSERT OR REPLACE INTO users (user_id, username)
+            VALUES (?, ?)
+        ''', (user_id, username))
+    
+    async def get_premium_users_list(self) -> List[Dict]:
         """Get list of premium users"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, username, subscription_end, added_date 
-                FROM premium_users 
-                ORDER BY added_date DESC
-            ''')
-            results = cursor.fetchall()
-            return [
-                {
-                    'user_id': row[0],
-                    'username': row[1] or 'Unknown',
-                    'subscription_end': row[2],
-                    'added_date': row[3]
-                } for row in results
-            ]
-
-    def get_user_id_by_username(self, username: str) -> int:
+        results = await self.db.fetchall('''
+            SELECT user_id, username, subscription_end, added_date 
+            FROM premium_users 
+            ORDER BY added_date DESC
+        ''')
+        return [
+            {
+                'user_id': row[0],
+                'username': row[1] or 'Unknown',
+                'subscription_end': row[2],
+                'added_date': row[3]
+            } for row in results
+        ]
+
+    async def get_user_id_by_username(self, username: str) -> int:
         """Get user ID by username from database"""
-        with sqlite3.connect('arbitrage.db') as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT user_id FROM users WHERE username = ?', (username,))
-            result = cursor.fetchone()
-            return result[0] if result else None
+        return await self.db.fetchval('SELECT user_id FROM users WHERE username = ?', (username,))
 
 # Global bot instance
 bot = ArbitrageBot()
@@ -868,63 +950,184 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await show_main_menu(query)
     elif query.data == 'activate_license':
         await show_license_activation(query)
+    elif query.data.startswith('page:'):
+        await handle_page(query)
+
+def format_opportunity(index: int, opp) -> str:
+    """One opportunity block: buy at the ask, sell at the bid, fill estimate when known"""
+    # Trusted coin indicator
+    trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
+    
+    lines = [
+        f"{index}. {trust_icon} {opp['symbol']}",
+        f"   ⬇️ Buy: {opp['buy_exchange']} ${opp['buy_price']:.6f}",
+        f"   ⬆️ Sell: {opp['sell_exchange']} ${opp['sell_price']:.6f}",
+        # Bid/ask yoksa fiyatlar son işlemden, spread gerçekte uygulanamayabilir
+        f"   💰 Profit: {opp['profit_percent']:.2f}%{'' if opp.get('executable') else ' (last trade)'}",
+    ]
+    if opp.get('depth_checked'):
+        if opp['fill_size']:
+            lines.append(f"   💧 Fillable: ~${opp['fill_size']:,.0f} at {opp['fill_profit']:.2f}% (order book)")
+        else:
+            lines.append(f"   💧 Order book: no size above {bot.depth.min_profit}%")
+    elif opp.get('fill_size'):
+        lines.append(f"   💧 Fillable: ~${opp['fill_size']:,.0f} (top of book)")
+    lines.append(f"   📊 Volume: ${opp['avg_volume']:,.0f}\n\n")
+    return '\n'.join(lines)
 
-async def handle_arbitrage_check(query):
-    # Yüklenme mesajını göster
-    await query.edit_message_text("🔄 Scanning prices across exchanges... (Security filters active)")
-    
-    # 3 saniye bekle
-    await asyncio.sleep(3)
-    
-    user_id = query.from_user.id
-    is_premium = bot.is_premium_user(user_id)
-    
-    opportunities = await bot.get_cached_arbitrage_data(is_premium)
-    
+def page_count(total: int, size: int) -> int:
+    return max(1, -(-total // size))
+
+def format_arbitrage_text(opportunities, is_premium: bool, page: int = 0) -> str:
+    """Opportunity list message shown by the Check Arbitrage button"""
     if not opportunities:
-        await query.edit_message_text(
+        return (
             "❌ No safe arbitrage opportunities found\n\n"
             "🔒 Security filters applied:\n"
             "• Minimum volume control ($100k+)\n"
             "• Suspicious coin detection\n"
             "• Reasonable profit ratio control\n"
-            f"• Max profit shown: {bot.free_user_max_profit}%" if not is_premium else "• Full profit range available"
+            + (f"• Max profit shown: {bot.free_user_max_profit}%" if not is_premium else "• Full profit range available")
         )
-        return
     
-    text = "💎 Premium Safe Arbitrage:\n\n" if is_premium else f"🔍 Safe Arbitrage (≤{bot.free_user_max_profit}%):\n\n"
+    parts = ["💎 Premium Safe Arbitrage:\n\n" if is_premium else f"🔍 Safe Arbitrage (≤{bot.free_user_max_profit}%):\n\n"]
     
-    max_opps = 20 if is_premium else 8
-    for i, opp in enumerate(opportunities[:max_opps], 1):
-        # Trusted coin indicator
-        trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
-        
-        text += f"{i}. {trust_icon} {opp['symbol']}\n"
-        text += f"   ⬇️ Buy: {opp['buy_exchange']} ${opp['buy_price']:.6f}\n"
-        text += f"   ⬆️ Sell: {opp['sell_exchange']} ${opp['sell_price']:.6f}\n"
-        text += f"   💰 Profit: {opp['profit_percent']:.2f}%\n"
-        text += f"   📊 Volume: ${opp['avg_volume']:,.0f}\n\n"
-        
-        # Save data for premium users
-        if is_premium:
-            bot.save_arbitrage_data(opp)
+    # Ücretsiz kullanıcılar sadece ilk sayfayı görür
+    max_opps = bot.page_size if is_premium else 8
+    start = page * max_opps if is_premium else 0
+    parts.extend(format_opportunity(i, opp)
+                 for i, opp in enumerate(opportunities[start:start + max_opps], start + 1))
     
     if not is_premium:
         total_opportunities = len(opportunities)
         hidden_opportunities = max(0, total_opportunities - max_opps)
-        text += f"\n💎 Showing {min(max_opps, total_opportunities)} of {total_opportunities} opportunities"
+        parts.append(f"\n💎 Showing {min(max_opps, total_opportunities)} of {total_opportunities} opportunities")
         if hidden_opportunities > 0:
-            text += f"\n🔒 {hidden_opportunities} more opportunities available for premium users"
-        text += f"\n📈 Higher profit rates (>{bot.free_user_max_profit}%) available with premium!"
-    
-    keyboard = [
+            parts.append(f"\n🔒 {hidden_opportunities} more opportunities available for premium users")
+        parts.append(f"\n📈 Higher profit rates (>{bot.free_user_max_profit}%) available with premium!")
+    elif len(opportunities) > max_opps:
+        parts.append(f"\n📄 Page {page + 1}/{page_count(len(opportunities), max_opps)}")
+    
+    return ''.join(parts)
+
+def page_buttons(view: str, page: int, pages: int) -> List[List[InlineKeyboardButton]]:
+    """Prev/next row for a paginated list; empty when everything fits on one page"""
+    row = []
+    if page > 0:
+        row.append(InlineKeyboardButton("◀️ Prev", callback_data=f"page:{view}:{page - 1}"))
+    if page + 1 < pages:
+        row.append(InlineKeyboardButton("Next ▶️", callback_data=f"page:{view}:{page + 1}"))
+    return [row] if row else []
+
+def check_menu_rows() -> List[List[InlineKeyboardButton]]:
+    return [
         [InlineKeyboardButton("🔄 Refresh", callback_data='check')],
         [InlineKeyboardButton("📊 Trusted Coins", callback_data='trusted')],
         [InlineKeyboardButton("💎 Premium", callback_data='premium')],
         [InlineKeyboardButton("🔙 Main Menu", callback_data='back')]
     ]
+
+def render_cached(snapshot: OpportunitySnapshot, kind: str, page: int, build: Callable[[], Rendered]) -> Rendered:
+    """Render through bot.render_cache when the snapshot is the published one"""
+    if bot.snapshots.get(snapshot.view) is not snapshot:
+        # Yedek (boş) snapshot yayınlanmış bir sürümün numarasını taşıyabilir, cache'lenmez
+        return build()
+    return bot.render_cache.get(snapshot, kind, page, build)
+
+def render_arbitrage(snapshot: OpportunitySnapshot, is_premium: bool, page: int = 0) -> Rendered:
+    """Check Arbitrage page: text plus pagination and menu buttons"""
+    pages = page_count(len(snapshot.opportunities), bot.page_size) if is_premium else 1
+    page = min(page, pages - 1)
+    return render_cached(snapshot, 'menu', page, lambda: Rendered(
+        format_arbitrage_text(snapshot.opportunities, is_premium, page),
+        InlineKeyboardMarkup(page_buttons(snapshot.view, page, pages) + check_menu_rows()),
+    ))
+
+async def progressive_reply(user_id: int, view: str, render: Callable[[OpportunitySnapshot], Rendered], send, edit):
+    """Answer from the latest snapshot right away, then edit in place once a fresher one lands.
+
+    The scan goes through bot.scans (quotas, fairness queue). send(rendered)
+    returns the message to edit, edit(message, rendered) updates it. Snapshots
+    landing within progressive_edit_interval are coalesced into a single
+    edit, and nothing is sent when the rendered text did not change.
+    """
+    message = None
+    try:
+        if not bot.snapshots:
+            # Cold start: ilk refresh bitene kadar yer tutucu göster
+            message = await send(Rendered("🔄 Scanning prices across exchanges... (Security filters active)"))
+            snapshot = await bot.scans.scan(user_id, view)
+            text = render(snapshot)
+            await edit(message, text)
+        else:
+            snapshot = await bot.scans.scan(user_id, view)
+            text = render(snapshot)
+            message = await send(text)
+    except QuotaExceeded as e:
+        if e.repeated and message is None:
+            # Kullanıcı zaten uyarıldı, aynı pencerede tekrar mesaj atma
+            return
+        text = Rendered(f"⏳ Too many scan requests, please try again in {max(1, round(e.retry_after))}s.")
+        if message is None:
+            await send(text)
+        else:
+            await edit(message, text)
+        return
+    if snapshot.age < bot.cache_duration:
+        return
     
-    await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
+    sent_at = time.time()
+    newer = await bot.next_snapshot(view, bot.progressive_follow)
+    if newer is None:
+        return
+    # Telegram sohbet başına düzenleme limiti: arka arkaya gelen snapshot'ları tek düzenlemede birleştir
+    await asyncio.sleep(max(0.0, bot.progressive_edit_interval - (time.time() - sent_at)))
+    latest = bot.snapshots.get(view, newer)
+    latest_text = render(latest)
+    if latest_text != text:
+        try:
+            await edit(message, latest_text)
+        except BadRequest as e:
+            # Kullanıcı bu arada menüde başka yere geçtiyse mesaj değişmiş olabilir
+            logger.debug(f"Progressive edit skipped: {e}")
+
+async def handle_arbitrage_check(query):
+    user_id = query.from_user.id
+    is_premium = bot.is_premium_user(user_id)
+    
+    async def send(rendered):
+        # Yer tutucu ve kota mesajları da menü butonlarıyla gösterilir
+        return await query.edit_message_text(
+            rendered.text, reply_markup=rendered.reply_markup or InlineKeyboardMarkup(check_menu_rows()))
+    
+    async def edit(message, rendered):
+        await send(rendered)
+    
+    await progressive_reply(
+        user_id, 'premium' if is_premium else 'free',
+        lambda snapshot: render_arbitrage(snapshot, is_premium),
+        send, edit,
+    )
+
+async def handle_page(query):
+    """Prev/next on a paginated list: a cached page of the current snapshot, no new scan"""
+    try:
+        _, view, page = query.data.split(':')
+        page = int(page)
+    except ValueError:
+        return
+    user_id = query.from_user.id
+    allowed = user_id == ADMIN_USER_ID if view == 'admin' else view == 'premium' and bot.is_premium_user(user_id)
+    snapshot = bot.snapshots.get(view)
+    if not allowed or snapshot is None:
+        return
+    # Butonlar eski bir snapshot'tan kalmış olabilir; sayfa her zaman güncel snapshot'tan
+    rendered = render_admin(snapshot, page) if view == 'admin' else render_arbitrage(snapshot, True, page)
+    try:
+        await query.edit_message_text(rendered.text, reply_markup=rendered.reply_markup)
+    except BadRequest as e:
+        # Aynı sayfaya tekrar basıldıysa mesaj değişmemiştir
+        logger.debug(f"Page edit skipped: {e}")
 
 async def show_trusted_symbols(query):
     text = "✅ **Trusted Cryptocurrencies**\n\n"
@@ -1032,7 +1235,7 @@ async def handle_license_activation(update: Update, context: ContextTypes.DEFAUL
         return
     
     # Activate license
-    bot.activate_license_key(
+    await bot.activate_license_key(
         license_key, 
         user.id, 
         user.username or "", 
@@ -1107,7 +1310,18 @@ async def show_premium_info(query):
 
 async def start_background_tasks(app):
     """Background task'ları başlat"""
+    await bot.start_streaming()
+    asyncio.create_task(bot.markets_refresh_task())
+    if DEPTH_SHORTLIST:
+        asyncio.create_task(bot.depth_probe_task())
     asyncio.create_task(bot.cache_refresh_task())
+    asyncio.create_task(bot.snapshot_publisher_task())
+    asyncio.create_task(bot.recorder.run())
+    asyncio.create_task(bot.history.run())
+    asyncio.create_task(bot.alerts.run())
+    asyncio.create_task(bot.alert_dispatcher.run(partial(send_alert, app.bot)))
+    if METRICS_PORT:
+        app.bot_data['metrics_runner'] = await start_metrics_server(METRICS_HOST, METRICS_PORT)
 
 async def show_help(query):
     text = """ℹ️ **Bot Usage Guide**
@@ -1121,6 +1335,9 @@ async def show_help(query):
 📋 **Commands:**
 /start - Start the bot
 /check - Quick arbitrage scan
+/subscribe - Get alerts for new opportunities
+/alerts - List your alert subscriptions
+/unsubscribe - Remove an alert subscription
 /premium - Premium information
 /help - Show this help
 
@@ -1151,6 +1368,9 @@ async def show_admin_panel(query):
 • /removepremium <user_id> - Remove premium user
 • /listpremium - List all premium users
 • /stats - Bot statistics
+• /schedule - Exchange refresh schedule
+• /spreads <symbol> [hours] - Spread persistence per route
+• /routes [hours] - Most frequent routes and reliable pairs
 
 📋 **Quick Actions:**""".format(
         len(bot.premium_users), 
@@ -1166,7 +1386,7 @@ async def show_admin_panel(query):
     await query.edit_message_text(text, reply_markup=InlineKeyboardMarkup(keyboard))
 
 async def list_premium_users(query):
-    users = bot.get_premium_users_list()
+    users = await bot.get_premium_users_list()
     
     if not users:
         text = "📋 **Premium Users List**\n\nNo premium users found."
@@ -1203,7 +1423,7 @@ async def remove_premium_command(update: Update, context: ContextTypes.DEFAULT_T
         if user_input.isdigit():
             # User ID
             user_id = int(user_input)
-            bot.remove_premium_user(user_id)
+            await bot.remove_premium_user(user_id)
             await update.message.reply_text(f"✅ User {user_id} removed from premium.")
         else:
             # Username
@@ -1211,7 +1431,7 @@ async def remove_premium_command(update: Update, context: ContextTypes.DEFAULT_T
             user_id = await get_user_id_by_username(username)
             
             if user_id:
-                bot.remove_premium_user(user_id)
+                await bot.remove_premium_user(user_id)
                 await update.message.reply_text(f"✅ User @{username} (ID: {user_id}) removed from premium.")
             else:
                 await update.message.reply_text(f"❌ User @{username} not found in database.")
@@ -1243,7 +1463,7 @@ async def add_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         if user_input.isdigit():
             # User ID
             user_id = int(user_input)
-            bot.add_premium_user(user_id, "", days)
+            await bot.add_premium_user(user_id, "", days)
             await update.message.reply_text(f"✅ User {user_id} added as premium for {days} days.")
         else:
             # Username
@@ -1251,7 +1471,7 @@ async def add_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             user_id = await get_user_id_by_username(username)
             
             if user_id:
-                bot.add_premium_user(user_id, username, days)
+                await bot.add_premium_user(user_id, username, days)
                 await update.message.reply_text(f"✅ User @{username} (ID: {user_id}) added as premium for {days} days.")
             else:
                 await update.message.reply_text(f"❌ User @{username} not found in database. User must start the bot first.")
@@ -1263,14 +1483,14 @@ async def add_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 async def get_user_id_by_username(username: str) -> int:
     """Get user ID by username from database"""
-    return bot.get_user_id_by_username(username)
+    return await bot.get_user_id_by_username(username)
 
 async def list_premium_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if update.effective_user.id != ADMIN_USER_ID:
         await update.message.reply_text("❌ Access denied. Admin only command.")
         return
     
-    users = bot.get_premium_users_list()
+    users = await bot.get_premium_users_list()
     
     if not users:
         await update.message.reply_text("📋 No premium users found.")
@@ -1291,16 +1511,11 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Access denied. Admin only command.")
         return
     
-    with sqlite3.connect('arbitrage.db') as conn:
-        cursor = conn.cursor()
-        
-        # Get total users
-        cursor.execute('SELECT COUNT(*) FROM users')
-        total_users = cursor.fetchone()[0]
-        
-        # Get arbitrage data count
-        cursor.execute('SELECT COUNT(*) FROM arbitrage_data')
-        total_arbitrage_records = cursor.fetchone()[0]
+    # Get total users
+    total_users = await bot.db.fetchval('SELECT COUNT(*) FROM users')
+    
+    # Arbitrage data count (artımlı sayaç, tablo taranmaz)
+    total_arbitrage_records = bot.history.total_rows
     
     text = f"""📊 **Bot Statistics**
 
@@ -1319,12 +1534,126 @@ async def stats_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
 • Max profit threshold: {bot.max_profit_threshold}%
 • Free user limit: {bot.free_user_max_profit}%
 
+⚡ **Performance:**
+• Cache hit ratio: {bot.cache_hit_ratio():.1%}
+• Snapshot age: {bot.snapshot_cache.age:.0f}s
+• Upstream requests: {API_REQUESTS.total():.0f} ({FETCH_ERRORS.total():.0f} failed)
+• Fetch p95: {FETCH_SECONDS.quantile(0.95) * 1000:.0f} ms
+• Parse p95: {PARSE_SECONDS.quantile(0.95) * 1000:.1f} ms
+• Snapshot publish p95: {PUBLISH_SECONDS.quantile(0.95) * 1000:.1f} ms
+• DB write p95: {DB_WRITE_SECONDS.quantile(0.95) * 1000:.1f} ms
+• Handler p95: {HANDLER_SECONDS.quantile(0.95) * 1000:.0f} ms ({HANDLERS_IN_FLIGHT.get():.0f} in flight)
+
 ⚡ **System:**
 • Bot status: Active
 • Database: Connected"""
     
     await update.message.reply_text(text)
 
+async def schedule_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Borsa bazlı refresh zamanlaması ve backoff durumu"""
+    if update.effective_user.id != ADMIN_USER_ID:
+        await update.message.reply_text("❌ Access denied. Admin only command.")
+        return
+    
+    now = time.time()
+    text = "⏱ **Refresh Schedule**\n\n"
+    for state in bot.scheduler.status():
+        if state.running:
+            next_run = "running"
+        else:
+            next_run = f"in {max(0, state.next_run - now):.0f}s"
+        breaker = bot.health.breakers[state.exchange]
+        icon = "🔴" if state.in_backoff else ("📡" if bot.has_live_feed(state.exchange) else "🟢")
+        text += f"{icon} {state.exchange}: {next_run}, every {state.interval:.0f}s, last {state.last_status}"
+        text += f", circuit {breaker.state}, health {bot.health.score(state.exchange):.2f}"
+        if state.in_backoff:
+            text += f", backoff {state.backoff:.0f}s ({state.failures} fails)"
+        text += "\n"
+
+    indexed = [f"{name} {len(c.markets)}" + ("" if c.markets.loaded_at else "*")
+               for name, c in bot.connectors.items() if len(c.markets)]
+    if indexed:
+        text += "\n🗂 Symbol index: " + ", ".join(indexed) + "\n(* no instrument list, parsed)\n"
+    
+    await update.message.reply_text(text)
+
+def format_duration(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    return f"{seconds / 3600:.1f}h"
+
+def parse_hours(args, index: int, default: float = 24) -> float:
+    """Komut argümanından saat penceresi (1 saat - 30 gün arası)"""
+    if len(args) > index:
+        return min(max(float(args[index]), 1), 720)
+    return default
+
+async def spreads_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Bir sembolün rotalarının ne kadar sürdüğü ve kâr dağılımı"""
+    if update.effective_user.id != ADMIN_USER_ID:
+        await update.message.reply_text("❌ Access denied. Admin only command.")
+        return
+    
+    if not context.args:
+        await update.message.reply_text(
+            "Usage: /spreads <symbol> [hours]\n"
+            "Example: /spreads BTCUSDT 24"
+        )
+        return
+    
+    try:
+        symbol = context.args[0].upper()
+        hours = parse_hours(context.args, 1)
+    except ValueError:
+        await update.message.reply_text("❌ Invalid hours parameter. Use numbers only.")
+        return
+    
+    routes = await bot.analytics.routes(hours, symbol)
+    if not routes:
+        await update.message.reply_text(f"📉 No recorded spreads for {symbol} in the last {hours:g}h.")
+        return
+    
+    text = f"📈 **{symbol} spreads, last {hours:g}h**\n\n"
+    for route in routes[:10]:
+        text += f"• {route.buy_exchange} → {route.sell_exchange}: {route.samples} samples, {len(route.episodes)} episodes\n"
+        text += f"   median {route.median_profit:.2f}%, p95 {route.p95_profit:.2f}%\n"
+        text += f"   half-life {format_duration(route.half_life)}, longest {format_duration(route.longest)}\n"
+    
+    await update.message.reply_text(text)
+
+async def routes_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """En sık görülen rotalar ve en güvenilir borsa çiftleri"""
+    if update.effective_user.id != ADMIN_USER_ID:
+        await update.message.reply_text("❌ Access denied. Admin only command.")
+        return
+    
+    try:
+        hours = parse_hours(context.args or [], 0)
+    except ValueError:
+        await update.message.reply_text("❌ Invalid hours parameter. Use numbers only.")
+        return
+    
+    routes = await bot.analytics.routes(hours)
+    if not routes:
+        await update.message.reply_text(f"📉 No recorded spreads in the last {hours:g}h.")
+        return
+    
+    text = f"🧭 **Most frequent routes, last {hours:g}h**\n\n"
+    for route in routes[:10]:
+        text += f"• {route.symbol} {route.buy_exchange} → {route.sell_exchange}: "
+        text += f"{route.samples}x, median {route.median_profit:.2f}%, half-life {format_duration(route.half_life)}\n"
+    
+    min_persistence = bot.analytics.min_persistence
+    text += f"\n🤝 **Most reliable pairs** (episodes ≥ {format_duration(min_persistence)})\n\n"
+    for pair in bot.analytics.reliable_pairs(routes):
+        text += f"• {pair.buy_exchange} → {pair.sell_exchange}: {pair.persistence_ratio(min_persistence):.0%} persistent, "
+        text += f"half-life {format_duration(pair.half_life)}, {pair.routes} symbols\n"
+    
+    await update.message.reply_text(text)
+
 async def admin_check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Sadece adminler için Huobi hariç ve %40 limitli arbitraj kontrolü"""
     if update.effective_user.id != ADMIN_USER_ID:
@@ -1334,110 +1663,293 @@ async def admin_check_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     user = update.effective_user
     bot.save_user(user.id, user.username or "")
     
-    msg = await update.message.reply_text("🔍 [ADMIN] Scanning exchanges (Huobi excluded, 40% max profit)...")
-    
-    await asyncio.sleep(3)
-    
-    opportunities = await bot.get_admin_arbitrage_data()
-    
+    await progressive_reply(user.id, 'admin', render_admin, reply_sender(update), edit_message)
+
+def format_admin_text(snapshot: OpportunitySnapshot, page: int = 0) -> str:
+    opportunities = snapshot.opportunities
     if not opportunities:
-        await msg.edit_text("❌ No arbitrage opportunities found (Huobi excluded, max 40% profit).")
-        return
+        return "❌ No arbitrage opportunities found (Huobi excluded, max 40% profit)."
     
-    text = "💎 **Admin Arbitrage (Huobi Excluded, Max 40% Profit)**\n\n"
+    parts = ["💎 **Admin Arbitrage (Huobi Excluded, Max 40% Profit)**\n\n"]
     
-    for i, opp in enumerate(opportunities[:20], 1):  # Max 20 fırsat göster
-        trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
-        text += f"{i}. {trust_icon} {opp['symbol']}\n"
-        text += f"   ⬇️ Buy: {opp['buy_exchange']} ${opp['buy_price']:.6f}\n"
-        text += f"   ⬆️ Sell: {opp['sell_exchange']} ${opp['sell_price']:.6f}\n"
-        text += f"   💰 Profit: {opp['profit_percent']:.2f}%\n"
-        text += f"   📊 Volume: ${opp['avg_volume']:,.0f}\n\n"
-        
-        # Veriyi kaydet
-        bot.save_arbitrage_data(opp)
+    start = page * bot.page_size
+    parts.extend(format_opportunity(i, opp)
+                 for i, opp in enumerate(opportunities[start:start + bot.page_size], start + 1))
+    if len(opportunities) > bot.page_size:
+        parts.append(f"\n📄 Page {page + 1}/{page_count(len(opportunities), bot.page_size)}")
     
-    await msg.edit_text(text)
+    return ''.join(parts)
+
+def render_admin(snapshot: OpportunitySnapshot, page: int = 0) -> Rendered:
+    pages = page_count(len(snapshot.opportunities), bot.page_size)
+    page = min(page, pages - 1)
+    return render_cached(snapshot, 'admin', page, lambda: Rendered(
+        format_admin_text(snapshot, page),
+        InlineKeyboardMarkup(page_buttons('admin', page, pages)) if pages > 1 else None,
+    ))
+
+def reply_sender(update: Update):
+    async def send(rendered):
+        return await update.message.reply_text(rendered.text, reply_markup=rendered.reply_markup)
+    return send
+
+async def edit_message(message, rendered):
+    await message.edit_text(rendered.text, reply_markup=rendered.reply_markup)
 
 # Quick check command
 async def check_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     user = update.effective_user
     bot.save_user(user.id, user.username or "")
     
-    msg = await update.message.reply_text("🔄 Scanning arbitrage opportunities...")
-    
-    # 3 saniye bekle
-    await asyncio.sleep(3)
-    
-    all_data = await bot.get_all_prices_with_volume()
     is_premium = bot.is_premium_user(user.id)
     
-    opportunities = bot.calculate_arbitrage(all_data, is_premium)
-    
+    await progressive_reply(
+        user.id, 'premium' if is_premium else 'free',
+        lambda snapshot: render_check(snapshot, is_premium),
+        reply_sender(update), edit_message,
+    )
+
+def format_check_text(opportunities, is_premium: bool) -> str:
     if not opportunities:
-        await msg.edit_text("❌ No safe arbitrage opportunities found at the moment.")
-        return
+        return "❌ No safe arbitrage opportunities found at the moment."
     
-    text = f"🔍 Quick Arbitrage Scan Results:\n\n"
+    parts = ["🔍 Quick Arbitrage Scan Results:\n\n"]
     
     max_opps = 10 if is_premium else 5
     for i, opp in enumerate(opportunities[:max_opps], 1):
         trust_icon = "✅" if opp['symbol'] in bot.trusted_symbols else "🔍"
-        text += f"{i}. {trust_icon} {opp['symbol']}\n"
-        text += f"   💰 {opp['profit_percent']:.2f}% profit\n"
-        text += f"   📊 ${opp['avg_volume']:,.0f} volume\n\n"
+        parts.append(
+            f"{i}. {trust_icon} {opp['symbol']}\n"
+            f"   💰 {opp['profit_percent']:.2f}% profit{'' if opp.get('executable') else ' (last trade)'}\n"
+            f"   📊 ${opp['avg_volume']:,.0f} volume\n\n"
+        )
     
     if not is_premium and len(opportunities) > max_opps:
-        text += f"💎 {len(opportunities) - max_opps} more opportunities available with premium!"
+        parts.append(f"💎 {len(opportunities) - max_opps} more opportunities available with premium!")
     
-    await msg.edit_text(text)
+    return ''.join(parts)
 
-def main():
-    TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-    if not TOKEN:
-        logger.error("TELEGRAM_BOT_TOKEN environment variable not found!")
+def render_check(snapshot: OpportunitySnapshot, is_premium: bool) -> Rendered:
+    return render_cached(snapshot, 'check', 0, lambda: Rendered(format_check_text(snapshot.opportunities, is_premium)))
+
+def parse_subscription(args) -> Tuple[Optional[str], float, float, Set[str]]:
+    """/subscribe <symbol|*> [min_profit] [min_volume] [exchange,exchange,...]"""
+    raw = args[0].upper()
+    if raw in ('*', 'ALL', 'ANY'):
+        symbol = None
+    else:
+        parts = split_symbol(raw)
+        symbol = canonical_symbol(*parts) if parts else raw
+    min_profit = float(args[1].rstrip('%')) if len(args) > 1 else 0.5
+    min_volume = float(args[2].replace(',', '').lstrip('$')) if len(args) > 2 else 0.0
+    exchanges = {name.strip().lower() for name in args[3].split(',') if name.strip()} if len(args) > 3 else set()
+    unknown = exchanges - set(bot.exchanges)
+    if unknown:
+        raise ValueError(f"Unknown exchanges: {', '.join(sorted(unknown))}")
+    if min_profit < 0 or min_volume < 0:
+        raise ValueError("Thresholds must be positive")
+    return symbol, min_profit, min_volume, exchanges
+
+def describe_subscription(subscription: Subscription) -> str:
+    text = f"#{subscription.id} {subscription.symbol or 'any symbol'} ≥{subscription.min_profit:g}%"
+    if subscription.min_volume:
+        text += f", volume ≥${subscription.min_volume:,.0f}"
+    if subscription.exchanges:
+        text += f", on {', '.join(sorted(subscription.exchanges))}"
+    return text
+
+async def subscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Yeni fırsatlar için alarm aboneliği"""
+    user = update.effective_user
+    bot.save_user(user.id, user.username or "")
+    
+    if not context.args:
+        await update.message.reply_text(
+            "Usage: /subscribe <symbol|*> [min_profit%] [min_volume$] [exchange,exchange]\n"
+            "Example: /subscribe BTCUSDT 1.5 500000 binance,okx,kraken\n"
+            "Example: /subscribe * 1"
+        )
         return
     
-    # Set admin user ID from environment
-    global ADMIN_USER_ID
-    ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", "0"))
+    try:
+        symbol, min_profit, min_volume, exchanges = parse_subscription(context.args)
+    except ValueError as e:
+        await update.message.reply_text(f"❌ Invalid subscription: {e}")
+        return
     
-    if ADMIN_USER_ID == 0:
-        logger.warning("ADMIN_USER_ID not set! Admin commands will not work.")
+    premium = bot.is_premium_user(user.id)
+    if not premium and min_profit > bot.free_user_max_profit:
+        # Ücretsiz alarmlar en fazla free_user_max_profit kârlı fırsatlar için gider; bu abonelik hiç tetiklenmezdi
+        await update.message.reply_text(
+            f"❌ Free alerts cover opportunities up to {bot.free_user_max_profit}% profit, "
+            f"so a {min_profit}% minimum would never fire.\n"
+            f"💎 Upgrade to premium for higher-profit alerts, or use a minimum of {bot.free_user_max_profit}% or less."
+        )
+        return
+    
+    limit = bot.subscription_limit(user.id)
+    if len(bot.subscriptions.for_user(user.id)) >= limit:
+        await update.message.reply_text(f"❌ You can have at most {limit} subscriptions. Remove one with /unsubscribe.")
+        return
     
-    app = Application.builder().token(TOKEN).build()
+    subscription = await bot.add_subscription(user.id, symbol, exchanges, min_profit, min_volume)
+    text = f"🔔 Subscribed: {describe_subscription(subscription)}\nYou'll get a message when a matching opportunity appears."
+    if not premium:
+        text += f"\n💎 Alerts above {bot.free_user_max_profit}% profit are premium only."
+    await update.message.reply_text(text)
+
+async def unsubscribe_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    if not context.args:
+        await update.message.reply_text("Usage: /unsubscribe <id|all>  (see /alerts for ids)")
+        return
+    
+    if context.args[0].lower() == 'all':
+        removed = bot.drop_subscriber(user.id)
+        await update.message.reply_text(f"🔕 Removed {removed} subscriptions.")
+        return
+    
+    try:
+        sub_id = int(context.args[0].lstrip('#'))
+    except ValueError:
+        await update.message.reply_text("❌ Invalid subscription id.")
+        return
+    
+    if await bot.remove_subscription(user.id, sub_id):
+        await update.message.reply_text(f"🔕 Subscription #{sub_id} removed.")
+    else:
+        await update.message.reply_text(f"❌ Subscription #{sub_id} not found.")
+
+async def alerts_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    user = update.effective_user
+    subscriptions = bot.subscriptions.for_user(user.id)
+    if not subscriptions:
+        await update.message.reply_text("🔕 No alert subscriptions. Add one with /subscribe.")
+        return
+    
+    text = f"🔔 Your alert subscriptions ({len(subscriptions)}/{bot.subscription_limit(user.id)}):\n\n"
+    text += '\n'.join(f"• {describe_subscription(s)}" for s in subscriptions)
+    await update.message.reply_text(text)
+
+def format_alert(matches) -> str:
+    lines = ["🔔 New arbitrage opportunities:\n"]
+    for subscription, opp in matches:
+        lines.append(
+            f"• {opp['symbol']}: {opp['buy_exchange']} → {opp['sell_exchange']} "
+            f"{opp['profit_percent']:.2f}%{'' if opp.get('executable') else ' (last trade)'}, "
+            f"volume ${opp['avg_volume']:,.0f}  [#{subscription.id}]"
+        )
+    lines.append("\n/alerts to manage subscriptions")
+    return '\n'.join(lines)
+
+async def send_alert(telegram_bot, chat_id: int, matches):
+    await telegram_bot.send_message(chat_id, format_alert(matches), rate_limit_args={'priority': BULK})
+
+async def run_webhook(app: Application):
+    """Serve updates over a webhook with the same lifecycle hooks as run_polling"""
+    server = WebhookServer(app, WEBHOOK_PATH, WEBHOOK_SECRET, workers=UPDATE_WORKERS,
+                           max_pending=MAX_PENDING_UPDATES)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await app.initialize()
+    try:
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        await server.start(WEBHOOK_LISTEN, WEBHOOK_PORT)
+        # Her replika aynı adresi ve secret'ı kaydeder; kapanışta silinmez, diğerleri çalışıyor olabilir
+        await app.bot.set_webhook(WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH, secret_token=WEBHOOK_SECRET,
+                                  allowed_updates=Update.ALL_TYPES)
+        logger.info(f"Webhook registered at {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+        await stop.wait()
+    finally:
+        await server.stop()
+        if app.running:
+            await app.stop()
+        if app.post_stop:
+            await app.post_stop(app)
+        await app.shutdown()
+        if app.post_shutdown:
+            await app.post_shutdown(app)
+
+def build_application(token: str, base_url: str = None) -> Application:
+    """Application with all handlers and lifecycle hooks; base_url points at another Bot API server"""
+    builder = Application.builder().token(token).rate_limiter(bot.outbox)
+    if base_url:
+        builder = builder.base_url(base_url)
+    if WEBHOOK_URL:
+        # Update'leri kendi sunucumuz alır, polling Updater'ı gerekmez
+        builder = builder.updater(None)
+    app = builder.build()
 
     app.post_init = start_background_tasks
     
     # Command handlers
-    app.add_handler(CommandHandler("start", start))
-    app.add_handler(CommandHandler("check", check_command))
-    app.add_handler(CommandHandler("addpremium", add_premium_command))
-    app.add_handler(CommandHandler("removepremium", remove_premium_command))
-    app.add_handler(CommandHandler("listpremium", list_premium_command))
-    app.add_handler(CommandHandler("stats", stats_command))
-    app.add_handler(CommandHandler("admincheck", admin_check_command))
+    app.add_handler(CommandHandler("start", instrument("start", start)))
+    app.add_handler(CommandHandler("check", instrument("check", check_command)))
+    app.add_handler(CommandHandler("addpremium", instrument("addpremium", add_premium_command)))
+    app.add_handler(CommandHandler("removepremium", instrument("removepremium", remove_premium_command)))
+    app.add_handler(CommandHandler("listpremium", instrument("listpremium", list_premium_command)))
+    app.add_handler(CommandHandler("stats", instrument("stats", stats_command)))
+    app.add_handler(CommandHandler("admincheck", instrument("admincheck", admin_check_command)))
+    app.add_handler(CommandHandler("schedule", instrument("schedule", schedule_command)))
+    app.add_handler(CommandHandler("spreads", instrument("spreads", spreads_command)))
+    app.add_handler(CommandHandler("routes", instrument("routes", routes_command)))
+    app.add_handler(CommandHandler("subscribe", instrument("subscribe", subscribe_command)))
+    app.add_handler(CommandHandler("unsubscribe", instrument("unsubscribe", unsubscribe_command)))
+    app.add_handler(CommandHandler("alerts", instrument("alerts", alerts_command)))
     
     # Message handlers (command handlers'dan sonra)
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_license_activation))
+    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, instrument("license", handle_license_activation)))
     
     # Callback handlers
-    app.add_handler(CallbackQueryHandler(button_handler))
-
-    async def cleanup():
-        if bot.session and not bot.session.closed:
-            await bot.session.close()
+    app.add_handler(CallbackQueryHandler(instrument("button", button_handler)))
+
+    async def cleanup(app):
+        if 'metrics_runner' in app.bot_data:
+            await app.bot_data['metrics_runner'].cleanup()
+        await bot.stop_streaming()
+        await bot.transport.close()
+        # Kuyruktaki yazmaları bitir, bağlantıları kapat
+        bot.recorder.close()
+        if bot.tick_recorder:
+            await asyncio.to_thread(bot.tick_recorder.close)
+        await asyncio.to_thread(bot.db.close)
     
     app.post_stop = cleanup
+    return app
+
+def main():
+    TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not TOKEN:
+        logger.error("TELEGRAM_BOT_TOKEN environment variable not found!")
+        return
+    
+    # Set admin user ID from environment
+    global ADMIN_USER_ID
+    ADMIN_USER_ID = int(os.getenv("ADMIN_USER_ID", "0"))
     
-    app.run_polling()
+    if ADMIN_USER_ID == 0:
+        logger.warning("ADMIN_USER_ID not set! Admin commands will not work.")
+
+    if WEBHOOK_URL and not WEBHOOK_SECRET:
+        logger.error("WEBHOOK_SECRET must be set when WEBHOOK_URL is used!")
+        return
+    
+    app = build_application(TOKEN)
     
     logger.info("Advanced Arbitrage Bot starting...")
     logger.info(f"Monitoring {len(bot.exchanges)} exchanges")
     logger.info(f"Tracking {len(bot.trusted_symbols)} trusted symbols")
     logger.info(f"Premium users loaded: {len(bot.premium_users)}")
     
-    app.run_polling()
+    if WEBHOOK_URL:
+        asyncio.run(run_webhook(app))
+    else:
+        app.run_polling()
 
 if __name__ == '__main__':
     main()
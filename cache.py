@@ -0,0 +1,96 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class StaleValueError(Exception):
+    """Value is older than the hard staleness bound and could not be refreshed"""
+
+
+class SingleFlightCache(Generic[T]):
+    """Asyncio-native stale-while-revalidate holder for one refreshable value.
+
+    - age < ttl: served as is.
+    - ttl <= age < max_staleness: served immediately, one background refresh starts.
+    - cold or older than max_staleness: callers wait for the refresh.
+    All concurrent callers share a single in-flight refresh.
+    """
+
+    def __init__(self, refresh: Callable[[], Awaitable[T]], ttl: float, max_staleness: float,
+                 min_interval: float = 0, stats: Dict[str, int] = None):
+        self.refresh = refresh
+        self.ttl = ttl
+        self.max_staleness = max_staleness
+        self.min_interval = min_interval
+        self.stats = stats if stats is not None else {}
+        self.value: Optional[T] = None
+        self.updated_at = 0.0
+        self.last_refresh_started = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.updated_at
+
+    def _count(self, key: str):
+        self.stats[key] = self.stats.get(key, 0) + 1
+
+    def set(self, value: T):
+        """Publish a value produced outside the cache (scheduler, feeds)"""
+        self.value = value
+        self.updated_at = time.time()
+
+    def touch(self):
+        """Upstream data confirmed current without a new value"""
+        if self.value is not None:
+            self.updated_at = time.time()
+
+    def _start_refresh(self) -> asyncio.Task:
+        if self._inflight is None:
+            self.last_refresh_started = time.time()
+            self._inflight = asyncio.create_task(self._run_refresh())
+            self._inflight.add_done_callback(self._log_failure)
+        return self._inflight
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Background cache refresh failed: {task.exception()}")
+
+    async def _run_refresh(self) -> T:
+        try:
+            value = await self.refresh()
+            self.set(value)
+            self._count('cache_refreshes')
+            return value
+        finally:
+            self._inflight = None
+
+    async def get(self) -> T:
+        age = self.age
+        if self.value is not None and age < self.ttl:
+            self._count('cache_hits')
+            return self.value
+
+        if self.value is not None and age < self.max_staleness:
+            # Bekletmeden eski veriyi ver, arka planda tek bir yenileme başlat
+            self._count('cache_stale_hits')
+            if time.time() - self.last_refresh_started >= self.min_interval:
+                self._start_refresh()
+            return self.value
+
+        self._count('cache_misses')
+        task = self._start_refresh()
+        try:
+            # shield: bir bekleyenin iptali ortak yenilemeyi iptal etmesin
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Cache refresh failed: {e}")
+            raise StaleValueError(str(e)) from e
@@ -0,0 +1,551 @@
+import logging
+import time
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Tuple, Type
+
+from markets import MarketIndex, canonical_symbol, split_symbol
+from price_book import top_of_book
+
+logger = logging.getLogger(__name__)
+
+# Symbol mapping for different exchange formats
+SYMBOL_MAPPING = {
+    'BTC/USDT': 'BTCUSDT',
+    'BTC-USDT': 'BTCUSDT',
+    'BTC_USDT': 'BTCUSDT',
+    'tBTCUSDT': 'BTCUSDT',
+    'ETH/USDT': 'ETHUSDT',
+    'ETH-USDT': 'ETHUSDT',
+    'ETH_USDT': 'ETHUSDT',
+    'tETHUSDT': 'ETHUSDT'
+}
+
+# (raw symbol, quote) - quote en az 'price' ve 'volume' içerir
+ParsedRow = Optional[Tuple[str, Dict]]
+
+# (raw symbol, base, quote) - borsanın enstrüman listesinden
+Instrument = Tuple[str, str, str]
+
+# (fiyat, base miktar); bids azalan, asks artan fiyat sırasında
+Level = Tuple[float, float]
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Normalize symbol format across exchanges"""
+    if symbol in SYMBOL_MAPPING:
+        return SYMBOL_MAPPING[symbol]
+    # Remove common separators and convert to standard format
+    return symbol.upper().replace('/', '').replace('-', '').replace('_', '')
+
+
+class ExchangeConnector:
+    """REST ticker endpoint description and parser for one exchange"""
+
+    name = ''
+    url = ''
+    # 'quote': hacim zaten USDT cinsinden, 'base': fiyat ile çarpılır
+    volume_unit = 'quote'
+    # Hacim eşiği çarpanı (bazı borsalar farklı ölçekte hacim döner)
+    volume_scale = 1.0
+    # Borsanın rate limitine göre iki tam ticker isteği arası minimum süre (saniye)
+    min_interval = 20.0
+    # Streaming JSON parse için satırların ijson yolu (None: desteklenmiyor)
+    items_prefix: Optional[str] = 'item'
+    # True ise satırlar prefix'teki objenin (key, value) çiftleri
+    items_kv = False
+    # Son parse'ta görülen toplam satır (filtrelenenler dahil)
+    rows_seen = 0
+    # Enstrüman listesi (base/quote) endpoint'i; None ise semboller ayraç/quote ile ayrıştırılır
+    markets_url: Optional[str] = None
+    # Order book endpoint'i ({symbol} ham sembol, {limit} seviye); None ise derinlik çekilmez
+    depth_url: Optional[str] = None
+
+    def __init__(self, min_volume: float):
+        self.min_volume = min_volume
+        self.markets = MarketIndex(self.canonicalize)
+
+    def request_url(self) -> str:
+        return self.url
+
+    def canonicalize(self, symbol: str) -> str:
+        """Canonical symbol for a raw one the instrument list does not cover"""
+        if symbol in SYMBOL_MAPPING:
+            return SYMBOL_MAPPING[symbol]
+        parts = split_symbol(symbol)
+        return canonical_symbol(*parts) if parts else normalize_symbol(symbol)
+
+    def normalize_symbol(self, symbol: str) -> str:
+        return self.markets.lookup(symbol)
+
+    def parse_markets(self, data) -> Iterable[Instrument]:
+        """(raw symbol, base, quote) for every instrument in the markets_url response"""
+        return ()
+
+    def depth_request_url(self, raw_symbol: str, limit: int) -> str:
+        return self.depth_url.format(symbol=raw_symbol, limit=limit)
+
+    def depth_sides(self, data) -> Tuple[list, list]:
+        """Raw (bids, asks) level lists inside the decoded order book"""
+        return data['bids'], data['asks']
+
+    def parse_depth(self, data, limit: int) -> Tuple[List[Level], List[Level]]:
+        bids, asks = self.depth_sides(data)
+        return ([(float(level[0]), float(level[1])) for level in bids[:limit]],
+                [(float(level[0]), float(level[1])) for level in asks[:limit]])
+
+    def items(self, data) -> Iterable:
+        """Ticker rows inside the decoded payload"""
+        return data if isinstance(data, list) else []
+
+    def parse_item(self, item) -> ParsedRow:
+        raise NotImplementedError
+
+    def quote(self, price, volume, bid=None, ask=None, bid_size=None, ask_size=None, **extra) -> Dict:
+        """Normalized quote; top-of-book fields are kept only when the ticker has a sane bid < ask"""
+        price = float(price)
+        volume = float(volume) if volume else 0
+        if self.volume_unit == 'base':
+            volume *= price
+        return {'price': price, 'volume': volume, **top_of_book(bid, ask, bid_size, ask_size), **extra}
+
+    def accepts(self, quote: Dict) -> bool:
+        return quote['volume'] > self.min_volume * self.volume_scale
+
+    def _add_row(self, result: Dict[str, Dict], item):
+        try:
+            row = self.parse_item(item)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return
+        if row is None:
+            return
+        symbol, quote = row
+        if self.accepts(quote):
+            result[self.normalize_symbol(symbol)] = quote
+
+    def parse(self, data) -> Dict[str, Dict]:
+        """Parse exchange-specific data format"""
+        result = {}
+        seen = 0
+        for item in self.items(data):
+            seen += 1
+            self._add_row(result, item)
+        self.rows_seen = seen
+        return result
+
+    async def parse_stream(self, rows: AsyncIterable) -> Dict[str, Dict]:
+        """Filter and normalize rows as they are decoded, without building the full document"""
+        result = {}
+        seen = 0
+        async for item in rows:
+            seen += 1
+            self._add_row(result, item)
+        self.rows_seen = seen
+        return result
+
+
+CONNECTORS: Dict[str, Type[ExchangeConnector]] = {}
+
+
+def register(cls: Type[ExchangeConnector]) -> Type[ExchangeConnector]:
+    CONNECTORS[cls.name] = cls
+    return cls
+
+
+def build_connectors(min_volume: float) -> Dict[str, ExchangeConnector]:
+    """Instantiate every registered connector"""
+    return {name: cls(min_volume) for name, cls in CONNECTORS.items()}
+
+
+@register
+class BinanceConnector(ExchangeConnector):
+    name = 'binance'
+    url = 'https://api.binance.com/api/v3/ticker/24hr'
+    markets_url = 'https://api.binance.com/api/v3/exchangeInfo?permissions=SPOT'
+    depth_url = 'https://api.binance.com/api/v3/depth?symbol={symbol}&limit={limit}'
+
+    def parse_markets(self, data):
+        for item in data.get('symbols', []):
+            yield item['symbol'], item['baseAsset'], item['quoteAsset']
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['lastPrice'], item['quoteVolume'], item.get('bidPrice'),
+                                          item.get('askPrice'), item.get('bidQty'), item.get('askQty'),
+                                          count=int(item['count']))
+
+
+@register
+class KucoinConnector(ExchangeConnector):
+    name = 'kucoin'
+    url = 'https://api.kucoin.com/api/v1/market/allTickers'
+    depth_url = 'https://api.kucoin.com/api/v1/market/orderbook/level2_20?symbol={symbol}'
+    items_prefix = 'data.ticker.item'
+
+    def depth_sides(self, data):
+        book = data['data']
+        return book['bids'], book['asks']
+
+    def items(self, data):
+        return data.get('data', {}).get('ticker', [])
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['last'], item['volValue'], item.get('buy'), item.get('sell'),
+                                          item.get('bestBidSize'), item.get('bestAskSize'))
+
+
+@register
+class GateConnector(ExchangeConnector):
+    name = 'gate'
+    url = 'https://api.gateio.ws/api/v4/spot/tickers'
+    depth_url = 'https://api.gateio.ws/api/v4/spot/order_book?currency_pair={symbol}&limit={limit}'
+
+    def parse_item(self, item):
+        return item['currency_pair'], self.quote(item['last'], item['quote_volume'], item.get('highest_bid'),
+                                                 item.get('lowest_ask'), item.get('highest_size'),
+                                                 item.get('lowest_size'))
+
+
+@register
+class MexcConnector(ExchangeConnector):
+    name = 'mexc'
+    url = 'https://api.mexc.com/api/v3/ticker/24hr'
+    depth_url = 'https://api.mexc.com/api/v3/depth?symbol={symbol}&limit={limit}'
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['lastPrice'], item.get('quoteVolume', 0), item.get('bidPrice'),
+                                          item.get('askPrice'), item.get('bidQty'), item.get('askQty'))
+
+
+@register
+class BybitConnector(ExchangeConnector):
+    name = 'bybit'
+    url = 'https://api.bybit.com/v5/market/tickers?category=spot'
+    depth_url = 'https://api.bybit.com/v5/market/orderbook?category=spot&symbol={symbol}&limit={limit}'
+    items_prefix = 'result.list.item'
+
+    def depth_sides(self, data):
+        book = data['result']
+        return book['b'], book['a']
+
+    def items(self, data):
+        return data.get('result', {}).get('list', [])
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['lastPrice'], item['turnover24h'], item.get('bid1Price'),
+                                          item.get('ask1Price'), item.get('bid1Size'), item.get('ask1Size'))
+
+
+@register
+class OkxConnector(ExchangeConnector):
+    name = 'okx'
+    url = 'https://www.okx.com/api/v5/market/tickers?instType=SPOT'
+    depth_url = 'https://www.okx.com/api/v5/market/books?instId={symbol}&sz={limit}'
+    items_prefix = 'data.item'
+
+    def depth_sides(self, data):
+        book = data['data'][0]
+        return book['bids'], book['asks']
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        return item['instId'], self.quote(item['last'], item['volCcy24h'], item.get('bidPx'), item.get('askPx'),
+                                          item.get('bidSz'), item.get('askSz'))
+
+
+@register
+class HuobiConnector(ExchangeConnector):
+    name = 'huobi'
+    url = 'https://api.huobi.pro/market/tickers'
+    markets_url = 'https://api.huobi.pro/v1/common/symbols'
+    depth_url = 'https://api.huobi.pro/market/depth?symbol={symbol}&type=step0&depth={limit}'
+    items_prefix = 'data.item'
+    volume_scale = 0.01
+
+    def parse_markets(self, data):
+        for item in data.get('data', []):
+            yield item['symbol'], item['base-currency'], item['quote-currency']
+
+    def depth_sides(self, data):
+        book = data['tick']
+        return book['bids'], book['asks']
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['close'], item['vol'], item.get('bid'), item.get('ask'),
+                                          item.get('bidSize'), item.get('askSize'))
+
+
+@register
+class BitgetConnector(ExchangeConnector):
+    name = 'bitget'
+    url = 'https://api.bitget.com/api/spot/v1/market/tickers'
+    items_prefix = 'data.item'
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['close'], item['quoteVol'], item.get('buyOne'), item.get('sellOne'),
+                                          item.get('bidSz'), item.get('askSz'))
+
+
+@register
+class CoinbaseConnector(ExchangeConnector):
+    name = 'coinbase'
+    # /products sadece ürün listesi döner, fiyat ve hacim /products/stats'ta
+    url = 'https://api.exchange.coinbase.com/products/stats'
+    markets_url = 'https://api.exchange.coinbase.com/products'
+    items_prefix = ''
+    items_kv = True
+    volume_unit = 'base'
+
+    def parse_markets(self, data):
+        # BTC-USD ve BTC-USDT farklı varlıklar, quote olduğu gibi korunur
+        for item in data:
+            yield item['id'], item['base_currency'], item['quote_currency']
+
+    def items(self, data):
+        return data.items() if isinstance(data, dict) else []
+
+    def parse_item(self, item):
+        product_id, stats = item
+        stats = stats['stats_24hour']
+        return product_id, self.quote(stats['last'], stats['volume'])
+
+
+@register
+class KrakenConnector(ExchangeConnector):
+    name = 'kraken'
+    url = 'https://api.kraken.com/0/public/Ticker'
+    markets_url = 'https://api.kraken.com/0/public/AssetPairs'
+    depth_url = 'https://api.kraken.com/0/public/Depth?pair={symbol}&count={limit}'
+    items_prefix = 'result'
+    items_kv = True
+    volume_unit = 'base'
+
+    def parse_markets(self, data):
+        # Ticker anahtarları (XXBTZUSD) AssetPairs anahtarlarıyla aynı; wsname: XBT/USD
+        for symbol, info in data.get('result', {}).items():
+            wsname = info.get('wsname', '')
+            base, _, quote = wsname.partition('/')
+            if not quote:
+                base, quote = info['base'], info['quote']
+            yield symbol, base, quote
+
+    def depth_sides(self, data):
+        book = next(iter(data['result'].values()))
+        return book['bids'], book['asks']
+
+    def items(self, data):
+        return data.get('result', {}).items()
+
+    def parse_item(self, item):
+        symbol, ticker_data = item
+        # a/b: [fiyat, tam lot hacmi, lot hacmi]
+        ask, bid = ticker_data.get('a') or [None] * 3, ticker_data.get('b') or [None] * 3
+        return symbol, self.quote(ticker_data['c'][0], ticker_data['v'][1], bid[0], ask[0], bid[2], ask[2])
+
+
+@register
+class BitfinexConnector(ExchangeConnector):
+    name = 'bitfinex'
+    url = 'https://api-pub.bitfinex.com/v2/tickers?symbols=ALL'
+    markets_url = 'https://api-pub.bitfinex.com/v2/conf/pub:list:pair:exchange'
+    depth_url = 'https://api-pub.bitfinex.com/v2/book/{symbol}/P0?len=25'
+    volume_unit = 'base'
+
+    def depth_sides(self, data):
+        # [PRICE, COUNT, AMOUNT]: AMOUNT > 0 bid, < 0 ask
+        bids = [(level[0], level[2]) for level in data if level[2] > 0]
+        asks = [(level[0], -level[2]) for level in data if level[2] < 0]
+        return bids, asks
+
+    def canonicalize(self, symbol):
+        if symbol in SYMBOL_MAPPING:
+            return SYMBOL_MAPPING[symbol]
+        return super().canonicalize(symbol[1:] if symbol.startswith('t') else symbol)
+
+    def parse_markets(self, data):
+        # Çiftler 3+3 harf (BTCUST) ya da uzun kodlarda ':' ile ayrılmış (TESTBTC:TESTUSD)
+        for pair in data[0] if data else []:
+            base, _, quote = pair.partition(':')
+            if not quote:
+                base, quote = pair[:3], pair[3:]
+            yield f"t{pair}", base, quote
+
+    def parse_item(self, item):
+        # [SYMBOL, BID, BID_SIZE, ASK, ASK_SIZE, DAILY_CHANGE, DAILY_CHANGE_RELATIVE, LAST_PRICE, VOLUME, ...]
+        if not item[0].startswith('t') or len(item) < 9:
+            return None  # funding ticker
+        return item[0], self.quote(item[7], item[8], item[1], item[3], item[2], item[4])
+
+
+@register
+class PoloniexConnector(ExchangeConnector):
+    name = 'poloniex'
+    url = 'https://api.poloniex.com/markets/ticker24h'
+    # Eski dict ve yeni list formatı birlikte destekleniyor, streaming yok
+    items_prefix = None
+
+    def items(self, data):
+        return data.items() if isinstance(data, dict) else data
+
+    def parse_item(self, item):
+        if isinstance(item, tuple):
+            # Eski returnTicker formatı: {symbol: {...}}
+            symbol, ticker_data = item
+            return symbol, self.quote(ticker_data['close'], ticker_data['quoteVolume'],
+                                      ticker_data.get('highestBid'), ticker_data.get('lowestAsk'))
+        return item['symbol'], self.quote(item['close'], item['amount'], item.get('bid'), item.get('ask'),
+                                          item.get('bidQuantity'), item.get('askQuantity'))
+
+
+@register
+class CryptocomConnector(ExchangeConnector):
+    name = 'cryptocom'
+    url = 'https://api.crypto.com/exchange/v1/public/get-tickers'
+    items_prefix = 'result.data.item'
+
+    def items(self, data):
+        return data.get('result', {}).get('data', [])
+
+    def parse_item(self, item):
+        # vv: 24 saatlik USD cinsinden hacim
+        return item['i'], self.quote(item['a'], item['vv'], item.get('b'), item.get('k'), item.get('bs'), item.get('ks'))
+
+
+@register
+class BingxConnector(ExchangeConnector):
+    name = 'bingx'
+    url = 'https://open-api.bingx.com/openApi/spot/v1/ticker/24hr'
+    items_prefix = 'data.item'
+
+    def request_url(self):
+        return f"{self.url}?timestamp={int(time.time() * 1000)}"
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['lastPrice'], item['quoteVolume'], item.get('bidPrice'),
+                                          item.get('askPrice'), item.get('bidQty'), item.get('askQty'))
+
+
+@register
+class LbankConnector(ExchangeConnector):
+    name = 'lbank'
+    url = 'https://api.lbkex.com/v2/ticker/24hr.do?symbol=all'
+    items_prefix = 'data.item'
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        ticker = item['ticker']
+        return item['symbol'], self.quote(ticker['latest'], ticker['turnover'])
+
+
+@register
+class BitmartConnector(ExchangeConnector):
+    name = 'bitmart'
+    url = 'https://api-cloud.bitmart.com/spot/v1/ticker'
+    items_prefix = 'data.tickers.item'
+
+    def items(self, data):
+        return data.get('data', {}).get('tickers', [])
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['last_price'], item['quote_volume_24h'], item.get('best_bid'),
+                                          item.get('best_ask'), item.get('best_bid_size'),
+                                          item.get('best_ask_size'))
+
+
+@register
+class AscendexConnector(ExchangeConnector):
+    name = 'ascendex'
+    url = 'https://ascendex.com/api/pro/v1/ticker'
+    items_prefix = 'data.item'
+    volume_unit = 'base'
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        # bid/ask: [fiyat, miktar]
+        bid, ask = item.get('bid') or [None] * 2, item.get('ask') or [None] * 2
+        return item['symbol'], self.quote(item['close'], item['volume'], bid[0], ask[0], bid[1], ask[1])
+
+
+@register
+class CoinexConnector(ExchangeConnector):
+    name = 'coinex'
+    url = 'https://api.coinex.com/v1/market/ticker/all'
+    items_prefix = 'data.ticker'
+    items_kv = True
+    volume_unit = 'base'
+
+    def items(self, data):
+        return data.get('data', {}).get('ticker', {}).items()
+
+    def parse_item(self, item):
+        symbol, ticker = item
+        return symbol, self.quote(ticker['last'], ticker['vol'], ticker.get('buy'), ticker.get('sell'),
+                                  ticker.get('buy_amount'), ticker.get('sell_amount'))
+
+
+@register
+class BigoneConnector(ExchangeConnector):
+    name = 'bigone'
+    url = 'https://big.one/api/v3/asset_pairs/tickers'
+    items_prefix = 'data.item'
+    volume_unit = 'base'
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        bid, ask = item.get('bid') or {}, item.get('ask') or {}
+        return item['asset_pair_name'], self.quote(item['close'], item['volume'], bid.get('price'), ask.get('price'),
+                                                   bid.get('quantity'), ask.get('quantity'))
+
+
+@register
+class ProbitConnector(ExchangeConnector):
+    name = 'probit'
+    url = 'https://api.probit.com/api/exchange/v1/ticker'
+    items_prefix = 'data.item'
+
+    def items(self, data):
+        return data.get('data', [])
+
+    def parse_item(self, item):
+        return item['market_id'], self.quote(item['last'], item['quote_volume'])
+
+
+@register
+class BitrueConnector(ExchangeConnector):
+    name = 'bitrue'
+    url = 'https://www.bitrue.com/api/v1/ticker/24hr'
+
+    def parse_item(self, item):
+        return item['symbol'], self.quote(item['lastPrice'], item['quoteVolume'], item.get('bidPrice'),
+                                          item.get('askPrice'), item.get('bidQty'), item.get('askQty'))
+
+
+@register
+class P2pb2bConnector(ExchangeConnector):
+    name = 'p2pb2b'
+    url = 'https://api.p2pb2b.com/api/v2/public/tickers'
+    items_prefix = 'result'
+    items_kv = True
+
+    def items(self, data):
+        return data.get('result', {}).items()
+
+    def parse_item(self, item):
+        symbol, data = item
+        ticker = data['ticker']
+        # deal: quote cinsinden hacim
+        return symbol, self.quote(ticker['last'], ticker['deal'], ticker.get('bid'), ticker.get('ask'))
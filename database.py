@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from metrics import DB_WRITE_JOBS, DB_WRITE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# WAL: okuyucular yazıcıyı beklemez; synchronous=NORMAL WAL'da güvenli ve
+# her commit'te fsync yapmaz (sadece checkpoint'te)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # ~16 MB page cache
+    "PRAGMA mmap_size=134217728",  # 128 MB
+    "PRAGMA busy_timeout=5000",
+)
+
+_STOP = object()
+
+
+class Database:
+    """Long-lived SQLite access that never blocks the event loop.
+
+    All writes go through one background writer thread that owns the write
+    connection and commits whatever is queued in a single transaction. Reads
+    run on a separate read connection in a one-thread executor; WAL mode lets
+    them proceed while the writer is busy.
+    """
+
+    def __init__(self, path: str, max_batch: int = 500):
+        self.path = path
+        self.max_batch = max_batch
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer_conn = self._connect()
+        self._reader_conn = self._connect()
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='db-reader')
+        self._writer = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def init_schema(self, statements: Iterable[str]):
+        """Create tables synchronously at startup, before the event loop runs"""
+        self.submit(lambda conn: [conn.execute(sql) for sql in statements]).result()
+
+    # --- Yazma tarafı ---
+
+    def submit(self, fn: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue fn(conn) for the writer thread; it runs inside a transaction"""
+        future = Future()
+        self._queue.put((fn, future))
+        return future
+
+    def write(self, sql: str, params: Sequence = ()) -> Future:
+        """Fire-and-forget single statement; returns a future for the rowcount"""
+        return self.submit(lambda conn: conn.execute(sql, params).rowcount)
+
+    def write_many(self, sql: str, rows: List[Sequence]) -> Future:
+        return self.submit(lambda conn: conn.executemany(sql, rows).rowcount)
+
+    async def execute(self, sql: str, params: Sequence = ()) -> int:
+        """Write and wait until it is committed"""
+        return await asyncio.wrap_future(self.write(sql, params))
+
+    async def executemany(self, sql: str, rows: List[Sequence]) -> int:
+        return await asyncio.wrap_future(self.write_many(sql, rows))
+
+    async def transaction(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Run several statements atomically on the writer connection"""
+        return await asyncio.wrap_future(self.submit(fn))
+
+    def _writer_loop(self):
+        conn = self._writer_conn
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            # Kuyrukta bekleyenleri aynı transaction'a al: tek commit, tek WAL sync
+            stop = False
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            start = time.perf_counter()
+            try:
+                self._run_batch(conn, batch)
+            except Exception as e:
+                # Thread ölürse bekleyen ve sonraki tüm yazmalar sonsuza kadar bekler
+                logger.error(f"Database batch failed: {e}")
+                self._rollback(conn)
+                for _, future in batch:
+                    self._settle(future, None, e)
+            DB_WRITE_SECONDS.observe(time.perf_counter() - start)
+            DB_WRITE_JOBS.inc(amount=len(batch))
+            if stop:
+                break
+        conn.close()
+
+    @staticmethod
+    def _rollback(conn: sqlite3.Connection):
+        """ROLLBACK unless SQLite already ended the transaction itself (SQLITE_FULL, IOERR, ...)"""
+        if not conn.in_transaction:
+            return
+        try:
+            conn.execute("ROLLBACK")
+        except sqlite3.Error as e:
+            logger.error(f"Database rollback failed: {e}")
+
+    @staticmethod
+    def _settle(future: Future, result: Any, error: Optional[BaseException]):
+        if future.done():
+            return  # Çağıran iptal etti ya da zaten sonuçlandı
+        try:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+        except InvalidStateError:
+            pass
+
+    @classmethod
+    def _run_batch(cls, conn: sqlite3.Connection, batch: List[Tuple[Callable, Future]]):
+        results = []
+        try:
+            conn.execute("BEGIN")
+            for fn, future in batch:
+                # Her iş kendi savepoint'inde: biri hata verirse diğerleri commit edilir
+                conn.execute("SAVEPOINT job")
+                try:
+                    results.append((future, fn(conn), None))
+                    conn.execute("RELEASE job")
+                except Exception as e:
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK TO job")
+                        conn.execute("RELEASE job")
+                        results.append((future, None, e))
+                    else:
+                        # SQLite tüm transaction'ı kendisi geri aldı: önceki işler de kayboldu
+                        results = [(done, None, e) for done, _, _ in results] + [(future, None, e)]
+                        conn.execute("BEGIN")
+            conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"Database commit failed: {e}")
+            cls._rollback(conn)
+            errors = {id(future): error for future, _, error in results if error is not None}
+            results = [(future, None, errors.get(id(future), e)) for _, future in batch]
+
+        for future, result, error in results:
+            if error is not None:
+                logger.error(f"Database write failed: {error}")
+            cls._settle(future, result, error)
+
+    # --- Okuma tarafı ---
+
+    def _fetch(self, sql: str, params: Sequence) -> List[tuple]:
+        return self._reader_conn.execute(sql, params).fetchall()
+
+    def fetchall_blocking(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        """Synchronous read for startup code that runs before the event loop"""
+        return self._reader.submit(self._fetch, sql, params).result()
+
+    async def fetchall(self, sql: str, params: Sequence = ()) -> List[tuple]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._reader, self._fetch, sql, params)
+
+    async def fetchone(self, sql: str, params: Sequence = ()) -> Optional[tuple]:
+        rows = await self.fetchall(sql, params)
+        return rows[0] if rows else None
+
+    async def fetchval(self, sql: str, params: Sequence = ()) -> Any:
+        row = await self.fetchone(sql, params)
+        return row[0] if row else None
+
+    def close(self):
+        """Flush pending writes and close both connections"""
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._reader.submit(self._reader_conn.close).result()
+        self._reader.shutdown()
@@ -0,0 +1,136 @@
+import logging
+import time
+from collections import deque
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitBreaker:
+    """Per-exchange breaker driven by recent error rate and latency.
+
+    closed: normal traffic. open: requests skipped until `open_timeout`
+    elapses. half-open: a single probe is allowed; success closes the
+    breaker, failure re-opens it with a doubled timeout.
+    """
+
+    def __init__(self, exchange: str, window: int = 20, min_calls: int = 4,
+                 error_threshold: float = 0.5, slow_threshold: float = 8.0,
+                 open_timeout: float = 60, max_open_timeout: float = 900):
+        self.exchange = exchange
+        self.window = window
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.slow_threshold = slow_threshold
+        self.base_open_timeout = open_timeout
+        self.open_timeout = open_timeout
+        self.max_open_timeout = max_open_timeout
+        # (başarılı mı, süre) son `window` çağrı
+        self.calls = deque(maxlen=window)
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self.last_success = 0.0
+        self.probe_in_flight = False
+
+    def allow(self) -> bool:
+        """Should a request be sent now?"""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.time() - self.opened_at >= self.open_timeout:
+            self.state = HALF_OPEN
+            logger.info(f"{self.exchange} circuit half-open, probing")
+        if self.state == HALF_OPEN and not self.probe_in_flight:
+            self.probe_in_flight = True
+            return True
+        return False
+
+    def record(self, success: bool, duration: float):
+        # Eşikten yavaş cevaplar da hata sayılır
+        ok = success and duration < self.slow_threshold
+        self.calls.append((ok, duration))
+        if success:
+            self.last_success = time.time()
+
+        if self.state == HALF_OPEN:
+            self.probe_in_flight = False
+            if ok:
+                self._close()
+            else:
+                self._open(self.open_timeout * 2)
+            return
+
+        if self.state == CLOSED and len(self.calls) >= self.min_calls and self.error_rate >= self.error_threshold:
+            self._open(self.base_open_timeout)
+
+    def _open(self, timeout: float):
+        self.state = OPEN
+        self.opened_at = time.time()
+        self.open_timeout = min(timeout, self.max_open_timeout)
+        logger.warning(f"{self.exchange} circuit open for {self.open_timeout:.0f}s "
+                       f"(error rate {self.error_rate:.0%})")
+
+    def _close(self):
+        self.state = CLOSED
+        self.open_timeout = self.base_open_timeout
+        self.calls.clear()
+        logger.info(f"{self.exchange} circuit closed")
+
+    @property
+    def error_rate(self) -> float:
+        if not self.calls:
+            return 0.0
+        return sum(1 for ok, _ in self.calls if not ok) / len(self.calls)
+
+    def latency_percentile(self, pct: float) -> float:
+        durations = sorted(d for _, d in self.calls)
+        if not durations:
+            return 0.0
+        return durations[min(len(durations) - 1, int(len(durations) * pct))]
+
+    def health_score(self, max_age: float) -> float:
+        """0..1 score: success rate, p95 latency and data freshness combined"""
+        if self.state == OPEN:
+            return 0.0
+        if not self.last_success or time.time() - self.last_success > max_age:
+            return 0.0
+        latency_factor = max(0.0, 1 - self.latency_percentile(0.95) / (self.slow_threshold * 2))
+        return (1 - self.error_rate) * (0.5 + 0.5 * latency_factor)
+
+
+class ExchangeHealth:
+    """Circuit breakers and health scores for every exchange"""
+
+    def __init__(self, exchanges, min_score: float = 0.3, max_age: float = 120, **breaker_options):
+        self.breakers: Dict[str, CircuitBreaker] = {
+            exchange: CircuitBreaker(exchange, **breaker_options) for exchange in exchanges
+        }
+        self.min_score = min_score
+        self.max_age = max_age
+
+    def allow(self, exchange: str) -> bool:
+        breaker = self.breakers.get(exchange)
+        return breaker.allow() if breaker else True
+
+    def is_open(self, exchange: str) -> bool:
+        """Read-only check; unlike allow() it never claims the half-open probe"""
+        breaker = self.breakers.get(exchange)
+        return breaker is not None and breaker.state == OPEN
+
+    def record(self, exchange: str, success: bool, duration: float):
+        breaker = self.breakers.get(exchange)
+        if breaker:
+            breaker.record(success, duration)
+
+    def score(self, exchange: str) -> float:
+        breaker = self.breakers.get(exchange)
+        return breaker.health_score(self.max_age) if breaker else 1.0
+
+    def is_healthy(self, exchange: str) -> bool:
+        return self.score(exchange) >= self.min_score
+
+    def unhealthy(self) -> List[str]:
+        return [exchange for exchange in self.breakers if not self.is_healthy(exchange)]
@@ -0,0 +1,235 @@
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+# Kapanmış günler için sıkıştırılmış kolon dosyaları (numpy yoksa gzip JSON)
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+COLUMNS = ('symbol', 'exchange1', 'exchange2', 'price1', 'price2', 'profit_percent', 'volume_24h', 'timestamp')
+TEXT_COLUMNS = ('symbol', 'exchange1', 'exchange2', 'timestamp')
+
+SCHEMA = (
+    '''
+        CREATE TABLE IF NOT EXISTS arbitrage_data (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            symbol TEXT,
+            exchange1 TEXT,
+            exchange2 TEXT,
+            price1 REAL,
+            price2 REAL,
+            profit_percent REAL,
+            volume_24h REAL,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_arbitrage_timestamp ON arbitrage_data (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_arbitrage_symbol_time ON arbitrage_data (symbol, timestamp)',
+    # Gün başına artımlı özet: /stats ve retention tabloyu taramaz
+    '''
+        CREATE TABLE IF NOT EXISTS arbitrage_daily (
+            day TEXT PRIMARY KEY,
+            rows INTEGER NOT NULL DEFAULT 0,
+            profit_sum REAL NOT NULL DEFAULT 0,
+            profit_max REAL NOT NULL DEFAULT 0,
+            archived INTEGER NOT NULL DEFAULT 0
+        )
+    ''',
+)
+
+INSERT_SQL = f'''
+    INSERT INTO arbitrage_data ({', '.join(COLUMNS)})
+    VALUES ({', '.join('?' * len(COLUMNS))})
+'''
+
+UPSERT_DAILY_SQL = '''
+    INSERT INTO arbitrage_daily (day, rows, profit_sum, profit_max)
+    VALUES (?, ?, ?, ?)
+    ON CONFLICT(day) DO UPDATE SET
+        rows = rows + excluded.rows,
+        profit_sum = profit_sum + excluded.profit_sum,
+        profit_max = max(profit_max, excluded.profit_max)
+'''
+
+
+def day_bounds(day: str) -> Tuple[str, str]:
+    """[start, end) timestamp strings for one UTC day, for index range scans"""
+    end = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+    return f"{day} 00:00:00", f"{end} 00:00:00"
+
+
+def daily_aggregates(rows: Sequence[Tuple]) -> List[Tuple]:
+    """(day, rows, profit_sum, profit_max) for a batch of arbitrage_data rows"""
+    days: Dict[str, List[float]] = {}
+    for row in rows:
+        profit = row[5]
+        agg = days.setdefault(row[7][:10], [0, 0.0, profit])
+        agg[0] += 1
+        agg[1] += profit
+        agg[2] = max(agg[2], profit)
+    return [(day, count, total, peak) for day, (count, total, peak) in days.items()]
+
+
+class HistoryStore:
+    """Day-partitioned opportunity history.
+
+    Recent days live in the indexed `arbitrage_data` table; closed days older
+    than `hot_days` are rolled into one compressed columnar file per day under
+    `archive_dir` and deleted from SQLite, and archived days past
+    `retention_days` are dropped. Row counts are kept per day in
+    `arbitrage_daily` and as an in-memory total, so /stats never scans.
+    """
+
+    def __init__(self, db: Database, archive_dir: str = 'archive',
+                 hot_days: int = 2, retention_days: int = 90, roll_interval: float = 3600):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.hot_days = hot_days
+        self.retention_days = retention_days
+        self.roll_interval = roll_interval
+        self.db.init_schema(SCHEMA)
+        self._backfill_daily()
+        self.total_rows = self.db.fetchall_blocking('SELECT COALESCE(SUM(rows), 0) FROM arbitrage_daily')[0][0]
+
+    def _backfill_daily(self):
+        """Özet tablosu yoksa (eski veritabanı) tek seferlik doldur"""
+        if self.db.fetchall_blocking('SELECT 1 FROM arbitrage_daily LIMIT 1'):
+            return
+        self.db.submit(lambda conn: conn.execute('''
+            INSERT INTO arbitrage_daily (day, rows, profit_sum, profit_max)
+            SELECT substr(timestamp, 1, 10), COUNT(*), SUM(profit_percent), MAX(profit_percent)
+            FROM arbitrage_data GROUP BY substr(timestamp, 1, 10)
+        ''')).result()
+
+    # --- Yazma ---
+
+    def append(self, rows: List[Tuple]):
+        """Queue rows (in COLUMNS order) and their day aggregates as one transaction"""
+        if not rows:
+            return
+        aggregates = daily_aggregates(rows)
+
+        def write(conn):
+            conn.executemany(INSERT_SQL, rows)
+            conn.executemany(UPSERT_DAILY_SQL, aggregates)
+
+        self.db.submit(write)
+        self.total_rows += len(rows)
+
+    # --- Partition dosyaları ---
+
+    def partition_path(self, day: str) -> str:
+        suffix = '.npz' if np is not None else '.json.gz'
+        return os.path.join(self.archive_dir, f"arbitrage_data-{day}{suffix}")
+
+    def _find_partition(self, day: str) -> Optional[str]:
+        for suffix in ('.npz', '.json.gz'):
+            path = os.path.join(self.archive_dir, f"arbitrage_data-{day}{suffix}")
+            if os.path.exists(path):
+                return path
+        return None
+
+    def _write_partition(self, day: str, rows: List[Tuple]):
+        os.makedirs(self.archive_dir, exist_ok=True)
+        columns = {name: [row[i] for row in rows] for i, name in enumerate(COLUMNS)}
+        path = self.partition_path(day)
+        tmp = path + '.tmp'
+        if np is not None:
+            arrays = {
+                name: np.array(values, dtype=str if name in TEXT_COLUMNS else np.float64)
+                for name, values in columns.items()
+            }
+            with open(tmp, 'wb') as f:
+                np.savez_compressed(f, **arrays)
+        else:
+            with gzip.open(tmp, 'wt') as f:
+                json.dump(columns, f)
+        os.replace(tmp, path)
+
+    def read_partition(self, day: str) -> Dict[str, list]:
+        """Columns of an archived day ({} if the day is not archived)"""
+        path = self._find_partition(day)
+        if path is None:
+            return {}
+        if path.endswith('.npz'):
+            with np.load(path) as data:
+                return {name: data[name].tolist() for name in COLUMNS}
+        with gzip.open(path, 'rt') as f:
+            return json.load(f)
+
+    # --- Sorgu ---
+
+    async def archived_days(self) -> List[str]:
+        rows = await self.db.fetchall('SELECT day FROM arbitrage_daily WHERE archived = 1 ORDER BY day')
+        return [row[0] for row in rows]
+
+    async def query(self, start: str, end: str, symbol: str = None) -> List[Tuple]:
+        """Rows in COLUMNS order with start <= timestamp < end, hot and archived"""
+        sql = f"SELECT {', '.join(COLUMNS)} FROM arbitrage_data WHERE timestamp >= ? AND timestamp < ?"
+        params = [start, end]
+        if symbol:
+            sql += ' AND symbol = ?'
+            params.append(symbol)
+        rows = []
+        for day in await self.archived_days():
+            if not (start[:10] <= day <= end[:10]):
+                continue
+            columns = await asyncio.to_thread(self.read_partition, day)
+            for row in zip(*(columns.get(name, []) for name in COLUMNS)):
+                if start <= row[7] < end and (not symbol or row[0] == symbol):
+                    rows.append(row)
+        rows.extend(await self.db.fetchall(sql + ' ORDER BY timestamp', params))
+        return rows
+
+    # --- Roll ve retention ---
+
+    async def roll(self, now: datetime = None) -> int:
+        """Archive closed hot days and drop expired partitions; returns days archived"""
+        today = (now or datetime.now(timezone.utc)).date()
+        archive_before = (today - timedelta(days=self.hot_days)).isoformat()
+        expire_before = (today - timedelta(days=self.retention_days)).isoformat()
+
+        days = await self.db.fetchall(
+            'SELECT day FROM arbitrage_daily WHERE archived = 0 AND day < ? ORDER BY day', (archive_before,))
+        for (day,) in days:
+            start, end = day_bounds(day)
+            rows = await self.db.fetchall(
+                f"SELECT {', '.join(COLUMNS)} FROM arbitrage_data WHERE timestamp >= ? AND timestamp < ?",
+                (start, end))
+            await asyncio.to_thread(self._write_partition, day, rows)
+
+            def evict(conn, start=start, end=end, day=day):
+                conn.execute('DELETE FROM arbitrage_data WHERE timestamp >= ? AND timestamp < ?', (start, end))
+                conn.execute('UPDATE arbitrage_daily SET archived = 1 WHERE day = ?', (day,))
+
+            await self.db.transaction(evict)
+            logger.info(f"Archived {len(rows)} opportunity rows for {day}")
+
+        expired = await self.db.fetchall(
+            'SELECT day, rows FROM arbitrage_daily WHERE archived = 1 AND day < ?', (expire_before,))
+        for day, count in expired:
+            path = self._find_partition(day)
+            if path:
+                os.remove(path)
+            await self.db.execute('DELETE FROM arbitrage_daily WHERE day = ?', (day,))
+            self.total_rows -= count
+            logger.info(f"Dropped expired history partition {day}")
+        return len(days)
+
+    async def run(self):
+        while True:
+            try:
+                await self.roll()
+            except Exception as e:
+                logger.error(f"History roll error: {e}")
+            await asyncio.sleep(self.roll_interval)
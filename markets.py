@@ -0,0 +1,82 @@
+import sys
+import time
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+# Borsaya özel varlık kodları -> ortak kod (Kraken X/Z önekleri, Bitfinex UST vb.)
+ASSET_ALIASES = {
+    'XBT': 'BTC', 'XXBT': 'BTC', 'XETH': 'ETH', 'XXDG': 'DOGE', 'XDG': 'DOGE',
+    'XXRP': 'XRP', 'XLTC': 'LTC', 'XXLM': 'XLM', 'XETC': 'ETC', 'XXMR': 'XMR', 'XZEC': 'ZEC',
+    'ZUSD': 'USD', 'ZEUR': 'EUR', 'ZGBP': 'GBP', 'ZJPY': 'JPY', 'ZCAD': 'CAD',
+    'UST': 'USDT', 'UDC': 'USDC',
+}
+
+# Ayraçsız semboller için bilinen quote'lar; uzun olan önce denenir (USDT, USD'den önce)
+QUOTE_ASSETS = tuple(sorted(
+    {'USDT', 'USDC', 'BUSD', 'FDUSD', 'TUSD', 'DAI', 'USD', 'EUR', 'GBP', 'TRY', 'BTC', 'ETH', 'BNB',
+     'UST', 'UDC', 'ZUSD', 'ZEUR', 'XXBT', 'XBT'},
+    key=len, reverse=True,
+))
+
+SEPARATORS = ('-', '_', '/', ':')
+
+
+def canonical_asset(asset: str) -> str:
+    asset = asset.upper()
+    return ASSET_ALIASES.get(asset, asset)
+
+
+def canonical_symbol(base: str, quote: str) -> str:
+    """Interned BASEQUOTE string used as the cross-exchange key (BTC, USDT -> BTCUSDT)"""
+    return sys.intern(canonical_asset(base) + canonical_asset(quote))
+
+
+def split_symbol(symbol: str, quotes: Tuple[str, ...] = QUOTE_ASSETS) -> Optional[Tuple[str, str]]:
+    """(base, quote) from a raw or normalized symbol: by separator, else by known quote suffix"""
+    for separator in SEPARATORS:
+        if separator in symbol:
+            base, _, quote = symbol.partition(separator)
+            return (base, quote) if base and quote else None
+    upper = symbol.upper()
+    for quote in quotes:
+        if upper.endswith(quote) and len(upper) > len(quote):
+            return symbol[:-len(quote)], symbol[-len(quote):]
+    return None
+
+
+class MarketIndex:
+    """Raw exchange symbol -> canonical symbol table for one exchange.
+
+    Loaded from the exchange's instrument list when the connector has one,
+    so base/quote come from the venue instead of string guessing. Symbols
+    not in the list are resolved once with `resolve` and cached, so
+    per-row normalization is a single dict lookup either way.
+    """
+
+    def __init__(self, resolve: Callable[[str], str]):
+        self.resolve = resolve
+        self.table: Dict[str, str] = {}
+        self.raw: Dict[str, str] = {}  # canonical -> raw (order book gibi sembol bazlı istekler için)
+        self.loaded_at = 0.0
+        self.instruments = 0
+
+    def lookup(self, raw: str) -> str:
+        canonical = self.table.get(raw)
+        if canonical is None:
+            canonical = self.table[raw] = sys.intern(self.resolve(raw))
+            self.raw.setdefault(canonical, raw)
+        return canonical
+
+    def raw_symbol(self, canonical: str) -> Optional[str]:
+        """Exchange-native symbol for a canonical one seen in the list or in tickers"""
+        return self.raw.get(canonical)
+
+    def load(self, instruments: Iterable[Tuple[str, str, str]]):
+        """Replace the table from (raw symbol, base, quote) triples"""
+        table = {raw: canonical_symbol(base, quote) for raw, base, quote in instruments}
+        self.table = table
+        self.raw = {canonical: raw for raw, canonical in table.items()}
+        self.instruments = len(table)
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.table)
@@ -0,0 +1,251 @@
+import bisect
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+# Saniye cinsinden varsayılan histogram sınırları (1 ms - 30 s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (1e3, 1e4, 1e5, 5e5, 1e6, 2.5e6, 5e6, 1e7, 2.5e7)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = '') -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        # Writer thread'i (veritabanı) de güncellediği için kilitli
+        self._lock = threading.Lock()
+        REGISTRY.register(self)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def get(self, *labels: str) -> float:
+        return self.values.get(labels, 0)
+
+    def total(self) -> float:
+        return sum(self.values.values())
+
+    def render(self):
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Gauge(Metric):
+    """Set directly, or computed at scrape time from `function`"""
+
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), function: Callable[[], float] = None):
+        super().__init__(name, documentation, labels)
+        self.values: Dict[LabelValues, float] = {}
+        self.function = function
+
+    def set(self, value: float, *labels: str):
+        self.values[labels] = value
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+    def get(self, *labels: str) -> float:
+        if self.function is not None:
+            return self.function()
+        return self.values.get(labels, 0)
+
+    def render(self):
+        if self.function is not None:
+            return self.header() + [f"{self.name} {self.function()}"]
+        return self.header() + [
+            f"{self.name}{_format_labels(self.label_names, labels)} {value}"
+            for labels, value in sorted(self.values.items())
+        ]
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket sayaçları..., +Inf], toplam, adet
+        self.series: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *labels: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def time(self, *labels: str) -> 'Timer':
+        return Timer(self, labels)
+
+    def _merged(self, labels: Optional[LabelValues]) -> Optional[list]:
+        if labels is not None:
+            return self.series.get(labels)
+        if not self.series:
+            return None
+        counts = [sum(column) for column in zip(*(s[0] for s in self.series.values()))]
+        return [counts, sum(s[1] for s in self.series.values()), sum(s[2] for s in self.series.values())]
+
+    def count(self, *labels: str) -> int:
+        series = self._merged(labels or None)
+        return series[2] if series else 0
+
+    def quantile(self, q: float, *labels: str) -> float:
+        """Bucket-interpolated quantile; all label sets merged when none given"""
+        series = self._merged(labels or None)
+        if not series or not series[2]:
+            return 0.0
+        counts, _, total = series
+        rank = q * total
+        cumulative = 0
+        for i, count in enumerate(counts):
+            if cumulative + count >= rank and count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+    def render(self):
+        lines = self.header()
+        for labels, (counts, total, count) in sorted(self.series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = '+Inf' if bound == float('inf') else f"{bound:g}"
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Timer:
+    """with HISTOGRAM.time('label'): ..."""
+
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram: Histogram, labels: LabelValues):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric):
+        self.metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+# --- Pipeline metrikleri ---
+
+FETCH_SECONDS = Histogram('arbitrage_fetch_seconds', 'Exchange REST fetch latency', ['exchange'])
+FETCH_ERRORS = Counter('arbitrage_fetch_errors_total', 'Failed exchange fetches', ['exchange'])
+API_REQUESTS = Counter('arbitrage_api_requests_total', 'Upstream REST requests sent', ['exchange'])
+PAYLOAD_BYTES = Histogram('arbitrage_payload_bytes', 'Ticker response size', ['exchange'], buckets=SIZE_BUCKETS)
+PARSE_SECONDS = Histogram('arbitrage_parse_seconds', 'Decode + parse time per response', ['exchange'])
+SYMBOLS_ACCEPTED = Counter('arbitrage_symbols_accepted_total', 'Ticker rows kept after filters', ['exchange'])
+SYMBOLS_FILTERED = Counter('arbitrage_symbols_filtered_total', 'Ticker rows dropped by filters', ['exchange'])
+CALCULATE_SECONDS = Histogram('arbitrage_calculate_seconds', 'Full calculate_arbitrage duration', ['backend'])
+PUBLISH_SECONDS = Histogram('arbitrage_snapshot_publish_seconds', 'Snapshot build and publish duration')
+DB_WRITE_SECONDS = Histogram('arbitrage_db_write_seconds', 'Writer thread transaction duration')
+DB_WRITE_JOBS = Counter('arbitrage_db_write_jobs_total', 'Writes committed by the writer thread')
+DEPTH_REQUESTS = Counter('arbitrage_depth_requests_total', 'Order book requests for shortlisted routes', ['exchange'])
+RENDER_REQUESTS = Counter('arbitrage_render_requests_total', 'Message renders by cache result', ['result'])
+SCAN_REQUESTS = Counter('arbitrage_scan_requests_total', 'User scan requests by outcome', ['outcome'])
+SCAN_WAIT_SECONDS = Histogram('arbitrage_scan_wait_seconds', 'Time scans spent in the fairness queue')
+ALERT_MATCH_SECONDS = Histogram('arbitrage_alert_match_seconds', 'Subscription matching time per snapshot')
+ALERTS_SENT = Counter('arbitrage_alerts_total', 'Alert messages by delivery outcome', ['outcome'])
+OUTBOUND_REQUESTS = Counter('arbitrage_outbound_requests_total', 'Queued Bot API requests by outcome', ['outcome'])
+OUTBOUND_WAIT_SECONDS = Histogram('arbitrage_outbound_wait_seconds', 'Time Bot API requests spent queued', ['priority'])
+OUTBOUND_QUEUED = Gauge('arbitrage_outbound_queued', 'Bot API requests waiting in the outbound queue')
+WEBHOOK_UPDATES = Counter('arbitrage_webhook_updates_total', 'Webhook deliveries by outcome', ['outcome'])
+WEBHOOK_QUEUED = Gauge('arbitrage_webhook_queued', 'Updates waiting for a webhook worker')
+HANDLER_SECONDS = Histogram('arbitrage_handler_seconds', 'Telegram handler latency', ['command'])
+HANDLERS_IN_FLIGHT = Gauge('arbitrage_handlers_in_flight', 'Telegram handlers currently running')
+
+
+def instrument(command: str, handler):
+    """Wrap a python-telegram-bot callback with latency and in-flight tracking"""
+    async def wrapper(update, context):
+        HANDLERS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            return await handler(update, context)
+        finally:
+            HANDLER_SECONDS.observe(time.perf_counter() - start, command)
+            HANDLERS_IN_FLIGHT.dec()
+    wrapper.__name__ = getattr(handler, '__name__', command)
+    return wrapper
+
+
+async def start_metrics_server(host: str, port: int, registry: Registry = REGISTRY) -> web.AppRunner:
+    """Serve GET /metrics in Prometheus text format"""
+    async def handle(request):
+        return web.Response(text=registry.render(), content_type='text/plain', charset='utf-8')
+
+    app = web.Application()
+    app.router.add_get('/metrics', handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"Metrics endpoint on http://{host}:{port}/metrics")
+    return runner
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Coroutine, Deque, Dict, List, Optional, Set, Tuple, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from access import TokenBucket
+from metrics import OUTBOUND_QUEUED, OUTBOUND_REQUESTS, OUTBOUND_WAIT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Öncelikler: küçük olan önce gider
+ADMIN = 0
+PREMIUM = 1
+USER = 2
+BULK = 3  # Alarmlar ve toplu gönderimler
+PRIORITIES = (ADMIN, PREMIUM, USER, BULK)
+PRIORITY_NAMES = ('admin', 'premium', 'user', 'bulk')
+
+# Aynı mesaja sırada bekleyen eski düzenlemenin yerine yenisi geçer
+MERGEABLE = frozenset({'editMessageText', 'editMessageReplyMarkup', 'editMessageCaption'})
+
+Result = Union[bool, Dict[str, Any], List[Dict[str, Any]]]
+
+
+class _Job:
+    __slots__ = ('chat_id', 'priority', 'endpoint', 'merge_key', 'callback', 'args', 'kwargs',
+                 'waiters', 'attempts', 'enqueued_at')
+
+    def __init__(self, chat_id, priority: int, endpoint: str, merge_key, callback, args, kwargs):
+        self.chat_id = chat_id
+        self.priority = priority
+        self.endpoint = endpoint
+        self.merge_key = merge_key
+        self.callback = callback
+        self.args = args
+        self.kwargs = kwargs
+        # Birleşen düzenlemelerin çağıranları da aynı sonucu bekler
+        self.waiters: List[asyncio.Future] = []
+        self.attempts = 0
+        self.enqueued_at = time.monotonic()
+
+
+class OutboundScheduler(BaseRateLimiter):
+    """Rate limiter for every Bot API call made through the application's bot.
+
+    Requests addressed to a chat are queued and sent by one worker, at most
+    `global_rate` per second overall and one per `chat_interval` per chat.
+    Queues are strictly ordered by priority (admin, premium, user, bulk);
+    within a priority chats are served round-robin. An edit of a message
+    that is still queued replaces the queued edit in place and all callers
+    get the result of the newest one. A RetryAfter pauses all sends for
+    the requested time and requeues the request at the front, up to
+    `max_retries` times. Requests without a chat_id (answerCallbackQuery,
+    getMe, ...) are sent immediately, but still wait out a flood pause.
+
+    The priority comes from `rate_limit_args={'priority': ...}` if given,
+    else from `priority_of(chat_id)`.
+    """
+
+    def __init__(self, global_rate: float = 30, chat_interval: float = 1.0, max_retries: int = 3,
+                 priority_of: Callable[[Any], int] = None):
+        # Burst yok: Telegram kayan pencereyle sayar, dolu kova + yenileme 1 s içinde 2x gönderir
+        self.bucket = TokenBucket(global_rate, 1)
+        self.chat_interval = chat_interval
+        self.max_retries = max_retries
+        self.priority_of = priority_of or (lambda chat_id: USER)
+        # öncelik -> chat -> bekleyen istekler
+        self.queues: List['OrderedDict[Any, Deque[_Job]]'] = [OrderedDict() for _ in PRIORITIES]
+        self.edits: Dict[Tuple, _Job] = {}
+        self.busy: Set[Any] = set()  # Cevabı beklenen isteği olan sohbetler
+        self.last_sent: Dict[Any, float] = {}
+        self.pending = 0
+        self.paused_until = 0.0
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def initialize(self) -> None:
+        self._wake = asyncio.Event()
+        self._worker = asyncio.create_task(self._run())
+
+    async def shutdown(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        # Kapanırken bekleyenler takılı kalmasın
+        for queue in self.queues:
+            for jobs in queue.values():
+                for job in jobs:
+                    self._finish(job, error=asyncio.CancelledError())
+            queue.clear()
+        self.edits.clear()
+        self.pending = 0
+        OUTBOUND_QUEUED.set(0)
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Result]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Dict[str, Any]],
+    ) -> Result:
+        chat_id = data.get('chat_id')
+        if chat_id is None or self._worker is None:
+            return await self._direct(callback, args, kwargs)
+        priority = (rate_limit_args or {}).get('priority')
+        if priority is None:
+            priority = self.priority_of(chat_id)
+        waiter = asyncio.get_running_loop().create_future()
+        merge_key = (endpoint, chat_id, data.get('message_id')) if endpoint in MERGEABLE else None
+        job = self.edits.get(merge_key) if merge_key is not None else None
+        if job is not None:
+            # Sıradaki eski düzenleme artık gereksiz: yerini ve sırasını yenisi alır
+            job.callback, job.args, job.kwargs = callback, args, kwargs
+            job.waiters.append(waiter)
+            OUTBOUND_REQUESTS.inc('merged')
+        else:
+            job = _Job(chat_id, priority, endpoint, merge_key, callback, args, kwargs)
+            job.waiters.append(waiter)
+            self._enqueue(job)
+        return await waiter
+
+    async def _direct(self, callback, args, kwargs) -> Result:
+        for attempt in range(self.max_retries + 1):
+            await asyncio.sleep(max(0.0, self.paused_until - time.monotonic()))
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                self._pause(e.retry_after)
+                if attempt == self.max_retries:
+                    raise
+
+    def _enqueue(self, job: _Job, front: bool = False):
+        queue = self.queues[job.priority]
+        jobs = queue.get(job.chat_id)
+        if jobs is None:
+            jobs = queue[job.chat_id] = deque()
+        if front:
+            jobs.appendleft(job)
+            queue.move_to_end(job.chat_id, last=False)
+        else:
+            jobs.append(job)
+        if job.merge_key is not None:
+            self.edits[job.merge_key] = job
+        self.pending += 1
+        OUTBOUND_QUEUED.set(self.pending)
+        self._wake.set()
+
+    def _pause(self, retry_after: float):
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        logger.warning(f"Telegram flood control: pausing sends for {retry_after}s")
+
+    def _next_ready(self, now: float) -> Tuple[Optional[Tuple[int, Any]], float]:
+        """(priority, chat) of the first request whose chat is free, else the shortest wait"""
+        wait = self.chat_interval
+        for priority, queue in enumerate(self.queues):
+            for chat_id in queue:
+                if chat_id in self.busy:
+                    continue
+                ready_at = self.last_sent.get(chat_id, 0.0) + self.chat_interval
+                if ready_at <= now:
+                    return (priority, chat_id), 0.0
+                wait = min(wait, ready_at - now)
+        return None, wait
+
+    def _pop(self, priority: int, chat_id) -> _Job:
+        queue = self.queues[priority]
+        jobs = queue[chat_id]
+        job = jobs.popleft()
+        if jobs:
+            # Round-robin: bu sohbetin kalanı sıranın sonuna
+            queue.move_to_end(chat_id)
+        else:
+            del queue[chat_id]
+        self.pending -= 1
+        OUTBOUND_QUEUED.set(self.pending)
+        if job.merge_key is not None and self.edits.get(job.merge_key) is job:
+            del self.edits[job.merge_key]
+        return job
+
+    async def _run(self):
+        while True:
+            if not self.pending:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            ready, wait = self._next_ready(now)
+            if ready is None:
+                # Daha önce hazır olacak yeni bir istek gelirse uyan
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            wait = self.bucket.take()
+            if wait:
+                await asyncio.sleep(wait)
+                continue
+            job = self._pop(*ready)
+            self.busy.add(job.chat_id)
+            self.last_sent[job.chat_id] = now
+            OUTBOUND_WAIT_SECONDS.observe(now - job.enqueued_at, PRIORITY_NAMES[job.priority])
+            asyncio.create_task(self._send(job))
+            self._prune(now)
+
+    async def _send(self, job: _Job):
+        try:
+            result = await job.callback(*job.args, **job.kwargs)
+        except RetryAfter as e:
+            self._pause(e.retry_after)
+            job.attempts += 1
+            if job.attempts <= self.max_retries:
+                OUTBOUND_REQUESTS.inc('retry')
+                self._requeue(job)
+            else:
+                OUTBOUND_REQUESTS.inc('failed')
+                self._finish(job, error=e)
+        except Exception as e:
+            OUTBOUND_REQUESTS.inc('failed')
+            self._finish(job, error=e)
+        else:
+            OUTBOUND_REQUESTS.inc('sent')
+            self._finish(job, result=result)
+        finally:
+            # Aralık cevaptan itibaren: ağ gecikmesi farkı iki mesajı sunucuda yaklaştırmasın
+            self.last_sent[job.chat_id] = time.monotonic()
+            self.busy.discard(job.chat_id)
+            self._wake.set()
+
+    def _requeue(self, job: _Job):
+        newer = self.edits.get(job.merge_key) if job.merge_key is not None else None
+        if newer is not None:
+            # Gönderim sırasında daha yeni bir düzenleme geldi; eskisini tekrar göndermeye gerek yok
+            newer.waiters.extend(job.waiters)
+            OUTBOUND_REQUESTS.inc('merged')
+            return
+        self._enqueue(job, front=True)
+
+    @staticmethod
+    def _finish(job: _Job, result: Result = None, error: BaseException = None):
+        for waiter in job.waiters:
+            if waiter.done():
+                continue  # Çağıran vazgeçti (handler iptal edildi)
+            if isinstance(error, asyncio.CancelledError):
+                waiter.cancel()
+            elif error is not None:
+                waiter.set_exception(error)
+            else:
+                waiter.set_result(result)
+
+    def _prune(self, now: float):
+        if len(self.last_sent) > 10000:
+            cutoff = now - self.chat_interval
+            self.last_sent = {chat: at for chat, at in self.last_sent.items() if at > cutoff}
@@ -0,0 +1,296 @@
+import sys
+import time
+import logging
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+# Her hücrede tutulan sayısal alanlar; bid/ask ve boyutları borsa vermezse 0.0 (yok)
+FIELDS = ('price', 'volume', 'bid', 'ask', 'bid_size', 'ask_size')
+BOOK_FIELDS = FIELDS[2:]
+_KNOWN = frozenset(FIELDS)
+
+
+class Quote(Mapping):
+    """One cell copied out of the book; reads like the old {'price', 'volume', ...} dict.
+
+    Top-of-book fields the exchange did not provide are absent from the mapping.
+    """
+
+    __slots__ = FIELDS + ('updated_at', 'extra')
+
+    def __init__(self, price: float, volume: float, bid: float = 0.0, ask: float = 0.0,
+                 bid_size: float = 0.0, ask_size: float = 0.0, updated_at: float = 0.0,
+                 extra: Optional[Dict] = None):
+        self.price = price
+        self.volume = volume
+        self.bid = bid
+        self.ask = ask
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+        self.updated_at = updated_at
+        self.extra = extra
+
+    def get(self, key, default=None):
+        if key in _KNOWN:
+            value = getattr(self, key)
+            return value if value or key not in BOOK_FIELDS else default
+        if self.extra is not None:
+            return self.extra.get(key, default)
+        return default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        yield 'price'
+        yield 'volume'
+        for key in BOOK_FIELDS:
+            if getattr(self, key):
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"Quote({dict(self)!r})"
+
+
+def top_of_book(bid, ask, bid_size=None, ask_size=None) -> Dict[str, float]:
+    """bid/ask (and sizes, base asset) as quote fields; empty unless 0 < bid <= ask"""
+    bid = float(bid) if bid else 0.0
+    ask = float(ask) if ask else 0.0
+    if not 0 < bid <= ask:
+        return {}
+    fields = {'bid': bid, 'ask': ask}
+    if bid_size and ask_size:
+        fields['bid_size'] = float(bid_size)
+        fields['ask_size'] = float(ask_size)
+    return fields
+
+
+# Listener imzası: (exchange, symbol, quote) - quote None ise sembol kaldırıldı
+PriceListener = Callable[[str, str, Optional[Quote]], None]
+
+
+class PriceBook:
+    """In-memory exchange -> symbol -> quote book, updated incrementally by feeds.
+
+    Cells live in contiguous float arrays (one per field in FIELDS plus last
+    seen) indexed by a slot number; each exchange keeps a symbol -> slot dict with
+    interned keys. Updates write in place and only allocate when a cell
+    actually changes (the Quote handed to listeners). Removed slots are
+    reused.
+    """
+
+    def __init__(self):
+        self._cells: Dict[str, Dict[str, int]] = {}  # exchange -> symbol -> slot
+        self.columns: Dict[str, array] = {field: array('d') for field in FIELDS}
+        self.prices = self.columns['price']
+        self.volumes = self.columns['volume']
+        self.bids = self.columns['bid']
+        self.asks = self.columns['ask']
+        self.bid_sizes = self.columns['bid_size']
+        self.ask_sizes = self.columns['ask_size']
+        self.seen_at = array('d')  # Hücre en son ne zaman geldi (değişmese de)
+        self._extra: Dict[int, Dict] = {}  # Nadiren kullanılan ek alanlar (örn. Binance count)
+        self._free: List[int] = []
+        self._updated_at: Dict[str, float] = {}
+        self._listeners: List[PriceListener] = []
+        self.version = 0
+
+    def subscribe(self, listener: PriceListener):
+        """Register a callback fired for every changed (exchange, symbol) cell"""
+        self._listeners.append(listener)
+
+    def _notify(self, exchange: str, symbol: str, quote: Optional[Quote]):
+        for listener in self._listeners:
+            try:
+                listener(exchange, symbol, quote)
+            except Exception as e:
+                logger.error(f"Price book listener error: {e}")
+
+    def _exchange_cells(self, exchange: str) -> Dict[str, int]:
+        cells = self._cells.get(exchange)
+        if cells is None:
+            cells = self._cells[sys.intern(exchange)] = {}
+        return cells
+
+    def _allocate(self) -> int:
+        if self._free:
+            return self._free.pop()
+        for column in self.columns.values():
+            column.append(0.0)
+        self.seen_at.append(0.0)
+        return len(self.seen_at) - 1
+
+    def _set(self, cells: Dict[str, int], exchange: str, symbol: str, price: float, volume: float,
+             bid: float, ask: float, bid_size: float, ask_size: float, extra: Optional[Dict], now: float) -> bool:
+        slot = cells.get(symbol)
+        if slot is None:
+            slot = cells[sys.intern(symbol)] = self._allocate()
+        elif (self.prices[slot] == price and self.asks[slot] == ask and self.bids[slot] == bid
+              and self.volumes[slot] == volume and self.bid_sizes[slot] == bid_size
+              and self.ask_sizes[slot] == ask_size and self._extra.get(slot) == extra):
+            self.seen_at[slot] = now
+            return False
+        self.prices[slot] = price
+        self.volumes[slot] = volume
+        self.bids[slot] = bid
+        self.asks[slot] = ask
+        self.bid_sizes[slot] = bid_size
+        self.ask_sizes[slot] = ask_size
+        self.seen_at[slot] = now
+        if extra:
+            self._extra[slot] = extra
+        else:
+            self._extra.pop(slot, None)
+        self.version += 1
+        if self._listeners:
+            self._notify(exchange, symbol, Quote(price, volume, bid, ask, bid_size, ask_size, now, extra))
+        return True
+
+    def update(self, exchange: str, symbol: str, price: float, volume: float, bid: float = 0.0,
+               ask: float = 0.0, bid_size: float = 0.0, ask_size: float = 0.0, **extra) -> bool:
+        """Apply a single ticker update, returns True if the cell changed.
+
+        Top-of-book fields left out are cleared, so a last-price-only tick
+        never leaves an older bid/ask behind.
+        """
+        now = time.time()
+        self._updated_at[exchange] = now
+        return self._set(self._exchange_cells(exchange), exchange, symbol, price, volume,
+                         bid, ask, bid_size, ask_size, extra or None, now)
+
+    def remove(self, exchange: str, symbol: str):
+        """Drop a symbol from an exchange (delisted or under the volume filter)"""
+        cells = self._cells.get(exchange)
+        slot = cells.pop(symbol, None) if cells else None
+        if slot is None:
+            return
+        self._extra.pop(slot, None)
+        self._free.append(slot)
+        self.version += 1
+        self._notify(exchange, symbol, None)
+
+    def load_snapshot(self, exchange: str, quotes: Dict[str, Dict]) -> int:
+        """Replace an exchange's book with a full REST snapshot (cold start / resync).
+
+        Returns the number of cells that changed.
+        """
+        if not quotes:
+            # Boş snapshot genelde hata demek, eldeki veriyi silme
+            return 0
+        cells = self._exchange_cells(exchange)
+        stale = [s for s in cells if s not in quotes]
+        for symbol in stale:
+            self.remove(exchange, symbol)
+        changed = len(stale)
+        now = time.time()
+        for symbol, quote in quotes.items():
+            get = quote.get
+            extra_keys = quote.keys() - _KNOWN
+            extra = {key: quote[key] for key in extra_keys} if extra_keys else None
+            changed += self._set(cells, exchange, symbol, quote['price'], get('volume', 0.0),
+                                 get('bid', 0.0), get('ask', 0.0), get('bid_size', 0.0), get('ask_size', 0.0),
+                                 extra, now)
+        self._updated_at[exchange] = now
+        return changed
+
+    def get(self, exchange: str, symbol: str) -> Optional[Quote]:
+        slot = self._cells.get(exchange, {}).get(symbol)
+        if slot is None:
+            return None
+        return Quote(*(column[slot] for column in self.columns.values()), self.seen_at[slot], self._extra.get(slot))
+
+    def age(self, exchange: str, symbol: str) -> Optional[float]:
+        """Seconds since the cell was last delivered, None if not listed"""
+        slot = self._cells.get(exchange, {}).get(symbol)
+        return None if slot is None else time.time() - self.seen_at[slot]
+
+    def stale(self, exchange: str, max_age: float) -> List[str]:
+        """Symbols of an exchange not delivered within max_age seconds"""
+        cutoff = time.time() - max_age
+        seen_at = self.seen_at
+        return [symbol for symbol, slot in self._cells.get(exchange, {}).items() if seen_at[slot] < cutoff]
+
+    def symbols(self, exchange: str) -> List[str]:
+        return list(self._cells.get(exchange, {}))
+
+    def last_update(self, exchange: str) -> float:
+        return self._updated_at.get(exchange, 0)
+
+    def snapshot(self) -> 'BookSnapshot':
+        """Frozen copy for readers, in the same exchange -> symbol -> quote layout as the REST cache"""
+        # array dilimleme tek memcpy; slot dict'leri C seviyesinde kopyalanır
+        return BookSnapshot(
+            {ex: dict(cells) for ex, cells in self._cells.items()},
+            {field: column[:] for field, column in self.columns.items()},
+            self.seen_at[:], dict(self._extra),
+        )
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held by cell storage (arrays + slot dicts)"""
+        arrays = sum(a.buffer_info()[1] * a.itemsize for a in (*self.columns.values(), self.seen_at))
+        return arrays + sum(sys.getsizeof(cells) for cells in self._cells.values())
+
+    def __len__(self):
+        return sum(len(cells) for cells in self._cells.values())
+
+
+class BookSnapshot(Mapping):
+    """Immutable exchange -> ExchangeView mapping over copied arrays"""
+
+    def __init__(self, cells: Dict[str, Dict[str, int]], columns: Dict[str, array],
+                 seen_at: array, extra: Dict[int, Dict]):
+        self.cells = cells
+        self.columns = columns
+        self.seen_at = seen_at
+        self.extra = extra
+        self.created_at = time.time()
+
+    def __getitem__(self, exchange: str) -> 'ExchangeView':
+        return ExchangeView(self, self.cells[exchange])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.cells)
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class ExchangeView(Mapping):
+    """symbol -> Quote for one exchange of a BookSnapshot; Quotes are built on access"""
+
+    __slots__ = ('owner', 'slots')
+
+    def __init__(self, owner: BookSnapshot, slots: Dict[str, int]):
+        self.owner = owner
+        self.slots = slots
+
+    def __getitem__(self, symbol: str) -> Quote:
+        slot = self.slots[symbol]
+        owner = self.owner
+        return Quote(*(column[slot] for column in owner.columns.values()),
+                     owner.seen_at[slot], owner.extra.get(slot))
+
+    def __contains__(self, symbol) -> bool:
+        return symbol in self.slots
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.slots)
+
+    def __len__(self):
+        return len(self.slots)
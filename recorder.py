@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+from arbitrage_engine import OpportunitySnapshot
+from history import HistoryStore
+
+logger = logging.getLogger(__name__)
+
+
+class OpportunityRecorder:
+    """Records opportunity history from published snapshots, not from user clicks.
+
+    Each distinct (symbol, buy, sell) route is written at most once per
+    snapshot, and again only when its profit moves by `min_change` points or
+    `heartbeat` seconds have passed. When a route drops out of the top
+    routes (or on close()), its last sighting is written as a closing row if
+    it was not recorded then, so episodes end where the spread was last
+    seen rather than at its last change or heartbeat. Rows are buffered and
+    flushed with one batch into the HistoryStore on size or time thresholds.
+    """
+
+    def __init__(self, store: HistoryStore, top_n: int = 50, flush_size: int = 500,
+                 flush_interval: float = 10, min_change: float = 0.05, heartbeat: float = 300):
+        self.store = store
+        self.top_n = top_n
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.min_change = min_change
+        self.heartbeat = heartbeat
+        self.buffer: List[Tuple] = []
+        self.last_flush = time.time()
+        self.last_version = None
+        # route -> (son kaydedilen kâr, kayıt zamanı)
+        self.last_recorded: Dict[Tuple[str, str, str], Tuple[float, float]] = {}
+        # route -> (son görüldüğü fırsat, zaman damgası, zaman) - kapanış satırı için
+        self.last_seen: Dict[Tuple[str, str, str], Tuple[Mapping, str, float]] = {}
+        self.rows_written = 0
+
+    def _should_record(self, route: Tuple[str, str, str], profit: float, now: float) -> bool:
+        last = self.last_recorded.get(route)
+        if last is None:
+            return True
+        last_profit, recorded_at = last
+        return abs(profit - last_profit) >= self.min_change or now - recorded_at >= self.heartbeat
+
+    def record(self, snapshots: Iterable[OpportunitySnapshot]):
+        """Buffer the top routes of one snapshot set (e.g. premium + admin views)"""
+        snapshots = list(snapshots)
+        version = snapshots[0].version if snapshots else None
+        if version is None or version == self.last_version:
+            return
+        self.last_version = version
+
+        now = time.time()
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(now))
+        seen = set()
+        for snapshot in snapshots:
+            for opp in snapshot.opportunities[:self.top_n]:
+                route = (opp['symbol'], opp['buy_exchange'], opp['sell_exchange'])
+                if route in seen:
+                    continue
+                seen.add(route)
+                self.last_seen[route] = (opp, timestamp, now)
+                if not self._should_record(route, opp['profit_percent'], now):
+                    continue
+                self.last_recorded[route] = (opp['profit_percent'], now)
+                self.buffer.append(self._row(opp, timestamp))
+
+        # Artık listelenmeyen rotaları kapat ve unut: geri geldiğinde yeniden kaydedilsin
+        for route in [route for route in self.last_recorded if route not in seen]:
+            self._close_route(route)
+
+        if len(self.buffer) >= self.flush_size:
+            self.flush()
+
+    def _close_route(self, route: Tuple[str, str, str]):
+        _, recorded_at = self.last_recorded.pop(route)
+        opp, timestamp, seen_at = self.last_seen.pop(route)
+        if seen_at > recorded_at:
+            # Son görülme anı: spread en az buraya kadar sürdü
+            self.buffer.append(self._row(opp, timestamp))
+
+    def close(self):
+        """Write closing rows for every route still listed, then flush"""
+        for route in list(self.last_recorded):
+            self._close_route(route)
+        self.flush()
+
+    @staticmethod
+    def _row(opp: Mapping, timestamp: str) -> Tuple:
+        """history.COLUMNS sırasında satır"""
+        return (
+            opp['symbol'],
+            opp['buy_exchange'],
+            opp['sell_exchange'],
+            opp['buy_price'],
+            opp['sell_price'],
+            opp['profit_percent'],
+            opp['avg_volume'],
+            timestamp,
+        )
+
+    def flush(self):
+        """Hand buffered rows to the writer thread as a single transaction"""
+        self.last_flush = time.time()
+        if not self.buffer:
+            return
+        rows, self.buffer = self.buffer, []
+        self.store.append(rows)
+        self.rows_written += len(rows)
+        logger.debug(f"Recorded {len(rows)} opportunity rows")
+
+    async def run(self):
+        """Time-based flushing"""
+        while True:
+            await asyncio.sleep(max(0.5, self.flush_interval - (time.time() - self.last_flush)))
+            if time.time() - self.last_flush >= self.flush_interval:
+                self.flush()
@@ -0,0 +1,51 @@
+import logging
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from arbitrage_engine import OpportunitySnapshot
+from metrics import RENDER_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+# (snapshot version, view, mesaj türü, sayfa)
+RenderKey = Tuple[int, str, str, int]
+
+
+class Rendered(NamedTuple):
+    """Message text plus its inline keyboard, ready to send or edit"""
+
+    text: str
+    reply_markup: Optional[Any] = None
+
+
+class RenderCache:
+    """Rendered messages per (snapshot version, view, kind, page).
+
+    Every free user (and every premium user) sees the same text for the same
+    snapshot, so each page is built once and later requests are a dict
+    lookup. Only the newest `versions` snapshot versions are kept.
+    """
+
+    def __init__(self, versions: int = 2):
+        self.versions = versions
+        self.latest = 0
+        self.entries: Dict[RenderKey, Rendered] = {}
+
+    def get(self, snapshot: OpportunitySnapshot, kind: str, page: int,
+            build: Callable[[], Rendered]) -> Rendered:
+        key = (snapshot.version, snapshot.view, kind, page)
+        rendered = self.entries.get(key)
+        if rendered is not None:
+            RENDER_REQUESTS.inc('hit')
+            return rendered
+        RENDER_REQUESTS.inc('miss')
+        rendered = build()
+        if snapshot.version > self.latest:
+            self.latest = snapshot.version
+            oldest = self.latest - self.versions
+            self.entries = {k: v for k, v in self.entries.items() if k[0] > oldest}
+        if snapshot.version > self.latest - self.versions:
+            self.entries[key] = rendered
+        return rendered
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from transport import ExchangeHTTPError
+
+logger = logging.getLogger(__name__)
+
+# Rate limit cevapları: 429 = yavaşla, 418 = IP ban (Binance)
+RATE_LIMIT_STATUSES = (429, 418)
+
+
+@dataclass
+class ExchangeSchedule:
+    """Refresh state of one exchange, exposed to the admin"""
+
+    exchange: str
+    min_interval: float
+    interval: float
+    next_run: float = 0.0
+    backoff: float = 0.0
+    failures: int = 0
+    running: bool = False
+    last_status: str = '-'
+    last_duration: float = 0.0
+    last_success: float = 0.0
+
+    @property
+    def in_backoff(self) -> bool:
+        return self.backoff > 0
+
+
+class RefreshScheduler:
+    """Per-exchange REST refresh loop with adaptive cadence and rate-limit backoff.
+
+    Every exchange runs on its own timer, so a slow or banned host never holds
+    up the others, and its data is published as soon as it arrives.
+    """
+
+    def __init__(self, intervals: Dict[str, float],
+                 fetch: Callable[[str], Awaitable[Dict]],
+                 publish: Callable[[str, Dict], int],
+                 skip: Callable[[str], bool] = None,
+                 max_interval: float = 120, max_backoff: float = 900, stagger: float = 0.5):
+        now = time.time()
+        self.schedules = {
+            exchange: ExchangeSchedule(exchange, interval, interval, next_run=now + i * stagger)
+            for i, (exchange, interval) in enumerate(intervals.items())
+        }
+        self.fetch = fetch
+        self.publish = publish
+        self.skip = skip
+        self.max_interval = max_interval
+        self.max_backoff = max_backoff
+        self.tasks = set()
+
+    def _adapt(self, state: ExchangeSchedule, changed: int, total: int):
+        """Oynak borsaları daha sık, sakin olanları daha seyrek çek"""
+        ratio = changed / total if total else 0
+        if ratio > 0.5:
+            state.interval = max(state.min_interval, state.interval * 0.8)
+        elif ratio < 0.1:
+            state.interval = min(self.max_interval, state.interval * 1.25)
+        # Yavaş host'u kendi süresinin iki katından sık çekme
+        state.interval = max(state.interval, state.last_duration * 2)
+
+    def _fail(self, state: ExchangeSchedule, retry_after: Optional[float] = None):
+        state.failures += 1
+        # Exponential backoff + jitter, Retry-After varsa ona uy
+        backoff = min(self.max_backoff, state.interval * (2 ** state.failures))
+        backoff *= random.uniform(0.8, 1.2)
+        state.backoff = max(backoff, retry_after or 0)
+        state.next_run = time.time() + state.backoff
+
+    async def _run_one(self, state: ExchangeSchedule):
+        state.running = True
+        start = time.time()
+        try:
+            data = await self.fetch(state.exchange)
+            state.last_duration = time.time() - start
+            changed = self.publish(state.exchange, data)
+            state.failures = 0
+            state.backoff = 0
+            state.last_success = time.time()
+            state.last_status = 'ok'
+            self._adapt(state, changed, len(data))
+            state.next_run = time.time() + state.interval
+        except ExchangeHTTPError as e:
+            state.last_duration = time.time() - start
+            state.last_status = str(e.status)
+            if e.status in RATE_LIMIT_STATUSES:
+                logger.warning(f"{state.exchange} rate limited ({e.status}), retry after {e.retry_after}")
+                # Rate limit sonrası temel aralığı da genişlet
+                state.interval = min(self.max_interval, state.interval * 2)
+            self._fail(state, e.retry_after)
+        except Exception as e:
+            state.last_duration = time.time() - start
+            state.last_status = type(e).__name__
+            logger.error(f"{state.exchange} refresh error: {e}")
+            self._fail(state)
+        finally:
+            state.running = False
+
+    def _claim(self, state: ExchangeSchedule, now: float) -> bool:
+        """Mark a due exchange as running; skipped ones are pushed back an interval"""
+        if self.skip and self.skip(state.exchange):
+            state.next_run = now + state.interval
+            return False
+        state.running = True
+        return True
+
+    async def run_due(self) -> int:
+        """Refresh due exchanges once and wait for them; returns how many were fetched.
+
+        For on-demand reads: exchanges in backoff or not yet due keep their
+        schedule. Exchanges never fetched skip the startup stagger.
+        """
+        now = time.time()
+        states = [
+            state for state in self.schedules.values()
+            if not state.running
+            and (state.next_run <= now or not (state.last_success or state.in_backoff))
+            and self._claim(state, now)
+        ]
+        await asyncio.gather(*(self._run_one(state) for state in states))
+        return len(states)
+
+    async def run(self):
+        """Dispatch due exchanges forever"""
+        while True:
+            now = time.time()
+            for state in self.schedules.values():
+                if state.running or state.next_run > now or not self._claim(state, now):
+                    continue
+                task = asyncio.create_task(self._run_one(state))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            next_due = min((s.next_run for s in self.schedules.values() if not s.running), default=now + 1)
+            await asyncio.sleep(min(max(next_due - time.time(), 0.05), 1.0))
+
+    def status(self) -> List[ExchangeSchedule]:
+        return sorted(self.schedules.values(), key=lambda s: s.next_run)
@@ -0,0 +1,49 @@
+"""Parse one ticker payload per connector, laid out like the exchange's REST response."""
+import json
+import os
+
+import pytest
+
+from connectors import CONNECTORS, build_connectors
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'tickers')
+MIN_VOLUME = 100000
+
+# Taban hacim veren borsalarda hacim = taban hacim * fiyat
+BTC_VOLUME = {'quote': 118416000.25, 'base': 1850.25 * 64000.5}
+NO_BOOK = {'coinbase', 'lbank', 'probit'}  # Ticker cevabında bid/ask yok
+NO_SIZES = {'p2pb2b'}
+
+
+def load(name):
+    with open(os.path.join(FIXTURES, name + '.json')) as f:
+        return json.load(f)
+
+
+@pytest.fixture(scope='module')
+def connectors():
+    return build_connectors(MIN_VOLUME)
+
+
+@pytest.mark.parametrize('name', sorted(CONNECTORS))
+def test_parse_ticker_fixture(connectors, name):
+    connector = connectors[name]
+    quotes = connector.parse(load(name))
+
+    # Düşük hacimli LOW/USDT ve Bitfinex funding satırı elenir
+    assert sorted(quotes) == ['BTCUSDT', 'ETHUSDT']
+
+    btc, eth = quotes['BTCUSDT'], quotes['ETHUSDT']
+    assert btc['price'] == 64000.5
+    assert eth['price'] == 3100.25
+    assert btc['volume'] == pytest.approx(BTC_VOLUME[connector.volume_unit])
+    assert eth['volume'] == pytest.approx(124010000)
+
+    if name in NO_BOOK:
+        assert 'bid' not in btc and 'ask' not in btc
+        return
+    assert (btc['bid'], btc['ask']) == (64000.1, 64000.9)
+    assert (eth['bid'], eth['ask']) == (3100.2, 3100.3)
+    if name not in NO_SIZES:
+        assert (btc['bid_size'], btc['ask_size']) == (0.75, 1.2)
+        assert (eth['bid_size'], eth['ask_size']) == (12.5, 8.4)
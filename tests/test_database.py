@@ -0,0 +1,60 @@
+"""Writer-thread behaviour when SQLite ends a batch's transaction on its own."""
+import os
+import sqlite3
+import tempfile
+from concurrent.futures import Future
+
+import pytest
+
+from database import Database
+
+
+def aborting_job(conn):
+    # SQLITE_FULL/IOERR sonrası SQLite transaction'ı kendisi geri alır; ROLLBACK aynısını yapar
+    conn.execute("ROLLBACK")
+    raise sqlite3.OperationalError("database or disk is full")
+
+
+def ending_job(conn):
+    conn.execute("ROLLBACK")
+    return 1
+
+
+def insert(value):
+    return lambda conn: conn.execute("INSERT INTO t VALUES (?)", (value,)).rowcount
+
+
+@pytest.fixture
+def db():
+    db = Database(os.path.join(tempfile.mkdtemp(), 'test.db'))
+    db.init_schema(["CREATE TABLE t (v INTEGER)"])
+    yield db
+    db.close()
+
+
+def rows(db):
+    return [v for v, in db.fetchall_blocking("SELECT v FROM t ORDER BY v")]
+
+
+def test_aborted_transaction_fails_lost_jobs_and_commits_the_rest(db):
+    conn = db._connect()
+    batch = [(insert(1), Future()), (aborting_job, Future()), (insert(2), Future())]
+    Database._run_batch(conn, batch)
+    conn.close()
+
+    first, aborted, last = (future for _, future in batch)
+    # İlk iş geri alınan transaction'daydı, başarılı sayılmamalı
+    with pytest.raises(sqlite3.OperationalError):
+        first.result(0)
+    with pytest.raises(sqlite3.OperationalError):
+        aborted.result(0)
+    assert last.result(0) == 1
+    assert rows(db) == [2]
+
+
+@pytest.mark.parametrize('job', [aborting_job, ending_job])
+def test_writer_keeps_running_after_aborted_transaction(db, job):
+    with pytest.raises(sqlite3.Error):
+        db.submit(job).result(5)
+    assert db.write("INSERT INTO t VALUES (?)", (3,)).result(5) == 1
+    assert rows(db) == [3]
@@ -0,0 +1,88 @@
+"""Drive one exchange's circuit breaker through fetch_exchange against a local stub that injects errors and slow responses."""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'test.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from benchmarks.server import ExchangeStubServer  # noqa: E402
+from benchmarks.synthetic import SyntheticMarket  # noqa: E402
+from health import CLOSED, HALF_OPEN, OPEN, ExchangeHealth  # noqa: E402
+from transport import ExchangeHTTPError  # noqa: E402
+
+EXCHANGE = 'binance'
+SLOW = 0.2  # Bu süreden uzun cevap başarısız sayılır
+OPEN_TIMEOUT = 0.3
+
+
+async def fetch(arb) -> bool:
+    """One scheduler-style attempt: None if the breaker skipped it, else whether data came back"""
+    if not arb.health.allow(EXCHANGE):
+        return None
+    try:
+        return bool(await arb.fetch_exchange(EXCHANGE))
+    except ExchangeHTTPError:
+        return False
+
+
+async def scenario():
+    server = ExchangeStubServer(SyntheticMarket([EXCHANGE], symbols=50))
+    await server.start()
+    arb = bot_module.ArbitrageBot()
+    arb.connectors = server.point_connectors(arb.connectors)
+    arb.health = ExchangeHealth(arb.connectors, min_calls=4, slow_threshold=SLOW, open_timeout=OPEN_TIMEOUT)
+    breaker = arb.health.breakers[EXCHANGE]
+    try:
+        # closed -> open: hata oranı eşiği (4 çağrıdan 2'si 500)
+        assert [await fetch(arb), await fetch(arb)] == [True, True]
+        server.errors[EXCHANGE] = 500
+        assert await fetch(arb) is False
+        assert breaker.state == CLOSED
+        assert await fetch(arb) is False
+        assert breaker.state == OPEN
+        hits = server.hits[EXCHANGE]
+        assert await fetch(arb) is None
+        assert server.hits[EXCHANGE] == hits
+
+        # open -> half-open: tek deneme; yavaş cevap veri getirse de başarısız sayılır
+        del server.errors[EXCHANGE]
+        server.latency = SLOW * 1.5
+        await asyncio.sleep(OPEN_TIMEOUT)
+        probe = asyncio.ensure_future(fetch(arb))
+        await asyncio.sleep(0)
+        assert breaker.state == HALF_OPEN
+        assert await fetch(arb) is None  # Deneme sürerken ikinci istek gitmez
+        assert await probe is True
+        assert breaker.state == OPEN
+        assert breaker.open_timeout == pytest.approx(OPEN_TIMEOUT * 2)
+
+        # İki katına çıkan süre dolmadan deneme yok
+        server.latency = 0.0
+        await asyncio.sleep(OPEN_TIMEOUT * 1.2)
+        assert await fetch(arb) is None
+        await asyncio.sleep(OPEN_TIMEOUT)
+
+        # half-open -> closed: hızlı başarılı deneme kapatır, süre başa döner
+        assert await fetch(arb) is True
+        assert breaker.state == CLOSED
+        assert breaker.open_timeout == OPEN_TIMEOUT
+
+        # closed -> open: hiç hata olmadan sadece yavaş cevaplarla
+        server.latency = SLOW * 1.5
+        results = [await fetch(arb) for _ in range(4)]
+        assert results == [True] * 4
+        assert breaker.state == OPEN
+        assert await fetch(arb) is None
+    finally:
+        await arb.transport.close()
+        await asyncio.to_thread(arb.db.close)
+        await server.stop()
+
+
+def test_breaker_cycle_through_fetch_exchange():
+    asyncio.run(scenario())
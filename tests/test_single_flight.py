@@ -0,0 +1,99 @@
+"""Concurrent snapshot reads against a local exchange stub: one upstream fetch per exchange per refresh window."""
+import asyncio
+import os
+import tempfile
+
+_workdir = tempfile.mkdtemp()
+os.environ['DATABASE_PATH'] = os.path.join(_workdir, 'test.db')
+os.environ['ARCHIVE_DIR'] = os.path.join(_workdir, 'archive')
+
+import bot as bot_module  # noqa: E402
+from benchmarks.server import ExchangeStubServer  # noqa: E402
+from benchmarks.synthetic import SyntheticMarket  # noqa: E402
+from scheduler import RefreshScheduler  # noqa: E402
+
+EXCHANGES = ('binance', 'mexc', 'bitrue')
+USERS = 300
+LATENCY = 0.2
+
+
+def build(server):
+    arb = bot_module.ArbitrageBot()
+    arb.connectors = server.point_connectors(arb.connectors)
+    arb.exchanges = {name: connector.url for name, connector in arb.connectors.items()}
+    arb.scheduler = RefreshScheduler(
+        {name: connector.min_interval for name, connector in arb.connectors.items()},
+        fetch=arb.fetch_exchange, publish=arb.publish_exchange, skip=arb.skip_refresh,
+    )
+    return arb
+
+
+def next_window(arb):
+    """Yenileme aralığı doldu: backoff'ta olmayan borsalar tekrar due"""
+    for state in arb.scheduler.schedules.values():
+        if not state.in_backoff:
+            state.next_run = 0
+
+
+async def burst(arb):
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    await asyncio.gather(*(arb.get_snapshot('free' if i % 2 else 'premium') for i in range(USERS)))
+    return loop.time() - start
+
+
+async def settle(cache):
+    while cache._inflight is not None:
+        await asyncio.sleep(0.01)
+
+
+async def scenario():
+    server = ExchangeStubServer(SyntheticMarket(EXCHANGES, symbols=200), latency=LATENCY)
+    await server.start()
+    arb = build(server)
+    cache = arb.snapshot_cache
+    try:
+        # Soğuk cache: herkes tek bir fetch'i bekler, başlangıç kademesi beklenmez
+        await burst(arb)
+        assert dict(server.hits) == {name: 1 for name in EXCHANGES}
+        assert arb.snapshots['premium'].opportunities
+
+        # TTL içinde: upstream'e gidilmez
+        await burst(arb)
+        assert dict(server.hits) == {name: 1 for name in EXCHANGES}
+
+        # Bayat: eski veri hemen döner, arka planda tek yenileme
+        cache.updated_at -= cache.ttl + 1
+        cache.last_refresh_started = 0
+        next_window(arb)
+        assert await burst(arb) < LATENCY
+        await settle(cache)
+        assert dict(server.hits) == {name: 2 for name in EXCHANGES}
+
+        # Aralık dolmadan bayat okuma: due borsa yok, tekrar çekilmez
+        cache.updated_at -= cache.ttl + 1
+        cache.last_refresh_started = 0
+        await burst(arb)
+        await settle(cache)
+        assert dict(server.hits) == {name: 2 for name in EXCHANGES}
+
+        # Rate limit: 429 veren borsa backoff'a girer, sonraki okumalar ona gitmez
+        server.errors['binance'] = 429
+        cache.updated_at -= cache.max_staleness + 1
+        next_window(arb)
+        await burst(arb)
+        assert dict(server.hits) == {name: 3 for name in EXCHANGES}
+        assert arb.scheduler.schedules['binance'].in_backoff
+
+        cache.updated_at -= cache.max_staleness + 1
+        next_window(arb)
+        await burst(arb)
+        assert dict(server.hits) == {'binance': 3, 'mexc': 4, 'bitrue': 4}
+    finally:
+        await arb.transport.close()
+        await asyncio.to_thread(arb.db.close)
+        await server.stop()
+
+
+def test_one_upstream_fetch_per_window():
+    asyncio.run(scenario())
@@ -0,0 +1,89 @@
+"""Replay recorded ticker frames through FeedManager into a PriceBook over a local WebSocket server."""
+import asyncio
+import os
+
+from benchmarks.server import WebSocketReplayServer
+from connectors import build_connectors
+from price_book import PriceBook
+from ws_feeds import FEEDS, FeedManager
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'ws')
+MIN_VOLUME = 100000
+
+# Bağlanmadan önceki REST snapshot; abonelikler bu sembollerden kurulur
+SEED = {
+    'BTCUSDT': {'price': 64000.5, 'volume': 118416000.0, 'bid': 64000.1, 'ask': 64000.9},
+    'ETHUSDT': {'price': 3100.25, 'volume': 124010000.0, 'bid': 3100.2, 'ask': 3100.3},
+    'LOWUSDT': {'price': 0.0125, 'volume': 150000.0},
+}
+
+
+def load_frames():
+    frames = {}
+    for name in FEEDS:
+        with open(os.path.join(FIXTURES, name + '.jsonl')) as f:
+            frames[name] = [line.rstrip('\n') for line in f if line.strip()]
+    return frames
+
+
+async def replay(frames):
+    connectors = build_connectors(MIN_VOLUME)
+    book = PriceBook()
+
+    async def resync(exchange):
+        return SEED
+
+    server = WebSocketReplayServer(frames)
+    await server.start()
+    manager = FeedManager(book, lambda symbol, exchange: connectors[exchange].normalize_symbol(symbol),
+                          MIN_VOLUME, resync, urls=server.feed_urls())
+    manager.start()
+    try:
+        for _ in range(500):
+            done = all(feed.messages == len(frames[name]) for name, feed in manager.feeds.items())
+            if done and all(server.received[name] for name in ('bybit', 'okx', 'gate')):
+                break
+            await asyncio.sleep(0.01)
+        live = manager.live_exchanges()
+    finally:
+        await manager.stop()
+        await server.stop()
+    return book, server, live
+
+
+def test_feeds_replay_into_price_book():
+    frames = load_frames()
+    book, server, live = asyncio.run(replay(frames))
+
+    assert sorted(live) == sorted(FEEDS)
+    assert dict(server.connections) == {name: 1 for name in FEEDS}
+
+    for name in FEEDS:
+        # Hacim eşiğinin altına düşen sembol kitaptan çıkar, bozuk frame'ler atlanır
+        assert sorted(book.symbols(name)) == ['BTCUSDT', 'ETHUSDT'], name
+        btc, eth = book.get(name, 'BTCUSDT'), book.get(name, 'ETHUSDT')
+        assert (btc['price'], btc['volume']) == (64100.5, 118600000.0), name
+        assert (eth['price'], eth['volume']) == (3105.25, 124200000.0), name
+        if name == 'bybit':
+            # Spot ticker kanalı bid/ask taşımaz; snapshot'tan kalan eski değerler temizlenir
+            assert 'bid' not in btc and 'ask' not in btc
+            continue
+        assert (btc['bid'], btc['ask'], btc['bid_size'], btc['ask_size']) == (64100.1, 64100.9, 0.75, 1.2), name
+        assert (eth['bid'], eth['ask'], eth['bid_size'], eth['ask_size']) == (3105.2, 3105.3, 12.5, 8.4), name
+
+
+def test_feeds_subscribe_to_snapshot_symbols():
+    frames = load_frames()
+    book, server, live = asyncio.run(replay(frames))
+
+    assert server.received['binance'] == []
+    assert server.received['bybit'] == [
+        {'op': 'subscribe', 'args': ['tickers.BTCUSDT', 'tickers.ETHUSDT', 'tickers.LOWUSDT']}]
+    assert server.received['okx'] == [{'op': 'subscribe', 'args': [
+        {'channel': 'tickers', 'instId': 'BTC-USDT'},
+        {'channel': 'tickers', 'instId': 'ETH-USDT'},
+        {'channel': 'tickers', 'instId': 'LOW-USDT'},
+    ]}]
+    [gate] = server.received['gate']
+    assert (gate['channel'], gate['event'], gate['payload']) == (
+        'spot.tickers', 'subscribe', ['BTC_USDT', 'ETH_USDT', 'LOW_USDT'])
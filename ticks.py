@@ -0,0 +1,92 @@
+import logging
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Iterable, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+# Kayıt başlığı: zaman damgası, borsa adı uzunluğu, sıkıştırılmış gövde uzunluğu
+RECORD_HEADER = struct.Struct('<dHI')
+FILE_SUFFIX = '.ticks'
+
+
+class Tick(NamedTuple):
+    timestamp: float
+    exchange: str
+    body: bytes
+
+
+class TickRecorder:
+    """Append-only log of raw exchange REST responses.
+
+    Every record is a fixed header, the exchange name and the zlib-compressed
+    response body. Files rotate hourly (UTC) and are written from a single
+    background thread, so recording never blocks the event loop and records
+    keep their arrival order.
+    """
+
+    def __init__(self, directory: str, compress_level: int = 3):
+        self.directory = directory
+        self.compress_level = compress_level
+        self._file: Optional[IO[bytes]] = None
+        self._path = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='tick-recorder')
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, timestamp: float) -> str:
+        return os.path.join(self.directory, time.strftime('%Y%m%d-%H', time.gmtime(timestamp)) + FILE_SUFFIX)
+
+    def record(self, exchange: str, body: bytes, timestamp: float = None):
+        """Queue one response for writing; returns immediately"""
+        self._writer.submit(self._append, timestamp or time.time(), exchange, body)
+
+    def _append(self, timestamp: float, exchange: str, body: bytes):
+        try:
+            path = self.path_for(timestamp)
+            if path != self._path:
+                if self._file:
+                    self._file.close()
+                self._file = open(path, 'ab')
+                self._path = path
+            name = exchange.encode()
+            compressed = zlib.compress(body, self.compress_level)
+            self._file.write(RECORD_HEADER.pack(timestamp, len(name), len(compressed)) + name + compressed)
+            self._file.flush()
+        except Exception as e:
+            logger.error(f"Tick recording failed for {exchange}: {e}")
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def tick_files(directory: str) -> List[str]:
+    """Recorded files in chronological order"""
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(FILE_SUFFIX)
+    )
+
+
+def read_ticks(paths: Iterable[str], exchanges: Iterable[str] = None) -> Iterator[Tick]:
+    """Yield recorded ticks in file order; a truncated last record is skipped"""
+    wanted = set(exchanges) if exchanges else None
+    for path in paths:
+        with open(path, 'rb') as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                timestamp, name_len, body_len = RECORD_HEADER.unpack(header)
+                name = f.read(name_len)
+                compressed = f.read(body_len)
+                if len(name) < name_len or len(compressed) < body_len:
+                    logger.warning(f"Truncated tick record at end of {path}")
+                    break
+                exchange = name.decode()
+                if wanted is None or exchange in wanted:
+                    yield Tick(timestamp, exchange, zlib.decompress(compressed))
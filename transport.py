@@ -0,0 +1,162 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional
+
+import aiohttp
+from aiohttp import TCPConnector
+
+logger = logging.getLogger(__name__)
+
+# Hızlı C JSON parser varsa onu kullan
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Artımlı (streaming) JSON parser, opsiyonel
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+STREAMING_JSON_AVAILABLE = ijson is not None
+
+try:
+    import brotli  # noqa: F401  aiohttp br decode için Brotli paketine ihtiyaç duyar
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'application/json',
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+
+def loads(body: bytes):
+    """Decode a JSON document, preferring orjson when installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+class ExchangeHTTPError(Exception):
+    """Non-200 response from an exchange"""
+
+    def __init__(self, exchange: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"{exchange} returned status {status}")
+        self.exchange = exchange
+        self.status = status
+        self.retry_after = retry_after
+
+
+class _TimedReader:
+    """Response body wrapper counting bytes read and time spent waiting for them"""
+
+    def __init__(self, content: aiohttp.StreamReader):
+        self.content = content
+        self.bytes = 0
+        self.wait = 0.0
+
+    async def read(self, n: int = -1) -> bytes:
+        start = time.perf_counter()
+        chunk = await self.content.read(n)
+        self.wait += time.perf_counter() - start
+        self.bytes += len(chunk)
+        return chunk
+
+
+class HttpTransport:
+    """Shared keep-alive HTTP client for all exchange REST calls.
+
+    One connector for the whole bot: warm TLS connections are reused across
+    refreshes, DNS answers are cached and each host gets a small connection cap.
+    """
+
+    def __init__(self, limit: int = 50, limit_per_host: int = 5, ttl_dns_cache: int = 300,
+                 keepalive_timeout: float = 75, max_concurrency: int = 10,
+                 default_timeout: float = 10, timeouts: Dict[str, float] = None,
+                 trace_configs: List[aiohttp.TraceConfig] = None):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.default_timeout = default_timeout
+        self.timeouts = timeouts or {}
+        self.trace_configs = trace_configs or []
+        self.session: Optional[aiohttp.ClientSession] = None
+        # Aynı anda en fazla max_concurrency istek
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Paylaşılan session döndür (event loop içinde tembel oluşturulur)"""
+        if self.session is None or self.session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=self.ttl_dns_cache,
+                use_dns_cache=True,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers=DEFAULT_HEADERS,
+                trace_configs=self.trace_configs,
+            )
+        return self.session
+
+    def timeout_for(self, exchange: str) -> aiohttp.ClientTimeout:
+        total = self.timeouts.get(exchange, self.default_timeout)
+        return aiohttp.ClientTimeout(total=total, connect=min(5, total))
+
+    @staticmethod
+    def _check_status(exchange: str, response: aiohttp.ClientResponse):
+        if response.status != 200:
+            retry_after = response.headers.get('Retry-After')
+            raise ExchangeHTTPError(
+                exchange, response.status,
+                float(retry_after) if retry_after and retry_after.isdigit() else None,
+            )
+
+    async def get_bytes(self, exchange: str, url: str) -> bytes:
+        """GET url and return the raw body, raising ExchangeHTTPError on non-200"""
+        async with self.semaphore:
+            session = await self.get_session()
+            async with session.get(url, timeout=self.timeout_for(exchange)) as response:
+                self._check_status(exchange, response)
+                return await response.read()
+
+    async def get_json(self, exchange: str, url: str):
+        """GET url and decode JSON, raising ExchangeHTTPError on non-200"""
+        return loads(await self.get_bytes(exchange, url))
+
+    async def stream_items(self, exchange: str, url: str, prefix: str, kv: bool = False,
+                           stats: Dict[str, float] = None) -> AsyncIterator:
+        """Yield rows at `prefix` while the body is still downloading (needs ijson).
+
+        kv=True yields (key, value) pairs of the object at `prefix` instead of array items.
+        When the body is consumed, `stats` gets 'bytes' (decoded body size) and
+        'parse_seconds' (time spent decoding and handling rows, network waits excluded).
+        """
+        async with self.semaphore:
+            session = await self.get_session()
+            async with session.get(url, timeout=self.timeout_for(exchange)) as response:
+                self._check_status(exchange, response)
+                reader = _TimedReader(response.content)
+                if kv:
+                    rows = ijson.kvitems_async(reader, prefix, use_float=True)
+                else:
+                    rows = ijson.items_async(reader, prefix, use_float=True)
+                start = time.perf_counter()
+                async for row in rows:
+                    yield row
+                if stats is not None:
+                    stats['bytes'] = reader.bytes
+                    stats['parse_seconds'] = time.perf_counter() - start - reader.wait
+
+    async def close(self):
+        if self.session and not self.session.closed:
+            await self.session.close()
@@ -0,0 +1,138 @@
+import logging
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError:  # numpy opsiyonel, yoksa saf Python yolu kullanılır
+    np = None
+
+from price_book import BOOK_FIELDS, FIELDS, ExchangeView
+
+logger = logging.getLogger(__name__)
+
+NUMPY_AVAILABLE = np is not None
+
+
+def build_matrices(all_data: Dict[str, Dict[str, Dict]]):
+    """Pack every quote field into dense symbols x exchanges arrays (NaN = not listed / not provided)"""
+    exchanges = [ex for ex, data in all_data.items() if data]
+    symbols = sorted({symbol for ex in exchanges for symbol in all_data[ex]})
+    index = {symbol: i for i, symbol in enumerate(symbols)}
+
+    matrices = {field: np.full((len(symbols), len(exchanges)), np.nan) for field in FIELDS}
+    for col, exchange in enumerate(exchanges):
+        quotes = all_data[exchange]
+        rows = np.fromiter(map(index.__getitem__, quotes), np.intp, len(quotes))
+        if isinstance(quotes, ExchangeView):
+            # PriceBook snapshot: sütunlar doğrudan float dizilerinden, Quote üretmeden
+            slots = np.fromiter(quotes.slots.values(), np.intp, len(quotes))
+            for field, matrix in matrices.items():
+                matrix[rows, col] = np.frombuffer(quotes.owner.columns[field])[slots]
+            continue
+        matrices['price'][rows, col] = np.fromiter((q['price'] for q in quotes.values()), float, len(quotes))
+        matrices['volume'][rows, col] = np.fromiter((q.get('volume', 0) for q in quotes.values()), float, len(quotes))
+        for field in BOOK_FIELDS:
+            matrices[field][rows, col] = np.fromiter((q.get(field, 0.0) for q in quotes.values()), float, len(quotes))
+    # Bid/ask alanlarında 0.0 "borsa vermedi" demek
+    for field in BOOK_FIELDS:
+        matrix = matrices[field]
+        matrix[matrix == 0] = np.nan
+    return symbols, exchanges, matrices
+
+
+def safety_mask(bot, symbols: List[str], present, volumes):
+    """Vectorized ArbitrageBot.is_symbol_safe over every row"""
+    threshold = bot.min_volume_threshold
+    trusted = np.fromiter((s in bot.trusted_symbols for s in symbols), bool, len(symbols))
+    suspicious = np.fromiter(
+        (any(word in s.replace('USDT', '').replace('USDC', '').replace('BUSD', '').upper()
+             for word in bot.suspicious_symbols) for s in symbols),
+        bool, len(symbols),
+    )
+
+    listed = present.sum(axis=1)
+    vol = np.where(present, volumes, 0.0)
+    total_volume = vol.sum(axis=1)
+
+    # Şüpheli semboller: yüksek toplam hacim ve en az 2 güçlü borsa
+    strong_exchanges = (vol > threshold * 2).sum(axis=1)
+    suspicious_ok = (total_volume > threshold * 5) & (strong_exchanges >= 2)
+
+    # Genel kontroller: ortalama hacim ve borsalar arası 100x hacim farkı
+    with np.errstate(invalid='ignore', divide='ignore'):
+        avg_volume = total_volume / listed
+    max_vol = np.where(present, volumes, -np.inf).max(axis=1)
+    min_vol = np.where(present, volumes, np.inf).min(axis=1)
+    lopsided = (min_vol > 0) & (max_vol > min_vol * 100)
+    general_ok = (listed > 0) & (avg_volume >= threshold) & ~lopsided
+
+    return trusted | (suspicious & suspicious_ok) | (~trusted & ~suspicious & general_ok)
+
+
+def calculate_arbitrage_vectorized(bot, all_data: Dict[str, Dict[str, Dict]], is_premium: bool = False,
+                                   max_profit: float = None) -> List[Dict]:
+    """NumPy equivalent of ArbitrageBot.calculate_arbitrage"""
+    if max_profit is None:
+        max_profit = bot.max_profit_threshold
+
+    symbols, exchanges, matrices = build_matrices(all_data)
+    if not symbols:
+        return []
+    prices, volumes = matrices['price'], matrices['volume']
+
+    present = ~np.isnan(prices)
+    common = present.sum(axis=1) >= 2
+    safe = common & safety_mask(bot, symbols, present, volumes)
+
+    # Alış ask'ten, satış bid'den; vermeyen borsada son fiyat
+    has_ask = ~np.isnan(matrices['ask'])
+    has_bid = ~np.isnan(matrices['bid'])
+    asks = np.where(has_ask, matrices['ask'], prices)
+    bids = np.where(has_bid, matrices['bid'], prices)
+
+    # min()/max(reversed()) ile aynı: eşitlikte alış ilk borsa, satış son borsa
+    buy_idx = np.where(present, asks, np.inf).argmin(axis=1)
+    reversed_max = np.where(present, bids, -np.inf)[:, ::-1].argmax(axis=1)
+    sell_idx = len(exchanges) - 1 - reversed_max
+
+    rows = np.arange(len(symbols))
+    buy_price = asks[rows, buy_idx]
+    sell_price = bids[rows, sell_idx]
+    buy_volume = np.nan_to_num(volumes[rows, buy_idx])
+    sell_volume = np.nan_to_num(volumes[rows, sell_idx])
+    executable = has_ask[rows, buy_idx] & has_bid[rows, sell_idx]
+    fill_size = np.nan_to_num(np.minimum(buy_price * matrices['ask_size'][rows, buy_idx],
+                                         sell_price * matrices['bid_size'][rows, sell_idx]))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        profit = ((sell_price - buy_price) / buy_price) * 100
+        price_ratio = sell_price / buy_price
+
+    candidates = safe & (buy_price > 0)
+    too_high = candidates & (profit > max_profit)
+    for row in np.flatnonzero(too_high):
+        logger.warning(f"Suspicious high profit: {symbols[row]} - {profit[row]:.2f}%")
+
+    valid = candidates & ~too_high & (price_ratio <= 1.3) & (profit >= 0.1)
+    if not is_premium:
+        valid &= profit <= bot.free_user_max_profit
+
+    logger.info(f"Found {int(common.sum())} common symbols")
+
+    opportunities = [
+        {
+            'symbol': symbols[row],
+            'buy_exchange': exchanges[buy_idx[row]],
+            'sell_exchange': exchanges[sell_idx[row]],
+            'buy_price': float(buy_price[row]),
+            'sell_price': float(sell_price[row]),
+            'profit_percent': float(profit[row]),
+            'buy_volume': float(buy_volume[row]),
+            'sell_volume': float(sell_volume[row]),
+            'avg_volume': float((buy_volume[row] + sell_volume[row]) / 2),
+            'executable': bool(executable[row]),
+            'fill_size': float(fill_size[row]),
+        }
+        for row in np.flatnonzero(valid)
+    ]
+    return sorted(opportunities, key=lambda x: x['profit_percent'], reverse=True)
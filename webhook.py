@@ -0,0 +1,119 @@
+import asyncio
+import hmac
+import logging
+from collections import deque
+from typing import Deque, List, Optional, Set
+
+from aiohttp import web
+from telegram import Update
+from telegram.ext import Application
+
+from metrics import WEBHOOK_QUEUED, WEBHOOK_UPDATES
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+
+
+class UpdateDeduplicator:
+    """Remembers the last `size` update ids; Telegram redelivers an update
+    whose webhook call timed out or failed even if it was processed."""
+
+    def __init__(self, size: int = 10000):
+        self.size = size
+        self.order: Deque[int] = deque()
+        self.seen: Set[int] = set()
+
+    def __contains__(self, update_id: int) -> bool:
+        return update_id in self.seen
+
+    def add(self, update_id: int):
+        self.seen.add(update_id)
+        self.order.append(update_id)
+        if len(self.order) > self.size:
+            self.seen.discard(self.order.popleft())
+
+
+class WebhookServer:
+    """aiohttp listener that receives Telegram updates for an Application.
+
+    POST `path` checks the secret token header, drops updates already seen
+    and hands the rest to `workers` tasks that run app.process_update. At
+    most `max_pending` updates wait for a worker; beyond that the request
+    gets 503 so Telegram delivers it again later instead of the replica
+    piling up work. GET /healthz is for the load balancer.
+    """
+
+    def __init__(self, app: Application, path: str, secret_token: str, workers: int = 32,
+                 max_pending: int = 1000, dedup_size: int = 10000):
+        self.app = app
+        self.path = path
+        self.secret_token = secret_token
+        self.workers = workers
+        self.queue: asyncio.Queue = asyncio.Queue(max_pending)
+        self.dedup = UpdateDeduplicator(dedup_size)
+        self.runner: Optional[web.AppRunner] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode(), self.secret_token.encode()):
+            WEBHOOK_UPDATES.inc('unauthorized')
+            return web.Response(status=403)
+        try:
+            update = Update.de_json(await request.json(), self.app.bot)
+        except (ValueError, KeyError, TypeError):
+            update = None
+        if update is None:
+            WEBHOOK_UPDATES.inc('invalid')
+            return web.Response(status=400)
+        if update.update_id in self.dedup:
+            # Tekrar teslim: zaten işlendi/kuyrukta, Telegram'a tamam de
+            WEBHOOK_UPDATES.inc('duplicate')
+            return web.Response()
+        if self.queue.full():
+            WEBHOOK_UPDATES.inc('overloaded')
+            return web.Response(status=503)
+        self.dedup.add(update.update_id)
+        self.queue.put_nowait(update)
+        WEBHOOK_QUEUED.set(self.queue.qsize())
+        WEBHOOK_UPDATES.inc('accepted')
+        return web.Response()
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.Response(text='ok')
+
+    async def worker(self):
+        while True:
+            update = await self.queue.get()
+            WEBHOOK_QUEUED.set(self.queue.qsize())
+            try:
+                await self.app.process_update(update)
+            except Exception as e:
+                logger.error(f"Update {update.update_id} failed: {e}")
+            finally:
+                self.queue.task_done()
+
+    async def start(self, host: str, port: int):
+        self._tasks = [asyncio.create_task(self.worker()) for _ in range(self.workers)]
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        app.router.add_get('/healthz', self.handle_health)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        logger.info(f"Webhook listening on http://{host}:{port}{self.path} with {self.workers} workers")
+
+    async def stop(self, timeout: float = 10):
+        """Stop accepting updates, then give queued ones `timeout` seconds to finish"""
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queue.qsize()} unprocessed updates on shutdown")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
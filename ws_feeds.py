@@ -0,0 +1,213 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from markets import split_symbol
+from price_book import PriceBook, top_of_book
+
+logger = logging.getLogger(__name__)
+
+# (symbol, price, quote volume, bid/ask alanları - kanal vermiyorsa boş)
+Tick = Tuple[str, float, float, Dict[str, float]]
+
+
+class WebSocketFeed:
+    """Long-lived ticker subscription that streams updates into a PriceBook"""
+
+    name = ''
+    url = ''
+    # Sembol bazlı abonelik gerektiren borsalar REST snapshot'taki sembollere abone olur
+    batch_size = 10
+
+    def __init__(self, book: PriceBook, normalize: Callable[[str, str], str],
+                 min_volume: float, resync: Callable[[str], Awaitable[Dict]] = None,
+                 url: str = None, heartbeat: float = 20, max_backoff: float = 60):
+        self.book = book
+        self.normalize = normalize
+        self.min_volume = min_volume
+        self.resync = resync
+        self.url = url or self.url
+        self.heartbeat = heartbeat
+        self.max_backoff = max_backoff
+        self.connected = False
+        self.last_message = 0.0
+        self.messages = 0
+        self.bytes_received = 0
+
+    def raw_symbol(self, symbol: str) -> str:
+        """Exchange-native symbol for a normalized one"""
+        return symbol
+
+    def subscribe_messages(self, symbols: List[str]) -> List[Dict]:
+        """Messages sent right after connecting"""
+        return []
+
+    def parse_message(self, message) -> Iterable[Tick]:
+        """Extract ticks from one decoded frame"""
+        raise NotImplementedError
+
+    def is_live(self, max_age: float = 10) -> bool:
+        return self.connected and (time.time() - self.last_message) < max_age
+
+    def handle_frame(self, raw: str):
+        """Decode a text frame and apply its ticks to the book"""
+        self.messages += 1
+        self.bytes_received += len(raw)
+        self.last_message = time.time()
+        try:
+            message = json.loads(raw)
+        except ValueError:
+            return
+        try:
+            for symbol, price, volume, book_fields in self.parse_message(message):
+                symbol = self.normalize(symbol, self.name)
+                if volume > self.min_volume and price > 0:
+                    self.book.update(self.name, symbol, price, volume, **book_fields)
+                else:
+                    self.book.remove(self.name, symbol)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.debug(f"{self.name} malformed frame: {e}")
+
+    async def _snapshot(self):
+        """REST snapshot on (re)connect so gaps during downtime are covered"""
+        if self.resync is None:
+            return
+        data = await self.resync(self.name)
+        self.book.load_snapshot(self.name, data)
+
+    async def run(self, session: aiohttp.ClientSession):
+        """Connect, subscribe and consume frames forever, reconnecting with backoff"""
+        backoff = 1
+        while True:
+            try:
+                await self._snapshot()
+                async with session.ws_connect(self.url, heartbeat=self.heartbeat) as ws:
+                    self.connected = True
+                    backoff = 1
+                    logger.info(f"{self.name} websocket connected")
+                    symbols = [self.raw_symbol(s) for s in self.book.symbols(self.name)]
+                    for message in self.subscribe_messages(symbols):
+                        await ws.send_str(json.dumps(message))
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            self.handle_frame(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"{self.name} websocket error: {e}")
+            finally:
+                self.connected = False
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+
+class BinanceFeed(WebSocketFeed):
+    name = 'binance'
+    # miniTicker bid/ask taşımaz; tam ticker b/B/a/A alanlarıyla gelir
+    url = 'wss://stream.binance.com:9443/ws/!ticker@arr'
+
+    def parse_message(self, message):
+        if isinstance(message, list):
+            for item in message:
+                yield item['s'], float(item['c']), float(item['q']), top_of_book(
+                    item.get('b'), item.get('a'), item.get('B'), item.get('A'))
+
+
+class BybitFeed(WebSocketFeed):
+    name = 'bybit'
+    url = 'wss://stream.bybit.com/v5/public/spot'
+
+    def subscribe_messages(self, symbols):
+        topics = [f"tickers.{s}" for s in symbols]
+        return [{'op': 'subscribe', 'args': topics[i:i + self.batch_size]}
+                for i in range(0, len(topics), self.batch_size)]
+
+    def parse_message(self, message):
+        data = message.get('data') if isinstance(message, dict) else None
+        if isinstance(data, dict) and 'lastPrice' in data:
+            yield data['symbol'], float(data['lastPrice']), float(data.get('turnover24h') or 0), top_of_book(
+                data.get('bid1Price'), data.get('ask1Price'), data.get('bid1Size'), data.get('ask1Size'))
+
+
+class OkxFeed(WebSocketFeed):
+    name = 'okx'
+    url = 'wss://ws.okx.com:8443/ws/v5/public'
+    batch_size = 100
+
+    def raw_symbol(self, symbol):
+        parts = split_symbol(symbol)
+        return f"{parts[0]}-{parts[1]}" if parts else symbol
+
+    def subscribe_messages(self, symbols):
+        args = [{'channel': 'tickers', 'instId': s} for s in symbols]
+        return [{'op': 'subscribe', 'args': args[i:i + self.batch_size]}
+                for i in range(0, len(args), self.batch_size)]
+
+    def parse_message(self, message):
+        if isinstance(message, dict):
+            for item in message.get('data', []):
+                yield item['instId'], float(item['last']), float(item.get('volCcy24h') or 0), top_of_book(
+                    item.get('bidPx'), item.get('askPx'), item.get('bidSz'), item.get('askSz'))
+
+
+class GateFeed(WebSocketFeed):
+    name = 'gate'
+    url = 'wss://api.gateio.ws/ws/v4/'
+    batch_size = 100
+
+    def raw_symbol(self, symbol):
+        parts = split_symbol(symbol)
+        return f"{parts[0]}_{parts[1]}" if parts else symbol
+
+    def subscribe_messages(self, symbols):
+        return [{'time': int(time.time()), 'channel': 'spot.tickers', 'event': 'subscribe',
+                 'payload': symbols[i:i + self.batch_size]}
+                for i in range(0, len(symbols), self.batch_size)]
+
+    def parse_message(self, message):
+        if isinstance(message, dict) and message.get('event') == 'update':
+            item = message.get('result') or {}
+            if 'currency_pair' in item:
+                yield item['currency_pair'], float(item['last']), float(item.get('quote_volume') or 0), top_of_book(
+                    item.get('highest_bid'), item.get('lowest_ask'), item.get('highest_size'), item.get('lowest_size'))
+
+
+FEEDS = {feed.name: feed for feed in (BinanceFeed, BybitFeed, OkxFeed, GateFeed)}
+
+
+class FeedManager:
+    """Runs one WebSocketFeed task per streaming-capable exchange"""
+
+    def __init__(self, book: PriceBook, normalize, min_volume: float,
+                 resync: Callable[[str], Awaitable[Dict]], urls: Dict[str, str] = None):
+        urls = urls or {}
+        self.feeds = {
+            name: cls(book, normalize, min_volume, resync=resync, url=urls.get(name))
+            for name, cls in FEEDS.items()
+        }
+        self.tasks: List[asyncio.Task] = []
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    def start(self):
+        # WS bağlantıları uzun ömürlü, REST session'ının total timeout'u burada kullanılamaz
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, connect=10))
+        for feed in self.feeds.values():
+            self.tasks.append(asyncio.create_task(feed.run(self.session)))
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        if self.session and not self.session.closed:
+            await self.session.close()
+
+    def live_exchanges(self) -> List[str]:
+        return [name for name, feed in self.feeds.items() if feed.is_live()]